@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of the Effort Adjustment Factor (EAF) computation.
+
+Compares the per-call cost of the original dictionary-walking code path with
+'calculate' given a driver dictionary (memoized DriverProfile) and given a
+prebuilt DriverProfile.
+
+Run it with: python benchmarks/bench_drivers.py
+"""
+import timeit
+
+from cocomo_py import calculate, CocomoResult, ProjectMode
+from cocomo_py.constants import COCOMO_MODES, COST_DRIVERS
+from cocomo_py.drivers import DriverProfile
+
+DRIVERS = {"rely": "high", "cplx": "vhigh", "acap": "low", "pcap": "high", "tool": "vhigh", "sced": "low"}
+
+
+def legacy_eaf(drivers):
+    """The EAF loop as 'calculate' originally ran it on every call."""
+    eaf = 1.0
+    for driver_code, rating in drivers.items():
+        driver_code_lower = driver_code.lower()
+        rating_lower = rating.lower()
+        if driver_code_lower in COST_DRIVERS and rating_lower in COST_DRIVERS[driver_code_lower]['ratings']:
+            eaf *= COST_DRIVERS[driver_code_lower]['ratings'][rating_lower]
+    return eaf
+
+
+def legacy_calculate(kloc, mode, cost_per_month, drivers=None):
+    """'calculate' as it was before the compiled driver table."""
+    if mode not in COCOMO_MODES:
+        raise ValueError(f"Invalid mode '{mode}'.")
+    params = COCOMO_MODES[mode]
+    nominal_effort = params['a'] * (kloc ** params['b'])
+    eaf = legacy_eaf(drivers) if drivers else 1.0
+    adjusted_effort = nominal_effort * eaf
+    dev_time_months = params['c'] * (adjusted_effort ** params['d'])
+    people_required = adjusted_effort / dev_time_months if dev_time_months > 0 else 0
+    return CocomoResult(
+        kloc=kloc,
+        mode=mode,
+        effort_person_months=adjusted_effort,
+        development_time_months=dev_time_months,
+        people_required=people_required,
+        total_cost=adjusted_effort * cost_per_month,
+        cost_per_month=cost_per_month,
+        eaf=eaf,
+        is_intermediate=bool(drivers)
+    )
+
+
+def main(number: int = 100_000):
+    profile = DriverProfile(DRIVERS, strict=True)
+    assert profile.eaf == legacy_eaf(DRIVERS)
+    assert calculate(50, ProjectMode.ORGANIC, 8000, profile) == legacy_calculate(50, ProjectMode.ORGANIC, 8000, DRIVERS)
+
+    cases = {
+        "EAF: legacy loop": (lambda: legacy_eaf(DRIVERS), "EAF: legacy loop"),
+        "EAF: prebuilt profile": (lambda: profile.eaf, "EAF: legacy loop"),
+        "calculate: legacy path": (lambda: legacy_calculate(50, ProjectMode.ORGANIC, 8000, DRIVERS), "calculate: legacy path"),
+        "calculate: drivers dict": (lambda: calculate(50, ProjectMode.ORGANIC, 8000, DRIVERS), "calculate: legacy path"),
+        "calculate: DriverProfile": (lambda: calculate(50, ProjectMode.ORGANIC, 8000, profile), "calculate: legacy path"),
+    }
+    timings = {name: min(timeit.repeat(case, number=number, repeat=5)) / number for name, (case, _) in cases.items()}
+
+    print(f"{'case':<28} {'ns/call':>10} {'speedup':>9}")
+    for name, (_, baseline) in cases.items():
+        seconds = timings[name]
+        print(f"{name:<28} {seconds * 1e9:>10.0f} {timings[baseline] / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
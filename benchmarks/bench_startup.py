@@ -0,0 +1,96 @@
+"""
+Startup benchmark of the package and the 'cocomo' command.
+
+Each scenario runs in a fresh interpreter under 'python -X importtime'. The
+report gives the median wall time of the whole process, the cumulative import
+time of every top-level module it loaded and the number of modules imported,
+next to a bare interpreter as the baseline.
+
+Run it with: python benchmarks/bench_startup.py [--runs 20] [--record benchmarks/startup.jsonl]
+
+'--record' appends one JSON line per scenario, tagged with the git commit and
+the date, so the numbers can be tracked over time.
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "python": "pass",
+    "import cocomo_py": "import cocomo_py",
+    "from cocomo_py import calculate": "from cocomo_py import calculate",
+    "cocomo --version": "import sys; sys.argv = ['cocomo', '--version']; from cocomo_py.entry import main; main()",
+    "cocomo explain": "import sys; sys.argv = ['cocomo', 'explain']; from cocomo_py.entry import main; main()",
+    "cocomo --help": "import sys; sys.argv = ['cocomo', '--help']; from cocomo_py.entry import main; main()",
+}
+
+
+def run_once(code: str):
+    """Runs a scenario; returns the wall time and the self/cumulative import times (microseconds)."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    wall = time.perf_counter() - start
+    modules = 0
+    cumulative = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            modules += 1
+            # Top-level imports are not indented; their cumulative times add up to the total.
+            if not name.startswith("  "):
+                cumulative += int(total)
+    return wall, cumulative, modules
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20, help="Interpreter launches per scenario.")
+    parser.add_argument("--record", type=Path, default=None, help="Appends the results to this JSON Lines file.")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    date = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    print(f"{'scenario':34} {'wall ms':>8} {'import ms':>10} {'modules':>8}")
+    records = []
+    for name, code in SCENARIOS.items():
+        runs = [run_once(code) for _ in range(args.runs)]
+        wall = statistics.median(run[0] for run in runs) * 1e3
+        imports = statistics.median(run[1] for run in runs) / 1e3
+        modules = runs[-1][2]
+        print(f"{name:34} {wall:8.1f} {imports:10.1f} {modules:8d}")
+        records.append({
+            "commit": commit, "date": date, "python": sys.version.split()[0], "scenario": name,
+            "wall_ms": round(wall, 2), "import_ms": round(imports, 2), "modules": modules,
+        })
+
+    if args.record is not None:
+        with args.record.open("a", encoding="utf-8") as history:
+            for record in records:
+                history.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Fixtures of the pytest-benchmark suite.
+
+The synthetic source trees are generated once, deterministically, in the pytest
+cache directory ('.pytest_cache/d/cocomo-trees') and reused by later runs. Only
+the sizes given to '--tree-sizes' are benchmarked: the 1M-file tree takes a few
+minutes to create and several GB of inodes, so it is opt-in.
+"""
+import shutil
+from pathlib import Path
+
+import pytest
+
+TREE_SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# Files per directory of the synthetic trees
+FILES_PER_DIRECTORY = 100
+
+# One template per language; '{n}' makes every file different.
+TEMPLATES = {
+    ".py": '"""Module {n}."""\nimport os\n\n\ndef function_{n}(value):\n    # Doubles the value\n    return value * 2 + {n}\n',
+    ".js": "// Module {n}\nconst value = {n};\n\n/* Exported\n   helper */\nexport function helper() {{\n  return value * 2;\n}}\n",
+    ".c": "#include <stdio.h>\n\n/* Entry point {n} */\nint main(void) {{\n    printf(\"%d\\n\", {n});\n    return 0;\n}}\n",
+    ".go": "package main\n\n// Value {n}\nfunc value() int {{\n\treturn {n}\n}}\n",
+    ".md": "# Notes {n}\n\nNot counted as code.\n",
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--tree-sizes",
+        default="1k,100k",
+        help=f"Comma-separated synthetic tree sizes to benchmark, among {', '.join(TREE_SIZES)}.",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    selected = {size.strip().lower() for size in config.getoption("--tree-sizes").split(",")}
+    skip = pytest.mark.skip(reason="tree size not selected with --tree-sizes")
+    for item in items:
+        size = getattr(item, "callspec", None) and item.callspec.params.get("tree_size")
+        if size is not None and size not in selected:
+            item.add_marker(skip)
+
+
+def generate_tree(root: Path, n_files: int) -> None:
+    """Writes 'n_files' small source files, FILES_PER_DIRECTORY per directory, two levels deep."""
+    extensions = list(TEMPLATES)
+    for n in range(n_files):
+        directory = root / f"pkg{n // (FILES_PER_DIRECTORY * 100):03d}" / f"mod{n // FILES_PER_DIRECTORY % 100:02d}"
+        if n % FILES_PER_DIRECTORY == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        extension = extensions[n % len(extensions)]
+        (directory / f"file{n}{extension}").write_text(TEMPLATES[extension].format(n=n), encoding="utf-8")
+
+
+@pytest.fixture(scope="session")
+def tree(request):
+    """Returns a factory of synthetic trees, keyed by size name."""
+    base = Path(request.config.cache.mkdir("cocomo-trees"))
+
+    def make(size: str) -> Path:
+        root = base / size
+        marker = base / f"{size}.complete"
+        if not marker.exists():
+            shutil.rmtree(root, ignore_errors=True)
+            generate_tree(root, TREE_SIZES[size])
+            marker.touch()
+        return root
+
+    return make
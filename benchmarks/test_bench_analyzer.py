@@ -0,0 +1,37 @@
+"""
+Benchmarks of 'analyze_kloc' on the synthetic trees of 'conftest.py'.
+
+Each run counts the whole tree, so these use a fixed number of rounds instead
+of pytest-benchmark's calibration.
+"""
+import pytest
+from cocomo_py.analyzer import analyze_kloc
+from cocomo_py.cache import LocCache
+
+from conftest import TREE_SIZES
+
+ROUNDS = 3
+
+
+@pytest.mark.parametrize("tree_size", TREE_SIZES)
+def test_analyze_kloc(benchmark, tree, tree_size):
+    root = tree(tree_size)
+    benchmark.extra_info["files"] = TREE_SIZES[tree_size]
+    kloc = benchmark.pedantic(analyze_kloc, args=(root,), rounds=ROUNDS, warmup_rounds=1)
+    assert kloc > 0
+
+
+@pytest.mark.parametrize("tree_size", TREE_SIZES)
+def test_analyze_kloc_serial(benchmark, tree, tree_size):
+    root = tree(tree_size)
+    benchmark.extra_info["files"] = TREE_SIZES[tree_size]
+    benchmark.pedantic(analyze_kloc, args=(root,), kwargs={"jobs": 1}, rounds=ROUNDS, warmup_rounds=1)
+
+
+@pytest.mark.parametrize("tree_size", TREE_SIZES)
+def test_analyze_kloc_warm_cache(benchmark, tree, tree_size, tmp_path):
+    """Every file is unchanged since the warmup round, so only the cache is read."""
+    root = tree(tree_size)
+    benchmark.extra_info["files"] = TREE_SIZES[tree_size]
+    with LocCache(tmp_path / "cache.sqlite3") as cache:
+        benchmark.pedantic(analyze_kloc, args=(root,), kwargs={"cache": cache}, rounds=ROUNDS, warmup_rounds=1)
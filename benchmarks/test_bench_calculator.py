@@ -0,0 +1,72 @@
+"""
+Benchmarks of 'calculate', 'calculate_batch', the EAF computation and the portfolio staffing.
+"""
+import random
+
+import pytest
+from cocomo_py.calculator import calculate, calculate_batch
+from cocomo_py.drivers import DriverProfile
+from cocomo_py.models import ProjectMode
+from cocomo_py.portfolio import portfolio
+
+DRIVERS = {"rely": "high", "cplx": "vhigh", "acap": "low", "pcap": "high", "tool": "vhigh", "sced": "low"}
+
+# Rows of the batch benchmarks
+BATCH_SIZES = {"python": 100_000, "numpy": 1_000_000}
+
+# Projects of the portfolio benchmarks, started over five years
+PORTFOLIO_SIZES = {"python": 10_000, "numpy": 100_000}
+
+
+def batch_columns(size: int):
+    """Random sizes, modes and ratings, the same on every run."""
+    rng = random.Random(0)
+    kloc = [rng.uniform(1, 1000) for _ in range(size)]
+    modes = [rng.choice(["organic", "semi-detached", "embedded"]) for _ in range(size)]
+    drivers = {
+        "rely": [rng.choice([None, "low", "high"]) for _ in range(size)],
+        "cplx": [rng.choice([None, "high", "vhigh"]) for _ in range(size)],
+    }
+    return kloc, modes, drivers
+
+
+def test_calculate_basic(benchmark):
+    benchmark(calculate, 50, ProjectMode.ORGANIC, 8000)
+
+
+def test_calculate_drivers(benchmark):
+    benchmark(calculate, 50, ProjectMode.ORGANIC, 8000, DRIVERS)
+
+
+def test_calculate_profile(benchmark):
+    benchmark(calculate, 50, ProjectMode.ORGANIC, 8000, DriverProfile(DRIVERS))
+
+
+def test_calculate_cocomo2(benchmark):
+    benchmark(calculate, 50, ProjectMode.COCOMO_II, 8000, {"prec": "high", "pmat": "low", **DRIVERS})
+
+
+def test_eaf(benchmark):
+    """A profile built from scratch: what 'calculate' pays for a rating set it has not seen yet."""
+    benchmark(lambda: DriverProfile(DRIVERS, strict=True).eaf)
+
+
+@pytest.mark.parametrize("engine", BATCH_SIZES)
+def test_calculate_batch(benchmark, engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    kloc, modes, drivers = batch_columns(BATCH_SIZES[engine])
+    benchmark.extra_info["rows"] = len(kloc)
+    benchmark(calculate_batch, kloc, modes, 8000, drivers, use_numpy=engine == "numpy")
+
+
+@pytest.mark.parametrize("engine", PORTFOLIO_SIZES)
+def test_portfolio(benchmark, engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    size = PORTFOLIO_SIZES[engine]
+    kloc, modes, drivers = batch_columns(size)
+    batch = calculate_batch(kloc, modes, 8000, drivers, use_numpy=engine == "numpy")
+    starts = [random.Random(n).uniform(0, 60) for n in range(size)]
+    benchmark.extra_info["projects"] = size
+    benchmark(portfolio, batch, starts, use_numpy=engine == "numpy")
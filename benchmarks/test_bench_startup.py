@@ -0,0 +1,24 @@
+"""
+Benchmarks of the package and 'cocomo' command startup, in fresh interpreters.
+
+The scenarios are those of 'bench_startup.py', which also breaks the time down by import.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bench_startup import ROOT, SCENARIOS
+
+ROUNDS = 10
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_startup(benchmark, scenario):
+    command = [sys.executable, "-c", SCENARIOS[scenario]]
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    benchmark.pedantic(
+        subprocess.run, args=(command,), kwargs={"env": env, "stdout": subprocess.DEVNULL, "check": True},
+        rounds=ROUNDS, warmup_rounds=1
+    )
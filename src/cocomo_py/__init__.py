@@ -4,23 +4,133 @@ Cocomo-py: Uma ferramenta e biblioteca Python para estimar o custo de software u
 
 __version__ = "0.3.0"
 
-# Expõe as funções e classes principais para quem for usar como biblioteca
-from .calculator import calculate
-from .analyzer import analyze_kloc
-from .models import CocomoResult, ProjectMode, ClocNotFoundError, AnalysisError
-from .constants import COCOMO_MODES, COST_DRIVERS
+# Expõe as funções e classes principais para quem for usar como biblioteca.
+# Os submódulos só são importados no primeiro acesso a um destes nomes (PEP 562),
+# para que 'import cocomo_py' e 'cocomo --version' continuem rápidos.
+_EXPORTS = {
+    "calculate": "calculator",
+    "calculate_batch": "calculator",
+    "calculate_table": "calculator",
+    "simulate": "simulation",
+    "calibrate": "calibration",
+    "read_history": "calibration",
+    "load_calibration": "calibration",
+    "save_calibration": "calibration",
+    "sensitivity": "sensitivity",
+    "sweep": "sensitivity",
+    "portfolio": "portfolio",
+    "analyze_kloc": "analyzer",
+    "analyze_loc": "analyzer",
+    "analyze_tree": "analyzer",
+    "LocCache": "cache",
+    "Timings": "timings",
+    "DriverProfile": "drivers",
+    "Cocomo2Profile": "drivers",
+    "ProjectMode": "models",
+    "Backend": "models",
+    "OutputFormat": "models",
+    "DedupMode": "models",
+    "ProfileFormat": "models",
+    "CalibrationMethod": "models",
+    "StaffingCurve": "models",
+    "Calibration": "models",
+    "ModeFit": "models",
+    "DriverSensitivity": "models",
+    "SensitivityResult": "models",
+    "DriverSweep": "models",
+    "PortfolioTimeline": "models",
+    "LanguageStats": "models",
+    "LocReport": "models",
+    "LocTree": "models",
+    "AnalysisError": "models",
+    "CocomoResult": "models",
+    "CocomoBatchResult": "models",
+    "SimulationResult": "models",
+    "ClocNotFoundError": "models",
+    "InvalidDriverError": "models",
+    "COCOMO_MODES": "constants",
+    "COST_DRIVERS": "constants",
+    "COCOMO2_SCALE_FACTORS": "constants",
+    "COCOMO2_EFFORT_MULTIPLIERS": "constants",
+}
+
+# Mesmo efeito de 'typing.TYPE_CHECKING', sem o custo de importar 'typing'.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .calculator import calculate, calculate_batch, calculate_table
+    from .analyzer import analyze_kloc, analyze_loc, analyze_tree
+    from .cache import LocCache
+    from .timings import Timings
+    from .drivers import Cocomo2Profile, DriverProfile
+    from .simulation import simulate
+    from .calibration import calibrate, read_history, load_calibration, save_calibration
+    from .sensitivity import sensitivity, sweep
+    from .portfolio import portfolio
+    from .models import CocomoResult, CocomoBatchResult, SimulationResult, ProjectMode, Backend, OutputFormat, DedupMode, ProfileFormat, CalibrationMethod, StaffingCurve, Calibration, ModeFit, DriverSensitivity, SensitivityResult, DriverSweep, PortfolioTimeline, LanguageStats, LocReport, LocTree, ClocNotFoundError, AnalysisError, InvalidDriverError
+    from .constants import COCOMO_MODES, COST_DRIVERS, COCOMO2_SCALE_FACTORS, COCOMO2_EFFORT_MULTIPLIERS
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    # Guarda o valor no módulo, para que os próximos acessos não passem por aqui.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 # Define explicitamente a API pública do pacote.
 # Isto controla o que é importado quando se usa 'from cocomo_py import *'
 __all__ = [
     "calculate",
+    "calculate_batch",
+    "calculate_table",
+    "simulate",
+    "calibrate",
+    "read_history",
+    "load_calibration",
+    "save_calibration",
+    "sensitivity",
+    "sweep",
+    "portfolio",
     "analyze_kloc",
+    "analyze_loc",
+    "analyze_tree",
+    "LocCache",
+    "Timings",
     "ProjectMode",
+    "Backend",
+    "OutputFormat",
+    "DedupMode",
+    "ProfileFormat",
+    "CalibrationMethod",
+    "StaffingCurve",
+    "Calibration",
+    "ModeFit",
+    "DriverSensitivity",
+    "SensitivityResult",
+    "DriverSweep",
+    "PortfolioTimeline",
+    "LanguageStats",
+    "LocReport",
+    "LocTree",
     "COCOMO_MODES",
     "COST_DRIVERS",
+    "COCOMO2_SCALE_FACTORS",
+    "COCOMO2_EFFORT_MULTIPLIERS",
     "AnalysisError",
     "CocomoResult",
+    "CocomoBatchResult",
+    "SimulationResult",
     "ClocNotFoundError",
-    "AnalysisError",
+    "DriverProfile",
+    "Cocomo2Profile",
+    "InvalidDriverError",
 ]
-
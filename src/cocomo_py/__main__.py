@@ -0,0 +1,4 @@
+"""Runs the 'cocomo' command with 'python -m cocomo_py', through the same fast paths as the entry point."""
+from .entry import main
+
+main()
@@ -1,45 +1,1123 @@
-import subprocess
-import json
+import hashlib
+import os
+import re
+import time
+from dataclasses import replace
+from functools import lru_cache, partial
+from itertools import chain, islice
 from pathlib import Path
-from .models import AnalysisError, ClocNotFoundError
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-def analyze_kloc(project_path: Path) -> float:
+from .cache import CachedFile, LocCache
+from .dedup import ChunkSampler, Deduplicator, Fingerprint, pack_chunks, sampled_chunks, unpack_chunks
+from .ignore import EXCLUDED_DIRS, IgnoreRules, is_generated
+from .languages import LANGUAGES, language_for_path
+from .models import (
+    AnalysisError, Backend, ClocNotFoundError, DedupMode, FileCount, LanguageStats, LocReport, LocTree,
+)
+from .timings import ANALYZE, Timings, phase
+
+# Number of files sent to a worker process at a time.
+BATCH_SIZE = 256
+
+# Files modified less than this long before being read are re-hashed on the next cached run.
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Files are read in blocks of this size, so memory does not grow with the size of a file.
+READ_SIZE = 1 << 20
+
+# A NUL byte among the first bytes of a file marks it as binary (git's test); binary files are skipped.
+BINARY_PREFIX = 8000
+
+# The ASCII characters 'str.strip()' removes, with which lines are stripped without being decoded.
+_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# The reads of the batch being profiled in this process, see '_profiled_batch'.
+_profiled_reads: Optional[List[Tuple[str, int, int, int]]] = None
+
+
+def analyze_kloc(
+    project_path: Path,
+    backend: Backend = Backend.NATIVE,
+    jobs: Optional[int] = None,
+    cache: Optional[LocCache] = None,
+    revision: Union[str, Sequence[str], None] = None,
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    timings: Optional[Timings] = None
+) -> Union[float, Dict[str, float]]:
     """
-    Analyzes a local directory to count lines of code using 'cloc'.
+    Analyzes a local directory to count lines of code.
+
+    Args:
+        project_path: The path to the project directory, or to a tar or zip archive counted
+                      without being extracted ('-' reads it from the standard input).
+        backend: The line counting engine, the built-in counter ('native') or 'cloc'.
+        jobs: Number of worker processes used by the native counter.
+              Defaults to the number of CPUs.
+        cache: An optional LocCache, so that unchanged files are not counted again
+               (native counter only).
+        revision: A git revision, or a list of revisions, counted straight from the
+                  repository objects instead of the working tree (native counter only).
+                  A range such as 'v1.0..main' counts each of its first-parent commits.
+        exclude: Extra globs of files and directories to ignore, in .gitignore syntax,
+                 on top of the project's .gitignore files and '.cocomo.toml'.
+        dedup: Count duplicated files only once: 'exact' copies, or 'near' copies
+               too (working trees counted by the native backend only).
+        timings: An optional Timings, which records the phases of the run, the
+                 files and bytes counted per second and the slowest files.
+
+    Returns:
+        The total thousands of lines of code ('KLOC'), or a dictionary from
+        revision to KLOC when a list or a range of revisions is given (the
+        commit SHAs of a range, oldest first).
+
+    Raises:
+        ClocNotFoundError: If the 'cloc' backend is selected and its executable is not found.
+        AnalysisError: If the directory does not exist or if there is an error counting the lines.
+    """
+    if revision is None or (isinstance(revision, str) and ".." not in revision):
+        return analyze_loc(project_path, backend=backend, jobs=jobs, cache=cache, revision=revision,
+                           exclude=exclude, dedup=dedup, timings=timings).kloc
+
+    from .git import analyze_revisions, rev_list
+
+    _check_git_backend(project_path, backend)
+    with phase(timings, ANALYZE):
+        if isinstance(revision, str):
+            revision = rev_list(project_path, revision)
+        reports = analyze_revisions(project_path, revision, jobs=jobs, exclude=exclude, dedup=dedup)
+    return {rev: report.kloc for rev, report in reports.items()}
+
+
+def analyze_loc(
+    project_path: Path,
+    backend: Backend = Backend.NATIVE,
+    jobs: Optional[int] = None,
+    cache: Optional[LocCache] = None,
+    revision: Optional[str] = None,
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    timings: Optional[Timings] = None
+) -> LocReport:
+    """
+    Counts the blank, comment and code lines of a local directory, per language.
+
+    Args:
+        project_path: The path to the project directory, or to a tar or zip archive counted
+                      without being extracted ('-' reads it from the standard input).
+        backend: The line counting engine, the built-in counter ('native') or 'cloc'.
+        jobs: Number of worker processes used by the native counter.
+              Defaults to the number of CPUs.
+        cache: An optional LocCache, so that unchanged files are not counted again
+               (native counter only).
+        revision: A git revision counted straight from the repository objects
+                  instead of the working tree (native counter only).
+        exclude: Extra globs of files and directories to ignore, in .gitignore syntax,
+                 on top of the project's .gitignore files and '.cocomo.toml'.
+        dedup: Count duplicated files only once: 'exact' copies, or 'near' copies
+               too (working trees counted by the native backend only).
+        timings: An optional Timings, which records the phases of the run, the
+                 files and bytes counted per second and the slowest files.
+
+    Returns:
+        A LocReport with the per-language counts and their sum, and the counts
+        of the duplicates left out.
+
+    Raises:
+        ClocNotFoundError: If the 'cloc' backend is selected and its executable is not found.
+        AnalysisError: If the directory does not exist or if there is an error counting the lines.
+    """
+    if revision is not None:
+        from .git import analyze_revisions
+
+        _check_git_backend(project_path, backend)
+        with phase(timings, ANALYZE):
+            return analyze_revisions(project_path, [revision], jobs=jobs, exclude=exclude, dedup=dedup)[revision]
+    if _is_archive(project_path):
+        from .archive import analyze_archive
+
+        _check_archive_backend(backend)
+        with phase(timings, ANALYZE):
+            return analyze_archive(project_path, jobs=jobs, exclude=exclude, dedup=dedup, timings=timings)
+
+    project_path = Path(project_path)
+    if not project_path.is_dir():
+        raise AnalysisError(f"The specified directory does not exist: {project_path}")
+
+    root = os.path.abspath(project_path)
+    if backend == Backend.CLOC:
+        _check_cloc_dedup(dedup)
+        with phase(timings, ANALYZE):
+            return _analyze_with_cloc(project_path, IgnoreRules(root, exclude), timings)
+    if backend == Backend.NATIVE:
+        deduplicator = make_deduplicator(dedup)
+        with phase(timings, ANALYZE):
+            report = build_report(count_files(root, IgnoreRules(root, exclude), jobs, cache, deduplicator, timings))
+        return with_duplicates(report, deduplicator)
+    raise ValueError(f"Invalid backend '{backend}'. Choose from {', '.join(Backend)}")
+
+
+def analyze_tree(
+    project_path: Path,
+    max_depth: Optional[int] = None,
+    backend: Backend = Backend.NATIVE,
+    jobs: Optional[int] = None,
+    cache: Optional[LocCache] = None,
+    revision: Optional[str] = None,
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    timings: Optional[Timings] = None
+) -> LocTree:
+    """
+    Counts the lines of a project per language and per directory subtree, in one walk.
 
     Args:
         project_path: The path to the project directory.
+        max_depth: Number of directory levels kept in the tree. Files deeper than
+                   that are counted in their ancestor at the limit, so memory grows
+                   with the number of directories kept, never with the number of files.
+                   None keeps every directory; 0 keeps only the root.
+        backend: The line counting engine, the built-in counter ('native') or 'cloc'.
+        jobs: Number of worker processes used by the native counter.
+              Defaults to the number of CPUs.
+        cache: An optional LocCache, so that unchanged files are not counted again
+               (native counter only).
+        revision: A git revision counted straight from the repository objects
+                  instead of the working tree (native counter only).
+        exclude: Extra globs of files and directories to ignore, in .gitignore syntax,
+                 on top of the project's .gitignore files and '.cocomo.toml'.
+        dedup: Count duplicated files only once: 'exact' copies, or 'near' copies
+               too (working trees counted by the native backend only).
+        timings: An optional Timings, which records the phases of the run, the
+                 files and bytes counted per second and the slowest files.
 
     Returns:
-        The total thousands of lines of code ('KLOC').
+        The LocTree of the project root, whose 'report' is the same as 'analyze_loc'.
 
     Raises:
-        ClocNotFoundError: If the 'cloc' executable is not found.
-        AnalysisError: If the directory does not exist or if there is an error running cloc.
+        ClocNotFoundError: If the 'cloc' backend is selected and its executable is not found.
+        AnalysisError: If the directory does not exist or if there is an error counting the lines.
     """
+    if max_depth is not None and max_depth < 0:
+        raise ValueError("The maximum depth must not be negative.")
+    if revision is not None:
+        from .git import revision_file_counts
+
+        _check_git_backend(project_path, backend)
+        deduplicator = make_deduplicator(dedup)
+        counts = revision_file_counts(project_path, revision, jobs=jobs, exclude=exclude, dedup=deduplicator)
+        with phase(timings, ANALYZE):
+            tree = build_tree(counts, max_depth=max_depth, sep="/")
+        return replace(tree, report=with_duplicates(tree.report, deduplicator))
+    if _is_archive(project_path):
+        from .archive import archive_file_counts
+
+        _check_archive_backend(backend)
+        deduplicator = make_deduplicator(dedup)
+        with phase(timings, ANALYZE):
+            counts = archive_file_counts(project_path, jobs=jobs, exclude=exclude, dedup=deduplicator, timings=timings)
+            tree = build_tree(counts, max_depth=max_depth, sep="/")
+        return replace(tree, report=with_duplicates(tree.report, deduplicator))
+
+    project_path = Path(project_path)
     if not project_path.is_dir():
         raise AnalysisError(f"The specified directory does not exist: {project_path}")
 
+    root = os.path.abspath(project_path)
+    rules = IgnoreRules(root, exclude)
+    if backend == Backend.CLOC:
+        _check_cloc_dedup(dedup)
+        with phase(timings, ANALYZE):
+            return build_tree(_cloc_file_counts(root, rules, timings), root, max_depth)
+    if backend == Backend.NATIVE:
+        deduplicator = make_deduplicator(dedup)
+        with phase(timings, ANALYZE):
+            tree = build_tree(count_files(root, rules, jobs, cache, deduplicator, timings), root, max_depth)
+        return replace(tree, report=with_duplicates(tree.report, deduplicator))
+    raise ValueError(f"Invalid backend '{backend}'. Choose from {', '.join(Backend)}")
+
+
+def fingerprint_tree(project_path: Path, exclude: Sequence[str] = ()) -> Optional[str]:
+    """
+    Computes a cheap fingerprint of the source files of a working tree.
+
+    Files are only stat'ed, never read: the fingerprint changes whenever a
+    source file is added, removed, resized or modified. It does not depend on
+    the order of the directory walk.
+
+    Args:
+        project_path: The path to the project directory.
+        exclude: Extra globs of files and directories to ignore, as in 'analyze_loc'.
+
+    Returns:
+        The fingerprint, or None when a file was modified too recently for its
+        modification time to be trusted (the tree may still be changing).
+
+    Raises:
+        AnalysisError: If the directory does not exist.
+    """
+    root = os.path.abspath(project_path)
+    if not os.path.isdir(root):
+        raise AnalysisError(f"The specified directory does not exist: {project_path}")
+    racy_after = time.time_ns() - _RACY_WINDOW_NS
+    # Per-file hashes are summed, which makes the result independent of the walk order.
+    total = 0
+    n_files = 0
+    for path, language in iter_source_files(root, IgnoreRules(root, exclude)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if stat.st_mtime_ns >= racy_after:
+            return None
+        entry = f"{path}\0{language}\0{stat.st_size}\0{stat.st_mtime_ns}".encode("utf-8", "surrogateescape")
+        total += int.from_bytes(hashlib.blake2b(entry, digest_size=16).digest(), "little")
+        n_files += 1
+    return f"{n_files}-{total % (1 << 128):032x}"
+
+
+def make_deduplicator(dedup: DedupMode) -> Optional[Deduplicator]:
+    """
+    Creates the Deduplicator of a mode, or None when duplicates are counted.
+
+    Raises:
+        ValueError: If the mode is not valid.
+    """
+    dedup = DedupMode(dedup)
+    return None if dedup == DedupMode.OFF else Deduplicator(dedup)
+
+
+def with_duplicates(report: LocReport, dedup: Optional[Deduplicator]) -> LocReport:
+    """Returns the report with the counts of the duplicates the Deduplicator left out."""
+    return report if dedup is None else replace(report, duplicates=dedup.excluded)
+
+
+def _check_cloc_dedup(dedup: DedupMode) -> None:
+    # cloc already skips identical files on its own, but knows nothing of near duplicates.
+    if DedupMode(dedup) == DedupMode.NEAR:
+        raise ValueError("Near-duplicate detection is only available with the native backend.")
+
+
+def _check_git_backend(project_path: Path, backend: Backend) -> None:
+    if backend != Backend.NATIVE:
+        raise ValueError("Git revisions can only be counted by the native backend.")
+    if not Path(project_path).is_dir():
+        raise AnalysisError(f"The specified directory does not exist: {project_path}")
+
+
+def _check_archive_backend(backend: Backend) -> None:
+    if backend != Backend.NATIVE:
+        raise ValueError("Archives can only be counted by the native backend.")
+
+
+def _is_archive(project_path: Path) -> bool:
+    """
+    Whether a project path names an archive rather than a directory: '-' for the standard
+    input, or a file whose extension or magic number is that of a tar or zip archive.
+    """
+    if str(project_path) == "-":
+        return True
+    if not os.path.isfile(project_path):
+        return False
+    from .archive import is_archive
+
+    return is_archive(project_path)
+
+
+def build_report(counts: Iterable[FileCount]) -> LocReport:
+    """
+    Aggregates per-file counts into a LocReport.
+
+    Args:
+        counts: The per-file line counts.
+
+    Returns:
+        A LocReport with languages sorted by lines of code, as cloc does.
+    """
+    totals: Dict[str, List[int]] = {}
+    for count in counts:
+        add_count(totals, count)
+    return totals_report(totals)
+
+
+def build_tree(
+    counts: Iterable[FileCount],
+    root: str = "",
+    max_depth: Optional[int] = None,
+    sep: str = os.sep
+) -> LocTree:
+    """
+    Aggregates per-file counts into a LocTree, consuming them as a stream.
+
+    Args:
+        counts: The per-file line counts.
+        root: The directory the file paths start with, stripped from them.
+              Empty for paths that are already relative.
+        max_depth: Number of directory levels kept. Deeper files are counted in
+                   their ancestor at the limit. None keeps every directory.
+        sep: The path separator of the file paths.
+
+    Returns:
+        The LocTree of the root, with children and languages sorted by lines of code.
+    """
+    prefix = len(os.path.join(root, "")) if root else 0
+    # Per-language totals of the files directly in each kept directory, keyed by its path parts.
+    directories: Dict[Tuple[str, ...], Dict[str, List[int]]] = {(): {}}
+    truncated = set()
+    # Files arrive grouped by directory, so remembering the last one avoids most splits.
+    last_directory, key, totals = None, (), directories[()]
+    for count in counts:
+        directory = count.path[prefix:].rpartition(sep)[0]
+        if directory != last_directory:
+            last_directory = directory
+            parts = tuple(directory.split(sep)) if directory else ()
+            key = parts[:max_depth] if max_depth is not None else parts
+            if len(key) < len(parts):
+                truncated.add(key)
+            totals = directories.get(key)
+            if totals is None:
+                totals = directories[key] = {}
+        add_count(totals, count)
+
+    for key in list(directories):
+        for length in range(len(key)):
+            directories.setdefault(key[:length], {})
+
+    # Deepest directories first, so that each one is complete before it is added to its parent.
+    nodes: Dict[Tuple[str, ...], LocTree] = {}
+    children: Dict[Tuple[str, ...], List[LocTree]] = {}
+    for key in sorted(directories, key=len, reverse=True):
+        totals = directories.pop(key)
+        node = LocTree(
+            path="/".join(key),
+            report=totals_report(totals),
+            children={
+                child.name: child
+                for child in sorted(children.pop(key, ()), key=lambda child: (-child.report.total.code, child.name))
+            },
+            truncated=key in truncated,
+        )
+        nodes[key] = node
+        if key:
+            parent = directories[key[:-1]]
+            for language, entry in totals.items():
+                _add_totals(parent, language, entry)
+            children.setdefault(key[:-1], []).append(node)
+    return nodes[()]
+
+
+def add_count(totals: Dict[str, List[int]], count: FileCount) -> None:
+    """Adds a file count to per-language [files, blank, comment, code] totals."""
+    entry = totals.get(count.language)
+    if entry is None:
+        entry = totals[count.language] = [0, 0, 0, 0]
+    entry[0] += 1
+    entry[1] += count.blank
+    entry[2] += count.comment
+    entry[3] += count.code
+
+
+def _add_totals(totals: Dict[str, List[int]], language: str, other: List[int]) -> None:
+    entry = totals.get(language)
+    if entry is None:
+        totals[language] = list(other)
+        return
+    for index, value in enumerate(other):
+        entry[index] += value
+
+
+def totals_report(totals: Dict[str, List[int]]) -> LocReport:
+    """Builds a LocReport from per-language [files, blank, comment, code] totals."""
+    languages = {
+        language: LanguageStats(*entry)
+        for language, entry in sorted(totals.items(), key=lambda item: (-item[1][3], item[0]))
+    }
+    total = sum(languages.values(), LanguageStats())
+    return LocReport(languages=languages, total=total)
+
+
+def iter_file_counts(
+    project_path: Path,
+    jobs: Optional[int] = None,
+    cache: Optional[LocCache] = None,
+    exclude: Sequence[str] = ()
+) -> Iterator[FileCount]:
+    """
+    Walks a directory and counts the lines of every recognized source file.
+
+    Files are counted in batches by a pool of worker processes. Small trees,
+    or 'jobs=1', are counted in the current process to avoid the pool start-up cost.
+    Ignored directories (see 'cocomo_py.ignore') are pruned from the walk.
+
+    Args:
+        project_path: The path to the project directory.
+        jobs: Number of worker processes. Defaults to the number of CPUs.
+        cache: An optional LocCache. Files whose size and mtime match their
+               cache entry are not read at all.
+        exclude: Extra globs of files and directories to ignore, in .gitignore syntax.
+
+    Yields:
+        A FileCount for every source file, in no particular order.
+    """
+    root = os.path.abspath(project_path)
+    return count_files(root, IgnoreRules(root, exclude), jobs, cache)
+
+
+def count_files(
+    root: str,
+    rules: IgnoreRules,
+    jobs: Optional[int] = None,
+    cache: Optional[LocCache] = None,
+    dedup: Optional[Deduplicator] = None,
+    timings: Optional[Timings] = None
+) -> Iterator[FileCount]:
+    """
+    Counts the files of a walk. With a Deduplicator, only the copy of every file with the
+    lowest path is yielded, once the walk is over (see 'Deduplicator.filter').
+    """
+    files = iter_source_files(root, rules)
+    if timings is not None:
+        files = timings.iterate("walk", files)
+    skip_generated = rules.skip_generated
+    if cache is None:
+        batches = (((), batch) for batch in batched(files, BATCH_SIZE))
+        if dedup is None:
+            count = partial(count_batch, skip_generated=True) if skip_generated else count_batch
+            for _, counts in map_batches(batches, count, jobs, timings):
+                yield from counts
+        else:
+            count = partial(_fingerprint_batch, skip_generated=skip_generated, near=dedup.near)
+            results = map_batches(batches, count, jobs, timings)
+            yield from dedup.filter(pair for _, fingerprinted in results for pair in fingerprinted)
+        return
+
+    # Generated files are cached too, so that changing the configuration does not invalidate the cache.
+    near = dedup is not None and dedup.near
+    batches = _split_cached(batched(files, BATCH_SIZE), cache, near)
+    if timings is not None:
+        batches = timings.iterate("cache", batches)
+    count = partial(_count_changed_batch, near=True) if near else _count_changed_batch
+    fingerprinted: List[Tuple[FileCount, Fingerprint]] = []
+    for unchanged, entries in map_batches(batches, count, jobs, timings):
+        if entries:
+            with phase(timings, "cache"):
+                cache.store(entries)
+        for entries in (unchanged, entries):
+            for entry in entries:
+                if entry.binary or (skip_generated and entry.generated):
+                    continue
+                file_count = FileCount(entry.path, entry.language, entry.blank, entry.comment, entry.code)
+                if dedup is None:
+                    yield file_count
+                else:
+                    fingerprinted.append((file_count, _cached_fingerprint(entry)))
+    if dedup is not None:
+        yield from dedup.filter(fingerprinted)
+
+
+def count_file(path: str, language: str, skip_generated: bool = False) -> Optional[FileCount]:
+    """
+    Counts the blank, comment and code lines of a single file.
+
+    Args:
+        path: The file path.
+        language: The language name, as found in LANGUAGES.
+        skip_generated: Skip the file if its header marks it as generated code.
+
+    Returns:
+        The FileCount, or None if the file could not be read, is binary or was skipped.
+    """
     try:
-        cloc_command = [
-            'cloc',
-            str(project_path),
-            '--json',
-            '--exclude-dir=node_modules,vendor,venv,target,.venv'
-        ]
-        result = subprocess.run(
-            cloc_command,
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
+        with _SourceFile(path) as source:
+            if source.binary or (skip_generated and is_generated(source.head)):
+                return None
+            counts = _classify(source.lines(), language, True, source.ascii)
+    except OSError:
+        return None
+    return FileCount(path, language, *counts)
+
+
+def count_bytes(data: bytes, language: str) -> Tuple[int, int, int]:
+    """
+    Counts the blank, comment and code lines of the contents of a file.
+
+    Args:
+        data: The raw file contents, classified without being decoded.
+        language: The language name, as found in LANGUAGES.
+
+    Returns:
+        A tuple (blank, comment, code).
+    """
+    return _classify(data.splitlines(), language, True, data.isascii())
+
+
+def is_binary(data: bytes) -> bool:
+    """Tells whether the contents of a file are binary: a NUL byte among its first BINARY_PREFIX bytes."""
+    return data.find(b"\0", 0, BINARY_PREFIX) >= 0
+
+
+def classify_lines(lines: Iterable[Union[str, bytes]], language: str) -> Tuple[int, int, int]:
+    """
+    Classifies lines of source code as blank, comment or code.
+
+    Follows cloc's rules: a line with only whitespace is blank, a line holding
+    only comments is a comment line and any other line is code. Comment markers
+    inside string literals are ignored.
+
+    Args:
+        lines: The lines of the file, either str or UTF-8 bytes. Bytes are classified
+               as they are; only a line that starts or ends with a non-ASCII
+               character is decoded, to tell whether it is Unicode whitespace.
+        language: The language name, as found in LANGUAGES.
+
+    Returns:
+        A tuple (blank, comment, code).
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return 0, 0, 0
+    return _classify(chain((first,), lines), language, isinstance(first, bytes))
+
+
+def _classify(
+    lines: Iterable[Union[str, bytes]],
+    language: str,
+    binary: bool,
+    ascii: bool = False
+) -> Tuple[int, int, int]:
+    """'classify_lines' of str or, with 'binary', bytes lines; 'ascii' bytes need no Unicode stripping."""
+    whitespace = _WHITESPACE if binary else None
+    unicode = binary and not ascii
+    pattern, line_comments, block_ends, strings = _syntax(language, binary)
+    blank = comment = code = 0
+    block_end = None
+
+    for line in lines:
+        text = line.strip(whitespace)
+        if unicode and text and (text[0] > 127 or text[-1] > 127):
+            text = _strip_unicode(text)
+        if not text:
+            blank += 1
+            continue
+
+        has_code = False
+        pos = 0
+        end = len(text)
+        while pos < end:
+            if block_end is not None:
+                close = text.find(block_end, pos)
+                if close < 0:
+                    break
+                pos = close + len(block_end)
+                block_end = None
+                continue
+
+            match = pattern.search(text, pos) if pattern is not None else None
+            if match is None:
+                # The line is stripped: if nothing was consumed, what is left is code.
+                if not has_code and pos > 0:
+                    segment = text[pos:].strip(whitespace)
+                    has_code = bool(segment) and not (unicode and _unicode_blank(segment))
+                else:
+                    has_code = True
+                break
+
+            start = match.start()
+            if not has_code and start > pos:
+                segment = text[pos:start].strip(whitespace)
+                has_code = bool(segment) and not (unicode and _unicode_blank(segment))
+            token = match.group()
+            if token in line_comments:
+                break
+            if token in block_ends:
+                block_end = block_ends[token]
+                pos = match.end()
+                continue
+
+            # A string literal: it is code, and whatever it contains is skipped.
+            has_code = True
+            closing = strings[token].match(text, match.end())
+            pos = closing.end() if closing else end
+
+        if has_code:
+            code += 1
+        else:
+            comment += 1
+
+    return blank, comment, code
+
+
+def _strip_unicode(text: bytes) -> bytes:
+    """Strips the Unicode whitespace (e.g. no-break spaces) around a UTF-8 line, as 'str.strip()' would."""
+    return text.decode("utf-8", errors="replace").strip().encode("utf-8", errors="surrogateescape")
+
+
+def _unicode_blank(segment: bytes) -> bool:
+    """Tells whether a stripped, non-empty piece of a UTF-8 line only holds Unicode whitespace."""
+    return (segment[0] > 127 or segment[-1] > 127) and not _strip_unicode(segment)
+
+
+@lru_cache(maxsize=None)
+def _syntax(language: str, binary: bool = False):
+    """Compiles the comment and string markers of a language into a single regex (of bytes with 'binary')."""
+    details = LANGUAGES[language]
+    line_comments = frozenset(details["line_comments"])
+    block_ends = dict(details["block_comments"])
+    quotes = details["strings"]
+    if binary:
+        line_comments = frozenset(token.encode("utf-8") for token in line_comments)
+        block_ends = {start.encode("utf-8"): end.encode("utf-8") for start, end in block_ends.items()}
+        quotes = [quote.encode("utf-8") for quote in quotes]
+    string = rb"(?:\\.|[^%s\\])*%s" if binary else r"(?:\\.|[^%s\\])*%s"
+    strings = {quote: re.compile(string % (re.escape(quote), re.escape(quote))) for quote in quotes}
+    # Longer tokens first, so that '"""' wins over '"' and '--[[' over '--'.
+    tokens = sorted(set(line_comments) | set(block_ends) | set(strings), key=len, reverse=True)
+    pattern = re.compile((b"|" if binary else "|").join(re.escape(token) for token in tokens)) if tokens else None
+    return pattern, line_comments, block_ends, strings
+
+
+class _SourceFile:
+    """
+    A file read in blocks of READ_SIZE bytes: the first one when it is opened, the
+    others while its lines are iterated, so memory stays flat whatever the size of
+    the file. Its size and, on request, its blake2b digest are computed over the
+    blocks read.
+    """
+
+    def __init__(self, path: str, digest: bool = False):
+        self.path = path
+        self.size = 0
+        self._hasher = hashlib.blake2b(digest_size=16) if digest else None
+        self._start = time.perf_counter_ns() if _profiled_reads is not None else 0
+        self._read_ns = 0
+        self._file = open(path, "rb", buffering=0)
+        try:
+            # Asking for one byte more than the file holds finds its end in one read,
+            # without allocating a full block for every small file.
+            self.head = self._read(min(os.fstat(self._file.fileno()).st_size + 1, READ_SIZE))
+        except BaseException:
+            self._file.close()
+            raise
+        self.whole = self._eof
+
+    def __enter__(self) -> "_SourceFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._file.close()
+        if _profiled_reads is not None:
+            _profiled_reads.append((self.path, self.size, self._start, self._start + self._read_ns))
+
+    @property
+    def binary(self) -> bool:
+        """Whether the file is binary, from its first block."""
+        return is_binary(self.head)
+
+    @property
+    def ascii(self) -> bool:
+        """Whether the first block holds the whole file, and it is pure ASCII."""
+        return self.whole and self.head.isascii()
+
+    def blocks(self) -> Iterator[bytes]:
+        """The blocks of the file, the first one included. Iterated once."""
+        block = self.head
+        while block:
+            yield block
+            block = b"" if self._eof else self._read(READ_SIZE)
+
+    def lines(self) -> Iterator[bytes]:
+        """The lines of the file, without their line endings."""
+        if self.whole:
+            return iter(self.head.splitlines())
+        return _byte_lines(self.blocks())
+
+    def digest(self) -> bytes:
+        """The blake2b digest of the blocks read: of the file once they all were, or when 'whole'."""
+        return self._hasher.digest()
+
+    def _read(self, size: int) -> bytes:
+        if _profiled_reads is None:
+            block = self._file.read(size)
+        else:
+            start = time.perf_counter_ns()
+            block = self._file.read(size)
+            self._read_ns += time.perf_counter_ns() - start
+        self._eof = len(block) < size
+        self.size += len(block)
+        if self._hasher is not None:
+            self._hasher.update(block)
+        return block
+
+
+def _byte_lines(blocks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Splits the blocks of a file into lines ending with LF, CR LF or CR, as the
+    universal newlines mode does, without their line endings. The lines of a
+    block are split at once, only its unfinished last line being carried over
+    to the next block.
+    """
+    return chain.from_iterable(_split_blocks(blocks))
+
+
+def _split_blocks(blocks: Iterable[bytes]) -> Iterator[List[bytes]]:
+    rest = b""
+    for block in blocks:
+        if rest:
+            block = rest + block
+        cut = max(block.rfind(b"\n"), block.rfind(b"\r")) + 1
+        if cut == len(block) and block.endswith(b"\r"):
+            # A final CR may be the first half of a CR LF: its line waits for the next block.
+            cut = max(block.rfind(b"\n", 0, cut - 1), block.rfind(b"\r", 0, cut - 1)) + 1
+        rest = block[cut:]
+        yield block[:cut].splitlines()
+    if rest:
+        yield rest.splitlines()
+
+
+def count_batch(batch: List[Tuple[str, str]], skip_generated: bool = False) -> List[FileCount]:
+    """Counts a batch of (path, language) pairs. Runs inside the worker processes."""
+    counts = []
+    for path, language in batch:
+        count = count_file(path, language, skip_generated)
+        if count is not None:
+            counts.append(count)
+    return counts
+
+
+def _fingerprint_batch(
+    batch: List[Tuple[str, str]],
+    skip_generated: bool = False,
+    near: bool = False
+) -> List[Tuple[FileCount, Fingerprint]]:
+    """Counts and fingerprints a batch of (path, language) pairs. Runs inside the worker processes."""
+    results = []
+    for path, language in batch:
+        sampler = ChunkSampler() if near else None
+        try:
+            with _SourceFile(path, digest=True) as source:
+                if source.binary or (skip_generated and is_generated(source.head)):
+                    continue
+                lines = source.lines()
+                counts = _classify(lines if sampler is None else sampler.feed(lines), language, True, source.ascii)
+        except OSError:
+            continue
+        digest = int.from_bytes(source.digest()[:8], "little")
+        fingerprint = Fingerprint(source.size, digest, sampler.chunks() if near else ())
+        results.append((FileCount(path, language, *counts), fingerprint))
+    return results
+
+
+def _cached_fingerprint(entry: CachedFile) -> Fingerprint:
+    chunks = unpack_chunks(entry.chunks) if entry.chunks else ()
+    return Fingerprint(entry.size, int.from_bytes(entry.digest[:8], "little"), chunks)
+
+
+def _split_cached(
+    batches: Iterable[List[Tuple[str, str]]],
+    cache: LocCache,
+    near: bool = False
+) -> Iterator[Tuple[List[CachedFile], list]]:
+    """
+    Separates each batch into files whose cache entry is still valid and files to count.
+
+    Args:
+        batches: Batches of (path, language) pairs.
+        cache: The LocCache.
+        near: Entries without chunk hashes are not valid (near-duplicate detection).
+
+    Yields:
+        Pairs (unchanged, changed): the valid cache entries and the (path,
+        language, size, mtime_ns, cache entry) tuples of the other files.
+    """
+    for batch in batches:
+        known = cache.lookup([path for path, _ in batch])
+        unchanged = []
+        changed = []
+        for path, language in batch:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = known.get(path)
+            if entry is not None and entry.language != language:
+                entry = None
+            if (entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns
+                    and not (near and entry.chunks is None)):
+                unchanged.append(entry)
+            else:
+                changed.append((path, language, stat.st_size, stat.st_mtime_ns, entry))
+        cache.touch(entry.path for entry in unchanged)
+        yield unchanged, changed
+
+
+def _count_changed_batch(batch: list, near: bool = False) -> List[CachedFile]:
+    """
+    Counts the files missing from the cache or whose metadata changed. Runs inside the worker processes.
+
+    A file that fits in one block and whose content hash still matches its cache
+    entry keeps the cached counts. With 'near', the sampled chunk hashes of the
+    files are computed too. Binary files are only read up to their first block
+    and cached as such, without a content hash.
+    """
+    now = time.time_ns()
+    entries = []
+    for path, language, size, mtime_ns, known in batch:
+        try:
+            with _SourceFile(path, digest=True) as source:
+                if source.binary:
+                    values = (b"", language, 0, 0, 0, False, None, True)
+                elif known is not None and source.whole and source.digest() == known.digest:
+                    chunks = known.chunks
+                    if near and chunks is None:
+                        chunks = pack_chunks(sampled_chunks(source.head))
+                    values = (known.digest, language, known.blank, known.comment, known.code, known.generated, chunks)
+                else:
+                    sampler = ChunkSampler() if near else None
+                    lines = source.lines()
+                    counts = _classify(lines if sampler is None else sampler.feed(lines), language, True, source.ascii)
+                    chunks = pack_chunks(sampler.chunks()) if near else None
+                    values = (source.digest(), language, *counts, is_generated(source.head), chunks)
+        except OSError:
+            continue
+        # A file modified in the same timestamp tick as this read could change again
+        # without changing its mtime, so its metadata is not trusted on the next run.
+        if now - mtime_ns < _RACY_WINDOW_NS:
+            mtime_ns = -1
+        entries.append(CachedFile(path, size, mtime_ns, *values))
+    return entries
+
+
+def map_batches(
+    batches: Iterable[Tuple[list, list]],
+    func: Callable[[list], list],
+    jobs: Optional[int],
+    timings: Optional[Timings] = None
+) -> Iterator[Tuple[list, list]]:
+    """
+    Applies func to batches of work, in a process pool when there is more than one batch.
+
+    Args:
+        batches: Pairs (ready, todo): results already known and the work still to do.
+        func: The function applied to each 'todo' list. Must be picklable.
+        jobs: Number of worker processes. Defaults to the number of CPUs.
+        timings: An optional Timings, to which every batch reports its file reads.
+
+    Yields:
+        Pairs (ready, results), in no particular order.
+    """
+    workers = jobs or os.cpu_count() or 1
+    if timings is not None:
+        func = partial(_profiled_batch, func)
+
+    def finish(output):
+        return output if timings is None else timings.add_batch(*output)
+
+    pool = None
+    pending = set()
+    held = None
+    try:
+        for ready, todo in batches:
+            if ready:
+                if timings is not None:
+                    timings.add_cached(len(ready))
+                yield ready, []
+            if not todo:
+                continue
+            if workers == 1:
+                with phase(timings, "count"):
+                    output = func(todo)
+                yield [], finish(output)
+                continue
+            if pool is None:
+                # The pool is only started once a second batch shows there is enough work.
+                if held is None:
+                    held = todo
+                    continue
+                # Imported here: multiprocessing is a large part of the package import time.
+                from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+                pool = ProcessPoolExecutor(max_workers=workers)
+                pending.add(pool.submit(func, held))
+                held = None
+            pending.add(pool.submit(func, todo))
+            # Keeps a bounded number of batches in flight, so the walk never runs far ahead.
+            if len(pending) >= workers * 2:
+                with phase(timings, "wait"):
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield [], finish(future.result())
+        if held is not None:
+            with phase(timings, "count"):
+                output = func(held)
+            yield [], finish(output)
+        for future in pending:
+            with phase(timings, "wait"):
+                output = future.result()
+            yield [], finish(output)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _profiled_batch(func: Callable[[list], list], batch: list) -> tuple:
+    """
+    Applies func to a batch, recording the reads of its files. Runs inside the worker processes.
+
+    Returns:
+        The arguments of 'Timings.add_batch': (result, reads, (process id, start, end)).
+    """
+    global _profiled_reads
+    _profiled_reads = reads = []
+    start = time.perf_counter_ns()
+    try:
+        result = func(batch)
+    finally:
+        _profiled_reads = None
+    return result, reads, (os.getpid(), start, time.perf_counter_ns())
+
+
+def iter_source_files(
+    root: str,
+    rules: Optional[IgnoreRules] = None,
+    ignored: Optional[List[str]] = None
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (path, language) for every recognized source file below root.
+
+    Directories in EXCLUDED_DIRS are never entered. With ignore rules, an ignored
+    directory is pruned before it is listed, and the paths of the ignored
+    entries (files of any type) are appended to 'ignored' when given.
+    """
+    if rules is None:
+        stack = [(root, "", ())]
+    else:
+        relative = os.path.relpath(root, rules.root).replace(os.sep, "/")
+        relative = "" if relative == os.curdir else relative
+        stack = [(root, relative, rules.chain(relative))]
+    while stack:
+        directory, relative, chain = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in EXCLUDED_DIRS:
+                            continue
+                        if rules is None:
+                            stack.append((entry.path, "", ()))
+                            continue
+                        path = f"{relative}/{entry.name}" if relative else entry.name
+                        if rules.ignored(path, True, chain):
+                            if ignored is not None:
+                                ignored.append(entry.path)
+                        else:
+                            stack.append((entry.path, path, rules.enter(entry.path, path, chain)))
+                    elif entry.is_file(follow_symlinks=False):
+                        language = language_for_path(entry.name)
+                        if rules is not None and (language is not None or ignored is not None):
+                            path = f"{relative}/{entry.name}" if relative else entry.name
+                            if rules.ignored(path, False, chain):
+                                if ignored is not None:
+                                    ignored.append(entry.path)
+                                continue
+                        if language is not None:
+                            yield entry.path, language
+                except OSError:
+                    continue
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Splits an iterable into lists of 'size' items, the last one possibly shorter."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _analyze_with_cloc(project_path: Path, rules: IgnoreRules, timings: Optional[Timings] = None) -> LocReport:
+    """Counts lines with the external 'cloc' executable."""
+    cloc_output = _run_cloc(project_path, rules, timings=timings)
+    languages = {
+        language: LanguageStats(
+            n_files=entry.get('nFiles', 0),
+            blank=entry.get('blank', 0),
+            comment=entry.get('comment', 0),
+            code=entry.get('code', 0),
+        )
+        for language, entry in cloc_output.items()
+        if language not in ('header', 'SUM')
+    }
+    total = sum(languages.values(), LanguageStats())
+    if 'SUM' in cloc_output and 'code' in cloc_output['SUM']:
+        total = LanguageStats(
+            n_files=cloc_output['SUM'].get('nFiles', total.n_files),
+            blank=cloc_output['SUM'].get('blank', total.blank),
+            comment=cloc_output['SUM'].get('comment', total.comment),
+            code=cloc_output['SUM']['code'],
         )
-        cloc_output = json.loads(result.stdout)
+    return LocReport(languages=languages, total=total)
+
 
-        if 'SUM' in cloc_output and 'code' in cloc_output['SUM']:
-            total_loc = cloc_output['SUM']['code']
-            return total_loc / 1000.0
-        return 0.0
+def _cloc_file_counts(project_path: str, rules: IgnoreRules, timings: Optional[Timings] = None) -> Iterator[FileCount]:
+    """Per-file counts of the external 'cloc' executable ('--by-file')."""
+    cloc_output = _run_cloc(project_path, rules, '--by-file', timings=timings)
+    for path, entry in cloc_output.items():
+        if path not in ('header', 'SUM'):
+            yield FileCount(
+                path,
+                entry.get('language', 'unknown'),
+                entry.get('blank', 0),
+                entry.get('comment', 0),
+                entry.get('code', 0),
+            )
+
+
+def _run_cloc(
+    project_path: Union[str, Path],
+    rules: IgnoreRules,
+    *options: str,
+    timings: Optional[Timings] = None
+) -> dict:
+    """
+    Runs 'cloc --json' on a directory and returns its parsed output.
+
+    The ignore rules are applied by walking the tree first and handing the ignored
+    paths to cloc as an exclusion list. Generated-code headers are not checked.
+    """
+    import json
+    import subprocess
+    import tempfile
+
+    ignored: List[str] = []
+    files = iter_source_files(os.path.abspath(project_path), rules, ignored)
+    for _ in files if timings is None else timings.iterate("walk", files):
+        pass
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt') as exclude_list:
+            exclude_list.write(''.join(f'{path}\n' for path in ignored))
+            exclude_list.flush()
+            cloc_command = [
+                'cloc',
+                str(project_path),
+                '--json',
+                '--exclude-dir=node_modules,vendor,venv,target,.venv',
+                f'--exclude-list-file={exclude_list.name}',
+                *options
+            ]
+            with phase(timings, "cloc"):
+                result = subprocess.run(
+                    cloc_command,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    encoding='utf-8'
+                )
+        # cloc prints nothing at all when it finds no source files.
+        return json.loads(result.stdout) if result.stdout.strip() else {}
 
     except FileNotFoundError:
         raise ClocNotFoundError(
@@ -0,0 +1,476 @@
+"""
+Line counting straight from tar and zip archives.
+
+Deliveries are counted without being extracted. A reader thread decompresses
+the members one after the other and hands batches of their contents to the
+counter through a bounded queue, so decompression (zlib, bz2 and lzma release
+the GIL) overlaps with counting, in the worker processes or in the current
+one, and only a few batches are ever held in memory. Members are read whole,
+like git blobs.
+
+Tar archives, compressed (gzip, bzip2, xz) or not, are read as a stream, so
+they can come from a pipe ('-' for the standard input); their headers are
+parsed here, several times faster than 'tarfile' does. A zip archive keeps its
+directory at its end: one read from a pipe is buffered in memory first.
+
+The counts are those of the directory the archive extracts to: the same
+directories, exclude globs and generated files are skipped, and binary files
+are not counted. Like the files of a git revision, members are never ignored
+by the archive's own .gitignore or '.cocomo.toml'. Symbolic links are skipped;
+a hard link is counted like the file it links to, except in an archive read
+from a pipe, which cannot be read again to find that file.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import stat
+import sys
+import tarfile
+import threading
+import zipfile
+import zlib
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .analyzer import (
+    EXCLUDED_DIRS, BATCH_SIZE, READ_SIZE, map_batches, build_report, count_bytes, is_binary, make_deduplicator,
+    with_duplicates,
+)
+from .dedup import Deduplicator, Fingerprint, fingerprint
+from .ignore import IgnoreConfig, IgnoreRules, is_generated
+from .languages import language_for_path
+from .models import AnalysisError, DedupMode, FileCount, LocReport
+from .timings import Timings
+
+# Archive path of the standard input.
+STDIN = "-"
+
+# A batch of members is handed over once it holds BATCH_SIZE files or this many bytes.
+_BATCH_BYTES = 16 << 20
+
+# Batches decompressed ahead of the counting.
+_QUEUE_SIZE = 4
+
+# Extensions of the files counted as archives. Others are recognized by their first bytes.
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tbz", ".tar.xz", ".txz", ".zip")
+
+# The first bytes of a zip archive (the second for an empty one).
+_ZIP_MAGIC = (b"PK\x03\x04", b"PK\x05\x06")
+
+# The first bytes of a gzip, bzip2 and xz stream.
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+# Position of the 'ustar' magic in a POSIX tar header.
+_USTAR_MAGIC_OFFSET = 257
+
+# Size of the tar header and data blocks.
+_TAR_BLOCK = 512
+
+# Tar member types extracted as regular files: regular (old and POSIX) and contiguous.
+_TAR_FILES = frozenset({b"\0", b"0", b"7"})
+
+# Tar member types that describe the next member (GNU long names and link names, pax records)
+# or the whole archive (pax global records).
+_TAR_EXTENSIONS = frozenset({b"L", b"K", b"x", b"g"})
+
+# Errors of damaged or unsupported archives (RuntimeError: an encrypted zip member).
+_READ_ERRORS = (OSError, EOFError, RuntimeError, tarfile.TarError, zipfile.BadZipFile, zlib.error, lzma.LZMAError)
+
+# Marks the end of the members in the queue.
+_END = object()
+
+# An archive file path, '-' for the standard input, or a binary file object.
+ArchiveSource = Union[str, Path, BinaryIO]
+
+
+def is_archive(path: Union[str, Path]) -> bool:
+    """
+    Whether a file is a tar or zip archive, compressed or not: by its extension
+    (ARCHIVE_SUFFIXES) or by its magic number.
+    """
+    if str(path).lower().endswith(ARCHIVE_SUFFIXES):
+        return True
+    try:
+        with open(path, "rb") as file:
+            head = file.read(_TAR_BLOCK)
+    except OSError:
+        return False
+    magic = head[_USTAR_MAGIC_OFFSET:_USTAR_MAGIC_OFFSET + 5]
+    return head.startswith(_ZIP_MAGIC + _COMPRESSED_MAGIC) or magic == b"ustar"
+
+
+def analyze_archive(
+    source: ArchiveSource,
+    jobs: Optional[int] = None,
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    timings: Optional[Timings] = None
+) -> LocReport:
+    """
+    Counts the lines of code of a tar or zip archive, without extracting it.
+
+    Args:
+        source: The archive path ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz', '.zip'...),
+                '-' for an archive read from the standard input, or a binary file object.
+        jobs: Number of worker processes. Defaults to the number of CPUs.
+        exclude: Globs of members to ignore, in .gitignore syntax, relative to the archive root.
+        dedup: Count duplicated members only once: 'exact' copies, or 'near' copies too.
+        timings: An optional Timings, which records the phases of the run.
+
+    Returns:
+        A LocReport with the per-language counts and their sum, and the counts
+        of the duplicates left out.
+
+    Raises:
+        AnalysisError: If the archive cannot be read or is not a tar or zip archive.
+    """
+    deduplicator = make_deduplicator(dedup)
+    report = build_report(archive_file_counts(source, jobs, exclude, deduplicator, timings))
+    return with_duplicates(report, deduplicator)
+
+
+def archive_file_counts(
+    source: ArchiveSource,
+    jobs: Optional[int] = None,
+    exclude: Sequence[str] = (),
+    dedup: Optional[Deduplicator] = None,
+    timings: Optional[Timings] = None
+) -> Iterator[FileCount]:
+    """
+    Counts the lines of every source file of an archive, as its members are decompressed.
+
+    Args:
+        source: The archive path, '-' for the standard input, or a binary file object.
+        jobs: Number of worker processes. Defaults to the number of CPUs.
+        exclude: Globs of members to ignore, in .gitignore syntax, relative to the archive root.
+        dedup: An optional Deduplicator: only the copy of every file with the lowest path
+               is yielded, once the archive is read, and the others are added to its
+               'excluded' counts.
+        timings: An optional Timings, which records the phases of the run.
+
+    Yields:
+        A FileCount per source file, with paths relative to the archive root and '/'-separated.
+
+    Raises:
+        AnalysisError: If the archive cannot be read or is not a tar or zip archive.
+    """
+    rules = IgnoreRules(os.curdir, config=IgnoreConfig(exclude=tuple(exclude), gitignore=False))
+    near = None if dedup is None else dedup.near
+    count = partial(_count_member_batch, skip_generated=rules.skip_generated, near=near)
+    with _MemberReader(source, rules) as reader:
+        batches = iter(reader) if timings is None else timings.iterate("archive", reader)
+        results = map_batches((((), batch) for batch in batches), count, jobs, timings)
+        counts = (pair for _, batch in results for pair in batch)
+        if dedup is None:
+            yield from (file_count for file_count, _ in counts)
+        else:
+            yield from dedup.filter(counts)
+
+
+def _count_member_batch(
+    batch: List[Tuple[str, str, bytes]],
+    skip_generated: bool = False,
+    near: Optional[bool] = None
+) -> List[Tuple[FileCount, Optional[Fingerprint]]]:
+    """
+    Counts a batch of (path, language, contents) members, binary and generated ones excepted,
+    and fingerprints them unless 'near' is None. Runs inside the worker processes.
+    """
+    results = []
+    for path, language, data in batch:
+        if is_binary(data) or (skip_generated and is_generated(data)):
+            continue
+        count = FileCount(path, language, *count_bytes(data, language))
+        results.append((count, None if near is None else fingerprint(data, near=near)))
+    return results
+
+
+class _MemberReader:
+    """
+    Reads the source files of an archive in a background thread. Iterating it
+    yields batches of (path, language, contents); an error of the thread is
+    raised by the iteration.
+    """
+
+    def __init__(self, source: ArchiveSource, rules: IgnoreRules):
+        self._source = source
+        self._rules = rules
+        self._directories: Dict[str, bool] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cocomo-archive", daemon=True)
+
+    def __enter__(self) -> "_MemberReader":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        # The thread may be waiting for room in the queue when the counting stops early.
+        self._stop.set()
+        self._thread.join()
+
+    def __iter__(self) -> Iterator[List[Tuple[str, str, bytes]]]:
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def _run(self) -> None:
+        try:
+            batch: List[Tuple[str, str, bytes]] = []
+            size = 0
+            for path, read in _iter_members(self._source):
+                language = self._select(path)
+                if language is None:
+                    continue
+                data = read()
+                batch.append((path, language, data))
+                size += len(data)
+                if len(batch) >= BATCH_SIZE or size >= _BATCH_BYTES:
+                    if not self._put(batch):
+                        return
+                    batch, size = [], 0
+            if batch and not self._put(batch):
+                return
+            self._put(_END)
+        except _READ_ERRORS as e:
+            self._put(AnalysisError(f"Could not read the archive {_name(self._source)}: {e}"))
+        except BaseException as e:
+            self._put(e)
+
+    def _select(self, path: str) -> Optional[str]:
+        """The language of a member, or None if it is not counted."""
+        directory, _, name = path.rpartition("/")
+        language = language_for_path(name)
+        if language is None:
+            return None
+        # Members come grouped by directory, whose decision is taken once, as in a walk.
+        excluded = self._directories.get(directory)
+        if excluded is None:
+            excluded = self._directories[directory] = bool(directory) and (
+                not EXCLUDED_DIRS.isdisjoint(directory.split("/")) or self._rules.excluded(directory, True)
+            )
+        if excluded or self._rules.ignored(path, False, self._rules.chain(directory)):
+            return None
+        return language
+
+    def _put(self, item) -> bool:
+        """Queues an item, unless the counting stopped. Returns whether it was queued."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+def _iter_members(source: ArchiveSource) -> Iterator[Tuple[str, Callable[[], bytes]]]:
+    """
+    Yields (path, read) for every regular file of an archive, in archive order (the
+    hard links of a tar archive last). A tar member can only be read before the
+    next one is yielded.
+    """
+    with _open(source) as stream:
+        if _peek(stream, 4) in _ZIP_MAGIC:
+            if not stream.seekable():
+                stream = io.BytesIO(stream.read())
+            with zipfile.ZipFile(stream) as archive:
+                for info in archive.infolist():
+                    path = _member_path(info.filename)
+                    if path and not info.is_dir() and not stat.S_ISLNK(info.external_attr >> 16):
+                        yield path, partial(archive.read, info)
+            return
+        yield from _tar_members(_decompressed(stream), stream.seekable())
+
+
+def _decompressed(stream: BinaryIO) -> BinaryIO:
+    """The stream, decompressed according to its magic number."""
+    head = _peek(stream, 6)
+    if head.startswith(b"\x1f\x8b"):
+        return gzip.GzipFile(fileobj=stream)
+    if head.startswith(b"BZh"):
+        return bz2.BZ2File(stream)
+    if head.startswith(b"\xfd7zXZ\x00"):
+        return lzma.LZMAFile(stream)
+    return stream
+
+
+def _tar_members(stream: BinaryIO, seekable: bool) -> Iterator[Tuple[str, Callable[[], bytes]]]:
+    """
+    Yields (path, read) for every regular file and hard link of a tar stream,
+    reading it sequentially. Only the header fields needed to find the files are
+    decoded: 'tarfile' spends most of its time on the others, and on its own
+    buffering. Understands ustar, GNU (long names, base-256 sizes) and pax (path
+    and size records) headers. Sparse files are skipped.
+
+    A hard link extracts to a copy of the member it links to: the links come last,
+    their targets read again in one pass over the stream. A pipe cannot be read
+    again, and keeping every member for the links would hold the whole archive in
+    memory: its hard links are skipped.
+    """
+    long_name = long_link = None
+    records: Dict[bytes, bytes] = {}
+    # Where the data of each regular file starts, and its size: the targets of hard links.
+    offsets: Dict[str, Tuple[int, int]] = {}
+    links: List[Tuple[int, int, str]] = []
+    while True:
+        header = _read_exactly(stream, _TAR_BLOCK)
+        if header.count(0) == _TAR_BLOCK:
+            break
+        if not _checksum_ok(header):
+            raise tarfile.ReadError("invalid header")
+        kind = header[156:157]
+        size = _octal(header[124:136])
+        if kind == b"S" and header[482]:
+            # An old GNU sparse file: extension blocks of its map follow the header.
+            while _read_exactly(stream, _TAR_BLOCK)[504]:
+                pass
+        if kind in _TAR_EXTENSIONS:
+            # Headers about the next member: its long name or link name, its pax records, or global records.
+            data = _read_exactly(stream, size)
+            _skip(stream, -size % _TAR_BLOCK)
+            if kind == b"L":
+                long_name = data.split(b"\0", 1)[0]
+            elif kind == b"K":
+                long_link = data.split(b"\0", 1)[0]
+            elif kind == b"x":
+                records = _pax_records(data)
+            continue
+        name = records.get(b"path") or long_name or header[:100].split(b"\0", 1)[0]
+        if b"path" not in records and long_name is None and header[257:262] == b"ustar":
+            prefix = header[345:500].split(b"\0", 1)[0]
+            if prefix:
+                name = prefix + b"/" + name
+        link_name = records.get(b"linkpath") or long_link or header[157:257].split(b"\0", 1)[0]
+        if b"size" in records:
+            size = int(records[b"size"])
+        sparse = kind == b"S" or any(key.startswith(b"GNU.sparse.") for key in records)
+        long_name = long_link = None
+        records = {}
+        left = size
+        path = _member_path(name.decode("utf-8", "surrogateescape"))
+        if kind in _TAR_FILES and not sparse and not name.endswith(b"/") and path:
+            if seekable:
+                offsets[path] = (stream.tell(), size)
+
+            def read() -> bytes:
+                nonlocal left
+                data, left = _read_exactly(stream, left), 0
+                return data
+
+            yield path, read
+        elif kind == b"1" and path and seekable:
+            target = _member_path(link_name.decode("utf-8", "surrogateescape"))
+            if target in offsets:
+                offsets[path] = offsets[target]
+                links.append(offsets[path] + (path,))
+        _skip(stream, left + -size % _TAR_BLOCK)
+
+    for offset, size, path in sorted(links):
+        stream.seek(offset)
+        yield path, partial(_read_exactly, stream, size)
+
+
+def _octal(field: bytes) -> int:
+    """A numeric header field: octal digits, or base-256 (GNU) when its first bit is set."""
+    if field[0] & 0x80:
+        if field[0] != 0x80:
+            raise tarfile.ReadError("invalid header")
+        return int.from_bytes(field[1:], "big")
+    try:
+        return int(field.split(b"\0", 1)[0].strip() or b"0", 8)
+    except ValueError:
+        raise tarfile.ReadError("invalid header")
+
+
+def _checksum_ok(header: bytes) -> bool:
+    """Checks the sum of the bytes of a header, its checksum field counted as spaces."""
+    checksum = _octal(header[148:156])
+    unsigned = sum(header) - sum(header[148:156]) + 256
+    if checksum == unsigned:
+        return True
+    # Some old tar implementations summed signed chars.
+    return checksum == unsigned - 256 * sum(byte > 127 for byte in header[:148] + header[156:])
+
+
+def _pax_records(data: bytes) -> Dict[bytes, bytes]:
+    """The records of a pax extended header, lines of the form 'length key=value'."""
+    records = {}
+    position = 0
+    while position < len(data):
+        length, _, rest = data[position:position + 20].partition(b" ")
+        try:
+            end = position + int(length)
+        except ValueError:
+            raise tarfile.ReadError("invalid pax header")
+        key, _, value = data[position + len(length) + 1:end - 1].partition(b"=")
+        records[key] = value
+        position = end
+    return records
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) < size:
+        chunks = [data]
+        size -= len(data)
+        while size > 0:
+            chunk = stream.read(size)
+            if not chunk:
+                raise EOFError("unexpected end of data")
+            chunks.append(chunk)
+            size -= len(chunk)
+        data = b"".join(chunks)
+    return data
+
+
+def _skip(stream: BinaryIO, size: int) -> None:
+    while size > 0:
+        size -= len(_read_exactly(stream, min(size, READ_SIZE)))
+
+
+def _open(source: ArchiveSource):
+    """A context giving a binary stream of the archive that can be peeked at, closed on exit if opened here."""
+    if isinstance(source, (str, Path)):
+        if str(source) == STDIN:
+            return nullcontext(sys.stdin.buffer)
+        return open(source, "rb")
+    if not hasattr(source, "peek") and not source.seekable():
+        source = io.BufferedReader(source)
+    return nullcontext(source)
+
+
+def _peek(stream: BinaryIO, size: int) -> bytes:
+    """The first bytes of a stream, left unread."""
+    if hasattr(stream, "peek"):
+        return stream.peek(size)[:size]
+    position = stream.tell()
+    head = stream.read(size)
+    stream.seek(position)
+    return head
+
+
+def _member_path(name: str) -> Optional[str]:
+    """
+    The path a member extracts to, relative to the archive root and '/'-separated,
+    or None for the archive root itself and for members that would escape it.
+    """
+    parts = [part for part in name.split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        return None
+    return "/".join(parts)
+
+
+def _name(source: ArchiveSource) -> str:
+    if isinstance(source, (str, Path)):
+        return "on the standard input" if str(source) == STDIN else str(source)
+    return getattr(source, "name", repr(source))
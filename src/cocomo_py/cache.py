@@ -0,0 +1,185 @@
+"""
+Persistent cache of per-file line counts.
+
+The cache is a small SQLite database, by default under '$XDG_CACHE_HOME/cocomo-py'.
+Each entry is keyed by the absolute file path and records the file size, its
+modification time and a content hash. A file whose size and mtime did not
+change is not read again; a file that was only touched is hashed but not
+classified again.
+"""
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from .models import AnalysisError
+
+# Bump whenever the schema or the counting rules change, so stale caches are discarded.
+SCHEMA_VERSION = 5
+
+# Default maximum number of files kept in the cache. The least recently
+# used entries are evicted beyond it (roughly 150 bytes per entry on disk).
+DEFAULT_MAX_ENTRIES = 500_000
+
+
+class CachedFile(NamedTuple):
+    """
+    A cache entry: the file metadata, its line counts, whether it holds generated
+    code, once near duplicates were looked for its sampled chunk hashes, and
+    whether it is binary (and so not counted).
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    digest: bytes
+    language: str
+    blank: int
+    comment: int
+    code: int
+    generated: bool = False
+    chunks: Optional[bytes] = None
+    binary: bool = False
+
+
+def default_cache_path() -> Path:
+    """
+    Returns the default location of the cache database.
+
+    Returns:
+        '$XDG_CACHE_HOME/cocomo-py/loc-cache.sqlite3', falling back to '~/.cache'.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "cocomo-py" / "loc-cache.sqlite3"
+
+
+class LocCache:
+    """
+    SQLite-backed store of per-file line counts, with least-recently-used eviction.
+
+    Use it as a context manager, or call 'close()' when done, so pending
+    writes are committed and the size bound is enforced.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            path: The database file. Defaults to 'default_cache_path()'.
+            max_entries: Maximum number of files kept in the cache.
+
+        Raises:
+            AnalysisError: If the database cannot be opened.
+        """
+        self.path = Path(path) if path is not None else default_cache_path()
+        self.max_entries = max_entries
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Several processes may share the cache (e.g. 'cocomo scan'); writes are short
+            # transactions, so waiting for the lock is preferable to failing.
+            self._db = sqlite3.connect(self.path, timeout=60)
+            self._setup()
+        except (OSError, sqlite3.Error) as e:
+            raise AnalysisError(f"Could not open the line count cache at {self.path}: {e}")
+        self._generation = self._next_generation()
+
+    def __enter__(self) -> "LocCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _setup(self) -> None:
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS files")
+            self._db.execute("DROP TABLE IF EXISTS meta")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest BLOB,"
+            " language TEXT, blank INTEGER, comment INTEGER, code INTEGER,"
+            " generated INTEGER, chunks BLOB, binary INTEGER, last_used INTEGER)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_last_used ON files (last_used)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._db.commit()
+
+    def _next_generation(self) -> int:
+        """Every run gets a new generation number, used as the 'last used' clock."""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        generation = (row[0] if row else 0) + 1
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (generation,))
+        return generation
+
+    def lookup(self, paths: List[str]) -> Dict[str, CachedFile]:
+        """
+        Fetches the cache entries of a batch of files.
+
+        Args:
+            paths: The absolute file paths.
+
+        Returns:
+            A dictionary from path to its CachedFile, for the paths found in the cache.
+        """
+        if not paths:
+            return {}
+        placeholders = ",".join("?" * len(paths))
+        rows = self._db.execute(
+            "SELECT path, size, mtime_ns, digest, language, blank, comment, code, generated, chunks, binary"
+            f" FROM files WHERE path IN ({placeholders})",
+            paths,
+        )
+        return {row[0]: CachedFile(*row[:8], bool(row[8]), row[9], bool(row[10])) for row in rows}
+
+    def touch(self, paths: Iterable[str]) -> None:
+        """Marks entries as used by the current run, protecting them from eviction."""
+        with self._db:
+            self._db.executemany(
+                "UPDATE files SET last_used = ? WHERE path = ?",
+                ((self._generation, path) for path in paths),
+            )
+
+    def store(self, entries: Iterable[CachedFile]) -> None:
+        """Inserts or replaces cache entries."""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (tuple(entry) + (self._generation,) for entry in entries),
+            )
+
+    def clear(self) -> None:
+        """Discards every entry, so the next run rebuilds the cache from scratch."""
+        self._db.execute("DELETE FROM files")
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used entries beyond 'max_entries'.
+
+        Returns:
+            The number of entries removed.
+        """
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return 0
+        self._db.execute(
+            "DELETE FROM files WHERE path IN"
+            " (SELECT path FROM files ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        return excess
+
+    def close(self) -> None:
+        """Enforces the size bound, commits pending writes and closes the database."""
+        try:
+            self.evict()
+            self._db.commit()
+        finally:
+            self._db.close()
@@ -2,34 +2,54 @@
 Main module for COCOMO calculations.
 This is the core business logic of the library.
 """
-from typing import Dict, Optional
+import math
+from typing import Any, Dict, Mapping, Optional, Sequence, Union
 
-from .models import CocomoResult, ProjectMode
-from .constants import COCOMO_MODES, COST_DRIVERS
+from .models import Calibration, CocomoBatchResult, CocomoResult, ProjectMode
+from .constants import COCOMO2_SCALE_FACTORS, COCOMO_MODES, COST_DRIVERS
+from .drivers import (
+    COCOMO2_DRIVERS, Cocomo2Profile, DriverProfile, cocomo2_value, multiplier, resolve_cocomo2_profile, resolve_profile,
+    schedule_fraction,
+)
+from .models import InvalidDriverError
 
 def calculate(
     kloc: float,
     mode: ProjectMode,
     cost_per_month: float,
-    drivers: Optional[Dict[str, str]] = None
+    drivers: Union[Dict[str, str], DriverProfile, Cocomo2Profile, None] = None,
+    strict: bool = False,
+    calibration: Optional[Calibration] = None
 ) -> CocomoResult:
     """
     Calculates the effort, time, and cost estimate using the COCOMO model.
 
     Args:
         kloc: Kilo Lines of Code.
-        mode: The project mode ('organic', 'semi-detached', 'embedded').
+        mode: The project mode ('organic', 'semi-detached', 'embedded'), or 'cocomo2'
+              for the COCOMO II Post-Architecture model.
         cost_per_month: The average monthly cost of a developer.
         drivers: An optional dictionary with the ratings of the cost drivers
                  for the Intermediate calculation. Ex: {'rely': 'high', 'cplx': 'low'}
+                 With 'cocomo2', the ratings of the scale factors and effort multipliers
+                 of COCOMO II. Ex: {'prec': 'high', 'pmat': 'low', 'sced': 'vlow'}
+                 A prebuilt DriverProfile (or Cocomo2Profile) can be passed instead, to reuse its EAF.
+        strict: Raise on unknown drivers or ratings instead of ignoring them.
+        calibration: An optional calibration profile (see 'cocomo_py.calibration'), whose
+                     coefficients replace the built-in ones of the modes it calibrated.
 
     Returns:
         A CocomoResult object with all the estimation data.
+
+    Raises:
+        ValueError: If the mode is invalid.
+        InvalidDriverError: In strict mode, if a driver or rating is invalid.
     """
-    if mode not in COCOMO_MODES:
+    params = mode_parameters(mode, calibration)
+    if params is None:
         raise ValueError(f"Invalid mode '{mode}'. Choose from {', '.join(COCOMO_MODES.keys())}")
-
-    params = COCOMO_MODES[mode]
+    if mode == ProjectMode.COCOMO_II:
+        return _calculate_cocomo2(kloc, mode, params, cost_per_month, drivers, strict)
 
     # 1. Calculate Nominal Effort (base for both models)
     nominal_effort = params['a'] * (kloc ** params['b'])
@@ -37,13 +57,12 @@ def calculate(
     # 2. Calculate EAF if it is an intermediate calculation
     eaf = 1.0
     if drivers:
-        for driver_code, rating in drivers.items():
-            driver_code_lower = driver_code.lower()
-            rating_lower = rating.lower()
-            if driver_code_lower in COST_DRIVERS and rating_lower in COST_DRIVERS[driver_code_lower]['ratings']:
-                eaf *= COST_DRIVERS[driver_code_lower]['ratings'][rating_lower]
-            # Ignores invalid drivers or ratings, keeping the multiplier 1.0
-    
+        if isinstance(drivers, Cocomo2Profile):
+            drivers = drivers.ratings
+        profile = drivers if isinstance(drivers, DriverProfile) else resolve_profile(drivers, strict)
+        # Invalid drivers or ratings were dropped from the profile (unless strict), keeping the multiplier 1.0
+        eaf = profile.eaf
+
     # 3. Calculate Adjusted Effort
     adjusted_effort = nominal_effort * eaf
 
@@ -66,3 +85,372 @@ def calculate(
         is_intermediate=bool(drivers)
     )
 
+
+def mode_parameters(mode: str, calibration: Optional[Calibration] = None) -> Optional[Mapping[str, float]]:
+    """
+    The coefficients 'a', 'b', 'c' and 'd' of a mode: the calibrated ones if the
+    profile has them, the built-in ones otherwise. None if the mode is invalid.
+    """
+    fit = calibration.modes.get(mode) if calibration is not None else None
+    if fit is None:
+        return COCOMO_MODES.get(mode)
+    return {'a': fit.a, 'b': fit.b, 'c': fit.c, 'd': fit.d}
+
+
+def _calculate_cocomo2(kloc, mode, params, cost_per_month, drivers, strict) -> CocomoResult:
+    """
+    The COCOMO II Post-Architecture equations:
+
+        E = B + 0.01 * sum(SF)
+        PM = A * KSLOC**E * prod(EM)
+        TDEV = C * PM_NS**(D + 0.2 * (E - B)) * SCED% / 100
+
+    where PM_NS is the effort without the SCED multiplier.
+    """
+    if isinstance(drivers, DriverProfile):
+        drivers = drivers.ratings
+    profile = drivers if isinstance(drivers, Cocomo2Profile) else resolve_cocomo2_profile(tuple((drivers or {}).items()), strict)
+
+    exponent = params['b'] + 0.01 * profile.scale
+    nominal_schedule_effort = params['a'] * (kloc ** exponent) * profile.em
+    adjusted_effort = nominal_schedule_effort * profile.sced
+    dev_time_months = (
+        params['c'] * (nominal_schedule_effort ** (params['d'] + 0.2 * (exponent - params['b']))) * profile.schedule
+    )
+    people_required = adjusted_effort / dev_time_months if dev_time_months > 0 else 0
+
+    return CocomoResult(
+        kloc=kloc,
+        mode=mode,
+        effort_person_months=adjusted_effort,
+        development_time_months=dev_time_months,
+        people_required=people_required,
+        total_cost=adjusted_effort * cost_per_month,
+        cost_per_month=cost_per_month,
+        eaf=profile.eaf,
+        is_intermediate=bool(drivers)
+    )
+
+
+def calculate_batch(
+    kloc: Sequence[float],
+    mode: Union[ProjectMode, Sequence[ProjectMode]],
+    cost_per_month: Union[float, Sequence[float]],
+    drivers: Optional[Mapping[str, Union[str, Sequence[Optional[str]]]]] = None,
+    use_numpy: Optional[bool] = None,
+    strict: bool = False,
+    calibration: Optional[Calibration] = None
+) -> CocomoBatchResult:
+    """
+    Calculates many COCOMO estimates at once, in columnar form.
+
+    The mode and cost tables are resolved once per distinct value instead of once
+    per estimate. With NumPy installed the formulas run vectorized; otherwise a
+    pure-Python loop is used. Both follow the same operation order as 'calculate',
+    so both reproduce it bit for bit. COCOMO II rows ('cocomo2') can be mixed with
+    the others: each row reads the driver columns of its own model.
+
+    Args:
+        kloc: Kilo Lines of Code of each estimate.
+        mode: The project mode, either one for all estimates or one per estimate.
+        cost_per_month: The average monthly cost of a developer, either one value or one per estimate.
+        drivers: An optional dictionary from driver code to a rating column (one rating
+                 per estimate, None when the driver is not rated) or to a single rating
+                 applied to every estimate. Ex: {'rely': ['high', None], 'cplx': 'low'}
+        use_numpy: Forces (True) or disables (False) the NumPy path. By default
+                   NumPy is used when it is installed.
+        strict: Raise on unknown drivers or ratings instead of ignoring them.
+        calibration: An optional calibration profile, see 'calculate'.
+
+    Returns:
+        A CocomoBatchResult with one row per estimate.
+
+    Raises:
+        ValueError: If a mode is invalid or a column has the wrong length.
+        InvalidDriverError: In strict mode, if a driver or rating is invalid.
+    """
+    size = len(kloc)
+    modes = _column(mode, size, "mode")
+    costs = _column(cost_per_month, size, "cost_per_month")
+    driver_columns = [(code, _column(ratings, size, code)) for code, ratings in (drivers or {}).items()]
+
+    parameters = {}
+    for distinct_mode in set(modes):
+        parameters[distinct_mode] = mode_parameters(distinct_mode, calibration)
+        if parameters[distinct_mode] is None:
+            raise ValueError(f"Invalid mode '{distinct_mode}'. Choose from {', '.join(COCOMO_MODES.keys())}")
+
+    np = load_numpy(use_numpy)
+    if np is not None:
+        return _calculate_batch_numpy(np, kloc, modes, costs, driver_columns, strict, parameters)
+    return _calculate_batch_python(kloc, modes, costs, driver_columns, strict, parameters)
+
+
+def calculate_table(
+    table: Any,
+    use_numpy: Optional[bool] = None,
+    strict: bool = False,
+    calibration: Optional[Calibration] = None
+) -> CocomoBatchResult:
+    """
+    Calculates one COCOMO estimate per row of a columnar table.
+
+    Args:
+        table: A dictionary of columns, a pandas DataFrame or a pyarrow Table with the
+               columns 'kloc', 'mode' and 'cost_per_month'. Any other column named after
+               a cost driver (e.g. 'rely'), or a COCOMO II scale factor or effort
+               multiplier (e.g. 'prec'), holds that driver's ratings.
+        use_numpy: See 'calculate_batch'.
+        strict: See 'calculate_batch'.
+        calibration: See 'calculate_batch'.
+
+    Returns:
+        A CocomoBatchResult with one row per table row.
+    """
+    names = list(table.keys()) if hasattr(table, "keys") else list(table.column_names)
+    columns = {name: to_list(table[name]) for name in names}
+    missing = {"kloc", "mode", "cost_per_month"} - columns.keys()
+    if missing:
+        raise ValueError(f"The table is missing the columns: {', '.join(sorted(missing))}")
+
+    drivers = {
+        name: column for name, column in columns.items()
+        if name.lower() in COST_DRIVERS or name.lower() in COCOMO2_DRIVERS
+    }
+    return calculate_batch(
+        columns["kloc"],
+        columns["mode"],
+        columns["cost_per_month"],
+        drivers=drivers,
+        use_numpy=use_numpy,
+        strict=strict,
+        calibration=calibration
+    )
+
+
+def _calculate_batch_python(kloc, modes, costs, driver_columns, strict, parameters) -> CocomoBatchResult:
+    size = len(kloc)
+    cocomo2 = [mode == ProjectMode.COCOMO_II for mode in modes]
+    eafs = [1.0] * size
+    rated = [False] * size
+    for code, ratings in driver_columns:
+        multipliers = _multipliers(code, {r for r, ii in zip(ratings, cocomo2) if not ii}, strict)
+        for index, rating in enumerate(ratings):
+            if rating is not None:
+                rated[index] = True
+                if not cocomo2[index]:
+                    eafs[index] *= multipliers[rating]
+
+    # COCOMO II rows: one memoized profile per distinct combination of ratings.
+    profiles = [None] * size
+    for index in (index for index in range(size) if cocomo2[index]):
+        items = tuple((code, ratings[index]) for code, ratings in driver_columns if ratings[index] is not None)
+        profiles[index] = resolve_cocomo2_profile(items, strict)
+        eafs[index] = profiles[index].eaf
+
+    efforts = []
+    times = []
+    people = []
+    total_costs = []
+    for index in range(size):
+        params = parameters[modes[index]]
+        profile = profiles[index]
+        if profile is None:
+            adjusted_effort = params['a'] * (kloc[index] ** params['b']) * eafs[index]
+            dev_time_months = params['c'] * (adjusted_effort ** params['d'])
+        else:
+            exponent = params['b'] + 0.01 * profile.scale
+            nominal_schedule_effort = params['a'] * (kloc[index] ** exponent) * profile.em
+            adjusted_effort = nominal_schedule_effort * profile.sced
+            dev_time_months = (
+                params['c'] * (nominal_schedule_effort ** (params['d'] + 0.2 * (exponent - params['b'])))
+                * profile.schedule
+            )
+        efforts.append(adjusted_effort)
+        times.append(dev_time_months)
+        people.append(adjusted_effort / dev_time_months if dev_time_months > 0 else 0)
+        total_costs.append(adjusted_effort * costs[index])
+
+    return CocomoBatchResult(
+        kloc=list(kloc),
+        mode=_project_modes(modes),
+        effort_person_months=efforts,
+        development_time_months=times,
+        people_required=people,
+        total_cost=total_costs,
+        cost_per_month=list(costs),
+        eaf=eafs,
+        is_intermediate=rated
+    )
+
+
+def _calculate_batch_numpy(np, kloc, modes, costs, driver_columns, strict, parameters) -> CocomoBatchResult:
+    size = len(kloc)
+    kloc_array = np.asarray(kloc, dtype=float)
+
+    distinct_modes = {mode: index for index, mode in enumerate(dict.fromkeys(modes))}
+    mode_index = np.fromiter(map(distinct_modes.__getitem__, modes), dtype=np.intp, count=size)
+    coefficients = np.array([[parameters[mode][key] for key in "abcd"] for mode in distinct_modes])
+    a, b, c, d = coefficients[mode_index].T
+
+    cocomo2 = mode_index == distinct_modes.get(ProjectMode.COCOMO_II, -1)
+    eaf = np.ones(size)
+    rated = np.zeros(size, dtype=bool)
+    # COCOMO II rows: scale factor columns, effort multipliers without SCED, SCED and its schedule share.
+    scale_factors = {}
+    em = np.ones(size)
+    sced = np.ones(size)
+    schedule = np.ones(size)
+    for code, ratings in driver_columns:
+        ratings = np.asarray(ratings, dtype=object)
+        present = np.not_equal(ratings, None)
+        if not present.any():
+            continue
+        rated |= present
+        basic = present & ~cocomo2
+        if basic.any():
+            distinct, rating_index = np.unique(ratings[basic].astype(str), return_inverse=True)
+            multipliers = _multipliers(code, distinct, strict)
+            column = np.ones(size)
+            column[basic] = np.array([multipliers[rating] for rating in distinct])[rating_index]
+            eaf *= column
+        present &= cocomo2
+        if present.any():
+            _cocomo2_columns(np, code, ratings, present, strict, scale_factors, em, sced, schedule)
+
+    if cocomo2.any():
+        # Same operation order as '_calculate_cocomo2', with the scale factors added in a fixed order.
+        scale = np.zeros(size)
+        for code, details in COCOMO2_SCALE_FACTORS.items():
+            scale += scale_factors.get(code, details['ratings']['nom'])
+        exponent = b + 0.01 * scale
+        d = np.where(cocomo2, d + 0.2 * (exponent - b), d)
+        b = np.where(cocomo2, exponent, b)
+        eaf = np.where(cocomo2, em * sced, eaf)
+        nominal_schedule_effort = a * _power(np, kloc_array, b) * np.where(cocomo2, em, eaf)
+        adjusted_effort = nominal_schedule_effort * sced
+        dev_time_months = c * _power(np, nominal_schedule_effort, d) * schedule
+    else:
+        # Same operation order as 'calculate': ((a * kloc**b) * eaf), then c * effort**d.
+        adjusted_effort = a * _power(np, kloc_array, b) * eaf
+        dev_time_months = c * _power(np, adjusted_effort, d)
+    people_required = np.divide(adjusted_effort, dev_time_months, out=np.zeros(size), where=dev_time_months > 0)
+    cost_array = np.asarray(costs, dtype=float)
+
+    return CocomoBatchResult(
+        kloc=kloc_array,
+        mode=_project_modes(modes),
+        effort_person_months=adjusted_effort,
+        development_time_months=dev_time_months,
+        people_required=people_required,
+        total_cost=adjusted_effort * cost_array,
+        cost_per_month=cost_array,
+        eaf=eaf,
+        is_intermediate=rated
+    )
+
+
+def _cocomo2_columns(np, code, ratings, present, strict, scale_factors, em, sced, schedule) -> None:
+    """Applies the ratings of one driver column to the COCOMO II rows selected by 'present'."""
+    distinct, rating_index = np.unique(ratings[present].astype(str), return_inverse=True)
+    values = _cocomo2_values(code, distinct, strict)
+    # Invalid ratings are ignored: their rows keep the nominal value.
+    valid = np.array([values[rating] is not None for rating in distinct])[rating_index]
+    if not valid.any():
+        return
+    rows = np.flatnonzero(present)[valid]
+    column = np.array([1.0 if values[rating] is None else values[rating] for rating in distinct])[rating_index][valid]
+    code = code.lower()
+    if code in COCOMO2_SCALE_FACTORS:
+        scale_factors.setdefault(code, np.full(len(em), COCOMO2_SCALE_FACTORS[code]['ratings']['nom']))[rows] = column
+    elif code == 'sced':
+        sced[rows] = column
+        fractions = np.array([schedule_fraction(rating) if values[rating] is not None else 1.0 for rating in distinct])
+        schedule[rows] = fractions[rating_index][valid]
+    else:
+        em[rows] *= column
+
+
+def _cocomo2_values(code: str, ratings, strict: bool) -> Dict[str, Optional[float]]:
+    """Resolves each distinct COCOMO II rating of a driver once; None marks the ignored ones unless strict."""
+    resolved = {}
+    for rating in ratings:
+        try:
+            resolved[rating] = cocomo2_value(code, rating)
+        except InvalidDriverError:
+            if strict:
+                raise
+            resolved[rating] = None
+    return resolved
+
+
+def _power(np, base, exponent):
+    """
+    Element-wise power through the C library's pow, like Python's '**'.
+    NumPy's SIMD 'power' may differ from it in the last bit on some CPUs.
+    """
+    return np.fromiter(map(math.pow, base.tolist(), exponent.tolist()), dtype=float, count=len(base))
+
+
+def _project_modes(modes: list) -> list:
+    resolved = {mode: ProjectMode(mode) for mode in set(modes)}
+    return [resolved[mode] for mode in modes]
+
+
+def _multipliers(code: str, ratings, strict: bool) -> Dict[str, float]:
+    """Resolves each distinct rating of a driver once. Invalid drivers or ratings keep the multiplier 1.0 unless strict."""
+    resolved = {}
+    for rating in ratings:
+        if rating is None:
+            continue
+        try:
+            resolved[rating] = multiplier(code, rating)
+        except InvalidDriverError:
+            if strict:
+                raise
+            resolved[rating] = 1.0
+    return resolved
+
+
+def _column(value, size: int, name: str) -> list:
+    """Broadcasts a scalar to a column, or checks the length of a column."""
+    if isinstance(value, (str, int, float)) or value is None:
+        return [value] * size
+    column = to_list(value)
+    if len(column) != size:
+        raise ValueError(f"The '{name}' column has {len(column)} values, expected {size}.")
+    return column
+
+
+def to_list(column) -> list:
+    """Converts a list, tuple, NumPy array, pandas Series or Arrow array to a list."""
+    if hasattr(column, "to_pylist"):
+        return column.to_pylist()
+    if hasattr(column, "tolist"):
+        return column.tolist()
+    return list(column)
+
+
+def load_numpy(use_numpy: Optional[bool] = None):
+    """
+    Imports NumPy on first use; it is an optional dependency.
+
+    Args:
+        use_numpy: The 'use_numpy' option of the vectorized functions: False disables
+                   NumPy, True requires it and None uses it when it is installed.
+
+    Returns:
+        The numpy module, or None when NumPy is disabled or not installed.
+
+    Raises:
+        ImportError: If use_numpy is True and NumPy is not installed.
+    """
+    if use_numpy is False:
+        return None
+    try:
+        import numpy
+    except ImportError:
+        if use_numpy:
+            raise ImportError("NumPy is required for use_numpy=True. Install it with 'pip install cocomo-py[numpy]'.")
+        return None
+    return numpy
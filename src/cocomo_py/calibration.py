@@ -0,0 +1,275 @@
+"""
+Calibration of the COCOMO coefficients on historical projects.
+
+Taking logarithms turns both COCOMO equations into straight lines:
+
+    ln(effort / EAF)  = ln(a) + b * ln(KLOC)
+    ln(duration)      = ln(c) + d * ln(effort)
+
+so each mode is calibrated by two linear regressions, one pass over the
+records each (the iteratively reweighted Huber fit makes a few passes). The
+driver ratings are resolved through the same memoized profiles as
+'calculate', so a history of tens of thousands of projects with a handful of
+distinct rating sets is resolved in one dictionary lookup per record.
+
+For COCOMO II the scale factors and SCED are moved to the left-hand side
+('0.01 * sum(SF) * ln(KSLOC)', the SCED multiplier and schedule share), which
+leaves the same two lines in A, B, C and D.
+"""
+import csv
+import json
+import math
+from dataclasses import asdict
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+
+from .calculator import load_numpy, to_list
+from .constants import COCOMO_MODES, COST_DRIVERS
+from .drivers import COCOMO2_DRIVERS, resolve_cocomo2_profile, resolve_profile
+from .models import Calibration, CalibrationMethod, ModeFit, ProjectMode
+
+# Version of the calibration profile file format.
+PROFILE_VERSION = 1
+
+# Below this many projects (or without spread in their sizes), only 'a' (or 'c') is
+# fitted and the exponent keeps its built-in value.
+MIN_PROJECTS = 3
+
+# Huber's tuning constant, in units of the robust residual scale (95% efficiency for normal errors).
+HUBER_K = 1.345
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-10
+
+REQUIRED_COLUMNS = ("kloc", "mode", "effort_person_months")
+NUMERIC_COLUMNS = ("kloc", "effort_person_months", "development_time_months")
+
+
+def read_history(path: Path) -> Dict[str, List[Any]]:
+    """
+    Reads a CSV file of past projects into columns.
+
+    The file needs the columns 'kloc', 'mode' and 'effort_person_months' (the actual
+    effort), and may have 'development_time_months' (the actual duration). Any column
+    named after a cost driver, COCOMO II driver included, holds its ratings. Empty
+    cells are read as None.
+
+    Raises:
+        ValueError: If a required column is missing or a number cannot be read.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        names = [name.strip() for name in reader.fieldnames or ()]
+        columns: Dict[str, List[Any]] = {name: [] for name in names}
+        for line, row in enumerate(reader, start=2):
+            for name, value in zip(names, row.values()):
+                value = value.strip() if isinstance(value, str) else None
+                if not value:
+                    value = None
+                elif name in NUMERIC_COLUMNS:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        raise ValueError(f"Line {line}: '{name}' is not a number: {value!r}")
+                columns[name].append(value)
+    return columns
+
+
+def calibrate(
+    history: Any,
+    method: CalibrationMethod = CalibrationMethod.OLS,
+    strict: bool = False,
+    use_numpy: Optional[bool] = None
+) -> Calibration:
+    """
+    Fits the COCOMO coefficients of every mode present in a history of projects.
+
+    Args:
+        history: The past projects, as returned by 'read_history', or any dictionary of
+                 columns, pandas DataFrame or pyarrow Table with the same columns.
+        method: 'ols' for least squares on the logarithms, 'huber' for a Huber
+                M-estimate, which limits the pull of outlier projects.
+        strict: Raise on unknown drivers or ratings instead of ignoring them.
+        use_numpy: Forces (True) or disables (False) the NumPy regressions. By default
+                   NumPy is used when it is installed.
+
+    Returns:
+        A Calibration with the fitted coefficients and fit errors of each mode.
+
+    Raises:
+        ValueError: If a column is missing, a mode is invalid or a size, effort
+                    or duration is not positive.
+        InvalidDriverError: In strict mode, if a driver or rating is invalid.
+    """
+    method = CalibrationMethod(method)
+    np = load_numpy(use_numpy)
+    names = list(history.keys()) if hasattr(history, "keys") else list(history.column_names)
+    columns = {name: to_list(history[name]) for name in names}
+    missing = set(REQUIRED_COLUMNS) - columns.keys()
+    if missing:
+        raise ValueError(f"The history is missing the columns: {', '.join(sorted(missing))}")
+    durations = columns.get("development_time_months") or [None] * len(columns["kloc"])
+    driver_columns = [
+        (name, column) for name, column in columns.items()
+        if name.lower() in COST_DRIVERS or name.lower() in COCOMO2_DRIVERS
+    ]
+
+    # Per mode: (x, y) of the effort line, and of the schedule line.
+    points: Dict[str, Tuple[List[float], List[float], List[float], List[float]]] = {}
+    for index, (kloc, mode, effort) in enumerate(zip(columns["kloc"], columns["mode"], columns["effort_person_months"])):
+        mode = _mode(mode, index)
+        duration = durations[index]
+        if not _positive(kloc) or not _positive(effort) or not (duration is None or _positive(duration)):
+            raise ValueError(f"Project {index + 1}: the size, effort and duration must be positive numbers.")
+        items = tuple((code, ratings[index]) for code, ratings in driver_columns if ratings[index] is not None)
+        effort_x, effort_y, schedule_x, schedule_y = points.setdefault(mode, ([], [], [], []))
+        log_kloc = math.log(kloc)
+        if mode == ProjectMode.COCOMO_II:
+            profile = resolve_cocomo2_profile(items, strict)
+            spread = 0.01 * profile.scale
+            effort_x.append(log_kloc)
+            effort_y.append(math.log(effort / profile.eaf) - spread * log_kloc)
+            if duration is not None:
+                log_effort = math.log(effort / profile.sced)
+                schedule_x.append(log_effort)
+                schedule_y.append(math.log(duration / profile.schedule) - 0.2 * spread * log_effort)
+        else:
+            eaf = resolve_profile(dict(items), strict).eaf if items else 1.0
+            effort_x.append(log_kloc)
+            effort_y.append(math.log(effort / eaf))
+            if duration is not None:
+                schedule_x.append(math.log(effort))
+                schedule_y.append(math.log(duration))
+
+    modes = {}
+    for mode, (effort_x, effort_y, schedule_x, schedule_y) in points.items():
+        params = COCOMO_MODES[mode]
+        log_a, b, effort_errors = _fit_line(effort_x, effort_y, params['b'], method, np)
+        fit = dict(a=math.exp(log_a), b=b, n_projects=len(effort_x), **_fit_error(effort_errors, "effort"))
+        if schedule_x:
+            log_c, d, schedule_errors = _fit_line(schedule_x, schedule_y, params['d'], method, np)
+            fit.update(c=math.exp(log_c), d=d, n_schedules=len(schedule_x), **_fit_error(schedule_errors, "schedule"))
+        else:
+            fit.update(c=params['c'], d=params['d'])
+        modes[str(mode)] = ModeFit(**fit)
+    return Calibration(method=method, modes=modes)
+
+
+def save_calibration(calibration: Calibration, path: Path) -> None:
+    """Writes a calibration profile as JSON."""
+    profile = {
+        "version": PROFILE_VERSION,
+        "method": str(calibration.method),
+        "modes": {mode: asdict(fit) for mode, fit in calibration.modes.items()},
+    }
+    Path(path).write_text(json.dumps(profile, indent=2) + "\n", encoding="utf-8")
+
+
+def load_calibration(path: Path) -> Calibration:
+    """
+    Reads a calibration profile written by 'save_calibration'.
+
+    Raises:
+        ValueError: If the file is not a valid calibration profile.
+    """
+    try:
+        profile = json.loads(Path(path).read_text(encoding="utf-8"))
+        if profile.get("version") != PROFILE_VERSION:
+            raise ValueError(f"unsupported version {profile.get('version')!r}")
+        modes = {}
+        for mode, fit in profile["modes"].items():
+            modes[str(_mode(mode))] = ModeFit(**fit)
+        return Calibration(method=CalibrationMethod(profile["method"]), modes=modes)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid calibration profile '{path}': {e}")
+
+
+def _fit_line(
+    x: List[float],
+    y: List[float],
+    default_slope: float,
+    method: CalibrationMethod,
+    np=None
+) -> Tuple[float, float, List[float]]:
+    """
+    Fits y = intercept + slope * x, by least squares or with Huber weights
+    (iteratively reweighted least squares, the residual scale being their MAD).
+    With too few points, or no spread in x, only the intercept is fitted.
+
+    Returns:
+        (intercept, slope, residuals).
+    """
+    fit_slope = len(x) >= MIN_PROJECTS and min(x) != max(x)
+    if np is not None:
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        weights = np.ones(len(x))
+    else:
+        weights = [1.0] * len(x)
+    intercept = slope = 0.0
+    for _ in range(MAX_ITERATIONS):
+        previous = (intercept, slope)
+        if np is not None:
+            intercept, slope = _weighted_line_numpy(np, x, y, weights, None if fit_slope else default_slope)
+            residuals = y - intercept - slope * x
+            magnitudes = np.abs(residuals)
+            scale = float(np.median(magnitudes)) / 0.6745
+        else:
+            intercept, slope = _weighted_line(x, y, weights, None if fit_slope else default_slope)
+            residuals = [yi - intercept - slope * xi for xi, yi in zip(x, y)]
+            magnitudes = [abs(r) for r in residuals]
+            scale = median(magnitudes) / 0.6745
+        if method == CalibrationMethod.OLS:
+            break
+        if scale == 0 or (abs(intercept - previous[0]) < TOLERANCE and abs(slope - previous[1]) < TOLERANCE):
+            break
+        limit = HUBER_K * scale
+        if np is not None:
+            weights = np.minimum(1.0, limit / np.maximum(magnitudes, limit))
+        else:
+            weights = [1.0 if m <= limit else limit / m for m in magnitudes]
+    return intercept, slope, list(residuals)
+
+
+def _weighted_line(x, y, weights, slope: Optional[float]) -> Tuple[float, float]:
+    """Weighted least squares line; with a fixed slope, only the intercept is fitted."""
+    total = math.fsum(weights)
+    mean_x = math.fsum(w * xi for w, xi in zip(weights, x)) / total
+    mean_y = math.fsum(w * yi for w, yi in zip(weights, y)) / total
+    if slope is None:
+        # Centered sums, which stay accurate when the sizes are all large.
+        sxx = math.fsum(w * (xi - mean_x) ** 2 for w, xi in zip(weights, x))
+        sxy = math.fsum(w * (xi - mean_x) * (yi - mean_y) for w, xi, yi in zip(weights, x, y))
+        slope = sxy / sxx
+    return mean_y - slope * mean_x, slope
+
+
+def _weighted_line_numpy(np, x, y, weights, slope: Optional[float]) -> Tuple[float, float]:
+    """The vectorized '_weighted_line'."""
+    total = weights.sum()
+    mean_x = float(np.dot(weights, x) / total)
+    mean_y = float(np.dot(weights, y) / total)
+    if slope is None:
+        dx = x - mean_x
+        slope = float(np.dot(weights * dx, y - mean_y) / np.dot(weights * dx, dx))
+    return mean_y - slope * mean_x, slope
+
+
+def _fit_error(residuals: List[float], prefix: str) -> Dict[str, float]:
+    """MMRE and PRED(25) of the fitted line: a log residual r means estimate / actual = exp(-r)."""
+    errors = [abs(math.expm1(-r)) for r in residuals]
+    return {
+        f"{prefix}_mmre": math.fsum(errors) / len(errors),
+        f"{prefix}_pred25": sum(error <= 0.25 for error in errors) / len(errors),
+    }
+
+
+def _mode(mode: Any, index: Optional[int] = None) -> ProjectMode:
+    try:
+        return ProjectMode(str(mode).lower())
+    except ValueError:
+        where = f"Project {index + 1}: " if index is not None else ""
+        raise ValueError(f"{where}Invalid mode '{mode}'. Choose from {', '.join(COCOMO_MODES.keys())}")
+
+
+def _positive(value: Any) -> bool:
+    return isinstance(value, (int, float)) and value > 0 and math.isfinite(value)
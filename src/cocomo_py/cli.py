@@ -3,19 +3,34 @@ Command-Line Interface (CLI) module for cocomo-py.
 This is the presentation layer that interacts with the user.
 """
 
+from contextlib import nullcontext
+from enum import StrEnum
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple, Union
+
+import statistics
+import time
 
 import typer
 from rich.console import Console
 from rich.table import Table
+from rich.tree import Tree
 
 # Import business logic and constants
 from . import __version__
 from .calculator import calculate
-from .analyzer import analyze_kloc
-from .models import ProjectMode, AnalysisError, ClocNotFoundError
+from .cache import LocCache, default_cache_path
+from .machine import (
+    INTERMEDIATE_NEEDS_TABLE, analyze_project, guarded, open_calibration, parse_drivers, report_timings, run_estimate,
+    run_scan, run_watch,
+)
+from .scan import collect_repositories, scan_repositories, summarize
+from .simulation import Discrete, Distribution, Fixed, Triangular, simulate
+from .models import Backend, CalibrationMethod, DedupMode, LocTree, OutputFormat, ProfileFormat, ProjectMode, AnalysisError, ClocNotFoundError
+from .timings import Timings, phase
 from .constants import COCOMO_MODES, COST_DRIVERS
+from .drivers import COCOMO2_DRIVERS
+from .explain import render
 
 app = typer.Typer(
     name="cocomo-py",
@@ -24,6 +39,11 @@ app = typer.Typer(
 )
 console = Console()
 
+# The modes offered by 'simulate', which has no COCOMO II model.
+SimulationMode = StrEnum(
+    "SimulationMode", {mode.name: mode.value for mode in ProjectMode if mode != ProjectMode.COCOMO_II}
+)
+
 def version_callback(value: bool):
     """Displays the application version and exits."""
     if value:
@@ -35,11 +55,12 @@ def estimate_project(
     project_path: Path = typer.Argument(
         ...,
         exists=True,
-        file_okay=False,
+        file_okay=True,
         dir_okay=True,
         readable=True,
         resolve_path=True,
-        help="The path to the project folder to be analyzed."
+        allow_dash=True,
+        help="The path to the project folder to be analyzed, or a tar or zip archive ('-' for the standard input)."
     ),
     mode: ProjectMode = typer.Option(
         ProjectMode.SEMI_DETACHED,
@@ -57,6 +78,89 @@ def estimate_project(
         "--intermediate", "-i",
         help="Enables interactive mode for Intermediate COCOMO calculation."
     ),
+    backend: Backend = typer.Option(
+        Backend.NATIVE,
+        "--backend", "-b",
+        case_sensitive=False,
+        help="The line counting engine: the built-in counter or the external 'cloc'."
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Counts every file again, without reading or updating the line count cache."
+    ),
+    rebuild_cache: bool = typer.Option(
+        False,
+        "--rebuild-cache",
+        help="Discards the line count cache and rebuilds it from scratch."
+    ),
+    revision: Optional[str] = typer.Option(
+        None,
+        "--revision", "-r",
+        help="Counts a git revision (commit, branch or tag) straight from the repository, without checking it out."
+    ),
+    driver: List[str] = typer.Option(
+        [],
+        "--driver", "-d",
+        help="A cost driver rating, e.g. 'rely=high'. Repeatable."
+    ),
+    exclude: List[str] = typer.Option(
+        [],
+        "--exclude", "-x",
+        help="A glob of files or directories to ignore, in .gitignore syntax. Repeatable."
+    ),
+    breakdown: bool = typer.Option(
+        False,
+        "--breakdown",
+        help="Shows the lines of code and the estimate of every directory subtree."
+    ),
+    depth: int = typer.Option(
+        2,
+        "--depth",
+        min=0,
+        help="Directory levels of the breakdown; deeper files count in their ancestor."
+    ),
+    dedup: DedupMode = typer.Option(
+        DedupMode.OFF,
+        "--dedup",
+        case_sensitive=False,
+        help="Counts duplicated files once: 'exact' copies, or 'near' copies with small edits too."
+    ),
+    calibration: Optional[Path] = typer.Option(
+        None,
+        "--calibration",
+        exists=True,
+        dir_okay=False,
+        help="A calibration profile written by 'cocomo calibrate', used in place of the built-in coefficients."
+    ),
+    timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Shows the time of each phase, the files and bytes per second and the slowest files and directories."
+    ),
+    profile: Optional[Path] = typer.Option(
+        None,
+        "--profile",
+        dir_okay=False,
+        help="Writes the timings of the run to this file."
+    ),
+    profile_format: ProfileFormat = typer.Option(
+        ProfileFormat.JSON,
+        "--profile-format",
+        case_sensitive=False,
+        help="The '--profile' format: 'json', or 'chrome' for a Chrome trace (chrome://tracing, Perfetto)."
+    ),
+    format: OutputFormat = typer.Option(
+        OutputFormat.TABLE,
+        "--format", "-f",
+        case_sensitive=False,
+        help="The output format. Anything but 'table' is machine-readable."
+    ),
+    output: Optional[str] = typer.Option(
+        None,
+        "--output", "-o",
+        help="The output file for machine-readable formats. Defaults to the standard output."
+    ),
     version: Optional[bool] = typer.Option(
         None, "--version", callback=version_callback, is_eager=True,
         help="Displays the application version."
@@ -65,16 +169,38 @@ def estimate_project(
     """
     Analyzes a project, calculates the COCOMO estimate, and displays the results.
     """
+    recorder = Timings() if timings or profile is not None else None
+    if format != OutputFormat.TABLE:
+        if intermediate:
+            raise typer.BadParameter(INTERMEDIATE_NEEDS_TABLE, param_hint="'--intermediate'")
+        code = guarded(lambda: run_estimate(
+            project_path, mode, cost_per_month, parse_drivers(driver), backend,
+            no_cache, rebuild_cache, revision, format, output, depth if breakdown else None, exclude, dedup,
+            open_calibration(calibration), recorder
+        ))
+        if code == 0 and recorder is not None:
+            code = guarded(lambda: report_timings(recorder, timings, profile, profile_format))
+        raise typer.Exit(code=code)
+
     try:
         with console.status("[bold green]Analyzing lines of code...[/bold green]"):
-            kloc = analyze_kloc(project_path)
+            tree = analyze_project(
+                project_path, backend, no_cache, rebuild_cache, revision, depth if breakdown else 0, exclude, dedup,
+                recorder
+            )
+        kloc = tree.kloc
         console.print(f"✅ Analysis complete: [bold cyan]{kloc:.2f} KLOC[/bold cyan]")
+        duplicates = tree.report.duplicates
+        if duplicates.n_files:
+            console.print(f"   Duplicates excluded: {duplicates.code / 1000:.2f} KLOC in {duplicates.n_files} files")
 
-        drivers = {}
+        drivers = parse_drivers(driver)
         if intermediate:
-            console.print("\n--- [bold]Cost Driver Assessment (Intermediate COCOMO)[/bold] ---")
+            cocomo2 = mode == ProjectMode.COCOMO_II
+            title = "COCOMO II Scale Factors and Effort Multipliers" if cocomo2 else "Intermediate COCOMO"
+            console.print(f"\n--- [bold]Cost Driver Assessment ({title})[/bold] ---")
             console.print("Rate each item. Press Enter to use the default value 'nominal (nom)'.")
-            for code, details in COST_DRIVERS.items():
+            for code, details in (COCOMO2_DRIVERS if cocomo2 else COST_DRIVERS).items():
                 valid_ratings = list(details['ratings'].keys())
                 console.print(f"-> [yellow]{details['name']} ({code.upper()})[/yellow]", end=" ")
                 prompt_text = f"[{'/'.join(valid_ratings)}]"
@@ -86,30 +212,44 @@ def estimate_project(
                     drivers[code] = rating
 
         # Calculate the result
-        result = calculate(kloc, mode, cost_per_month, drivers)
+        calibration = open_calibration(calibration)
+        with phase(recorder, "estimate"):
+            result = calculate(kloc, mode, cost_per_month, drivers, calibration=calibration)
 
         # Display the results table
-        console.print("\n--- [bold green]COCOMO Estimation Result[/bold green] ---")
-        table = Table(show_header=False)
-        table.add_column("Metric", style="cyan")
-        table.add_column("Value", style="magenta")
+        with phase(recorder, "render"):
+            console.print("\n--- [bold green]COCOMO Estimation Result[/bold green] ---")
+            table = Table(show_header=False)
+            table.add_column("Metric", style="cyan")
+            table.add_column("Value", style="magenta")
 
-        table.add_row("Project Mode", COCOMO_MODES[result.mode]['name'])
-        table.add_row("Lines of Code (KLOC)", f"{result.kloc:.2f}")
-        if result.is_intermediate:
-            table.add_row("Effort Adjustment Factor (EAF)", f"{result.eaf:.3f}")
-        
-        table.add_row("Estimated Effort", f"{result.effort_person_months:.2f} person-months")
-        table.add_row("Development Time", f"{result.development_time_months:.2f} months")
-        table.add_row("Recommended People", f"{result.people_required:.2f} people")
-        table.add_row("Cost per Month (Unit)", f"$ {result.cost_per_month:,.2f}")
-        table.add_row("[bold]Total Estimated Cost[/bold]", f"[bold]$ {result.total_cost:,.2f}[/bold]")
+            table.add_row("Project Mode", COCOMO_MODES[result.mode]['name'])
+            if calibration is not None and result.mode in calibration.modes:
+                table.add_row("Coefficients", f"Calibrated ({calibration.modes[result.mode].n_projects} projects)")
+            table.add_row("Lines of Code (KLOC)", f"{result.kloc:.2f}")
+            if result.is_intermediate:
+                table.add_row("Effort Adjustment Factor (EAF)", f"{result.eaf:.3f}")
 
-        console.print(table)
+            table.add_row("Estimated Effort", f"{result.effort_person_months:.2f} person-months")
+            table.add_row("Development Time", f"{result.development_time_months:.2f} months")
+            table.add_row("Recommended People", f"{result.people_required:.2f} people")
+            table.add_row("Cost per Month (Unit)", f"$ {result.cost_per_month:,.2f}")
+            table.add_row("[bold]Total Estimated Cost[/bold]", f"[bold]$ {result.total_cost:,.2f}[/bold]")
+
+            console.print(table)
+
+            if breakdown:
+                console.print("\n--- [bold green]Breakdown by Directory[/bold green] ---")
+                console.print(_breakdown_tree(tree, project_path.name, mode, cost_per_month, drivers, calibration))
+
+        if recorder is not None:
+            if timings:
+                _print_timings(recorder)
+            report_timings(recorder, False, profile, profile_format)
 
     except ClocNotFoundError:
         console.print("[bold red]Error: The 'cloc' command was not found.[/bold red]")
-        console.print("Please install 'cloc' and ensure it is in your PATH.")
+        console.print("Please install 'cloc' and ensure it is in your PATH, or use '--backend native'.")
         raise typer.Exit(code=1)
     except AnalysisError as e:
         console.print(f"[bold red]Error during analysis: {e}[/bold red]")
@@ -119,30 +259,603 @@ def estimate_project(
         raise typer.Exit(code=1)
 
 
+def _print_timings(timings: Timings) -> None:
+    """Displays the phases, file rates and slowest files and directories of a run."""
+    data = timings.to_dict()
+    files = data["files"]
+    console.print(f"\n--- [bold green]Timings ({data['wall_seconds']:.3f}s)[/bold green] ---")
+    table = Table()
+    table.add_column("Phase", style="cyan")
+    table.add_column("Seconds", style="magenta", justify="right")
+    table.add_column("Share", style="magenta", justify="right")
+    for name, seconds in sorted(data["phases"].items(), key=lambda item: -item[1]):
+        table.add_row(name, f"{seconds:.3f}", f"{seconds / data['wall_seconds']:.1%}")
+    console.print(table)
+    console.print(
+        f"Files: {files['read']:,} read, {files['cached']:,} from the cache; "
+        f"[bold]{files['files_per_second']:,.0f} files/s, {files['bytes_per_second'] / 1e6:,.2f} MB/s[/bold] "
+        f"(reading {files['read_seconds']:.3f}s, counting {files['count_seconds']:.3f}s over all processes)"
+    )
+    for title, key in (("Slowest Files", "slowest_files"), ("Slowest Directories", "slowest_directories")):
+        if data[key]:
+            table = Table(title=title)
+            table.add_column("Path", style="cyan")
+            table.add_column("Seconds", style="magenta", justify="right")
+            table.add_column("Bytes", style="magenta", justify="right")
+            for entry in data[key]:
+                table.add_row(entry["path"], f"{entry['seconds']:.4f}", f"{entry['bytes']:,}")
+            console.print(table)
+
+
+def _breakdown_tree(
+    tree: LocTree, label: str, mode: ProjectMode, cost_per_month: float, drivers: dict, calibration=None
+) -> Tree:
+    """Renders a LocTree, estimating every subtree as a project of its own."""
+    result = calculate(tree.kloc, mode, cost_per_month, drivers, calibration=calibration)
+    languages = ", ".join(
+        f"{language} {stats.code / tree.report.total.code:.0%}"
+        for language, stats in list(tree.report.languages.items())[:3]
+    ) if tree.report.total.code else "no code"
+    more = " [dim](+ deeper directories)[/dim]" if tree.truncated else ""
+    node = Tree(
+        f"[bold]{label}[/bold]  [cyan]{tree.kloc:.2f} KLOC[/cyan]  "
+        f"[magenta]{result.effort_person_months:.1f} person-months[/magenta]  [dim]{languages}[/dim]{more}"
+    )
+    for child in tree.children.values():
+        node.add(_breakdown_tree(child, child.name, mode, cost_per_month, drivers, calibration))
+    return node
+
+
+@app.command(name="scan", help="Estimate many repositories concurrently.")
+def scan_projects(
+    paths: Optional[List[Path]] = typer.Argument(
+        None,
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+        help="Repository folders to analyze."
+    ),
+    manifest: Optional[Path] = typer.Option(
+        None,
+        "--manifest",
+        exists=True,
+        dir_okay=False,
+        help="A file listing one repository path per line."
+    ),
+    root: Optional[Path] = typer.Option(
+        None,
+        "--root",
+        exists=True,
+        file_okay=False,
+        help="A workspace folder whose subfolders matching '--glob' are analyzed."
+    ),
+    glob: str = typer.Option(
+        "*",
+        "--glob",
+        help="Glob pattern, relative to '--root', selecting the repositories."
+    ),
+    mode: ProjectMode = typer.Option(
+        ProjectMode.SEMI_DETACHED,
+        "--mode", "-m",
+        case_sensitive=False,
+        help="The COCOMO project mode."
+    ),
+    cost_per_month: float = typer.Option(
+        8000.0,
+        "--cost-per-month", "-c",
+        help="Average cost of a developer per month (e.g., 8000.0)."
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers", "-w",
+        min=1,
+        help="Number of repositories analyzed in parallel. Defaults to the number of CPUs."
+    ),
+    dedup: DedupMode = typer.Option(
+        DedupMode.OFF,
+        "--dedup",
+        case_sensitive=False,
+        help="Counts the duplicated files of each repository once: 'exact' or 'near' copies."
+    ),
+    backend: Backend = typer.Option(
+        Backend.NATIVE,
+        "--backend", "-b",
+        case_sensitive=False,
+        help="The line counting engine: the built-in counter or the external 'cloc'."
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Counts every file again, without reading or updating the line count cache."
+    ),
+    driver: List[str] = typer.Option(
+        [],
+        "--driver", "-d",
+        help="A cost driver rating applied to every repository, e.g. 'rely=high'. Repeatable."
+    ),
+    exclude: List[str] = typer.Option(
+        [],
+        "--exclude", "-x",
+        help="A glob of files or directories to ignore in every repository, in .gitignore syntax. Repeatable."
+    ),
+    calibration: Optional[Path] = typer.Option(
+        None,
+        "--calibration",
+        exists=True,
+        dir_okay=False,
+        help="A calibration profile written by 'cocomo calibrate', used in place of the built-in coefficients."
+    ),
+    format: OutputFormat = typer.Option(
+        OutputFormat.TABLE,
+        "--format", "-f",
+        case_sensitive=False,
+        help="The output format. Anything but 'table' is machine-readable and streamed."
+    ),
+    output: Optional[str] = typer.Option(
+        None,
+        "--output", "-o",
+        help="The output file for machine-readable formats. Defaults to the standard output."
+    ),
+):
+    """
+    Analyzes every repository, printing each estimate as soon as it is ready, then the totals.
+    """
+    repositories = collect_repositories(paths or [], manifest, root, glob)
+    if format != OutputFormat.TABLE:
+        raise typer.Exit(code=guarded(lambda: run_scan(
+            repositories, mode, cost_per_month, parse_drivers(driver), workers, backend, no_cache, format, output,
+            exclude, dedup, open_calibration(calibration)
+        )))
+    if not repositories:
+        console.print("[bold red]Error: No repositories to scan. Pass paths, '--manifest' or '--root'.[/bold red]")
+        raise typer.Exit(code=1)
+
+    try:
+        drivers = parse_drivers(driver)
+        calibration = open_calibration(calibration)
+    except ValueError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        raise typer.Exit(code=1)
+
+    start = time.perf_counter()
+    results = []
+    cache_path = None if no_cache else default_cache_path()
+    for scan in scan_repositories(
+        repositories, mode, cost_per_month, drivers, workers, backend, cache_path, exclude, dedup, calibration
+    ):
+        results.append(scan)
+        if scan.result is None:
+            console.print(f"[red]✗[/red] {scan.path} [red]{scan.error}[/red] ({scan.elapsed_seconds:.2f}s)")
+        else:
+            console.print(
+                f"[green]✓[/green] {scan.path}: [cyan]{scan.result.kloc:.2f} KLOC[/cyan], "
+                f"{scan.result.effort_person_months:.2f} person-months, "
+                f"[magenta]$ {scan.result.total_cost:,.2f}[/magenta] ({scan.elapsed_seconds:.2f}s)"
+            )
+
+    summary = summarize(results, elapsed_seconds=time.perf_counter() - start)
+    console.print("\n--- [bold green]Scan Totals[/bold green] ---")
+    table = Table(show_header=False)
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="magenta")
+    table.add_row("Repositories", f"{summary.repositories - summary.failed} analyzed, {summary.failed} failed")
+    table.add_row("Lines of Code (KLOC)", f"{summary.kloc:.2f}")
+    table.add_row("Estimated Effort", f"{summary.effort_person_months:.2f} person-months")
+    table.add_row("[bold]Total Estimated Cost[/bold]", f"[bold]$ {summary.total_cost:,.2f}[/bold]")
+    table.add_row("Elapsed Time", f"{summary.elapsed_seconds:.2f}s")
+    console.print(table)
+    if summary.failed:
+        raise typer.Exit(code=1)
+
+
+@app.command(name="watch", help="Keep a live estimate of a project while its files change.")
+def watch_project(
+    project_path: Path = typer.Argument(
+        ...,
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        readable=True,
+        resolve_path=True,
+        help="The path to the project folder to be watched."
+    ),
+    mode: ProjectMode = typer.Option(
+        ProjectMode.SEMI_DETACHED,
+        "--mode", "-m",
+        case_sensitive=False,
+        help="The COCOMO project mode."
+    ),
+    cost_per_month: float = typer.Option(
+        8000.0,
+        "--cost-per-month", "-c",
+        help="Average cost of a developer per month (e.g., 8000.0)."
+    ),
+    driver: List[str] = typer.Option(
+        [],
+        "--driver", "-d",
+        help="A cost driver rating, e.g. 'rely=high'. Repeatable."
+    ),
+    debounce: float = typer.Option(
+        0.25,
+        "--debounce",
+        min=0.0,
+        help="Seconds without new changes before the estimate is updated."
+    ),
+    polling: bool = typer.Option(
+        False,
+        "--polling",
+        help="Polls the tree for changes instead of using inotify."
+    ),
+    exclude: List[str] = typer.Option(
+        [],
+        "--exclude", "-x",
+        help="A glob of files or directories to ignore, in .gitignore syntax. Repeatable."
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Counts every file of the initial scan, without reading or updating the line count cache."
+    ),
+    calibration: Optional[Path] = typer.Option(
+        None,
+        "--calibration",
+        exists=True,
+        dir_okay=False,
+        help="A calibration profile written by 'cocomo calibrate', used in place of the built-in coefficients."
+    ),
+    format: OutputFormat = typer.Option(
+        OutputFormat.TABLE,
+        "--format", "-f",
+        case_sensitive=False,
+        help="The output format. Anything but 'table' is machine-readable, one record per update."
+    ),
+    output: Optional[str] = typer.Option(
+        None,
+        "--output", "-o",
+        help="The output file for machine-readable formats. Defaults to the standard output."
+    ),
+):
+    """
+    Counts the project once, then recounts only the files that change and prints every new estimate.
+    """
+    if format != OutputFormat.TABLE:
+        raise typer.Exit(code=guarded(lambda: run_watch(
+            project_path, mode, cost_per_month, parse_drivers(driver), no_cache, debounce, polling, format, output,
+            exclude, open_calibration(calibration)
+        )))
+    from .watch import watch
+
+    try:
+        drivers = parse_drivers(driver)
+        calibration = open_calibration(calibration)
+        console.print(f"Watching [bold]{project_path}[/bold] (Ctrl+C to stop)")
+        previous = None
+        with LocCache() if not no_cache else nullcontext() as cache:
+            for update in watch(project_path, mode, cost_per_month, drivers, debounce, polling, cache=cache,
+                                exclude=exclude, calibration=calibration):
+                result = update.result
+                delta = "" if previous is None else f" ({result.kloc - previous:+.3f})"
+                previous = result.kloc
+                console.print(
+                    f"[dim]{time.strftime('%H:%M:%S')}[/dim] [bold cyan]{result.kloc:.3f} KLOC[/bold cyan]{delta}  "
+                    f"[magenta]{result.effort_person_months:.2f} person-months[/magenta]  "
+                    f"[bold]$ {result.total_cost:,.2f}[/bold]  "
+                    f"[dim]{update.changed_files} files in {update.elapsed_seconds:.2f}s[/dim]"
+                )
+    except KeyboardInterrupt:
+        pass
+    except (AnalysisError, ValueError) as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        raise typer.Exit(code=1)
+
+
+@app.command(name="serve", help="Run the estimation service (HTTP/JSON API).")
+def serve_api(
+    host: str = typer.Option(
+        "127.0.0.1",
+        "--host",
+        help="The interface to listen on. The service reads any directory it is asked to: keep it local, or use '--root'."
+    ),
+    port: int = typer.Option(8000, "--port", "-p", help="The TCP port."),
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers", "-w",
+        help="Number of analysis processes. Defaults to the number of CPUs."
+    ),
+    cache_size: int = typer.Option(
+        1024,
+        "--cache-size",
+        min=1,
+        help="Maximum number of estimates kept in memory."
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Counts every file again, without reading or updating the line count cache."
+    ),
+    root: List[Path] = typer.Option(
+        [],
+        "--root",
+        exists=True,
+        file_okay=False,
+        help="Only serve repositories inside this directory. Repeatable."
+    ),
+):
+    """
+    Serves 'calculate' and repository estimates over HTTP, caching the results.
+    """
+    from .server import serve
+
+    console.print(f"Serving on [bold cyan]http://{host}:{port}[/bold cyan] (Ctrl+C to stop)")
+    serve(host, port, workers, cache_size, None if no_cache else default_cache_path(), root)
+
+
+@app.command(name="simulate", help="Run a Monte Carlo simulation of the COCOMO estimate.")
+def simulate_project(
+    kloc: str = typer.Option(
+        ...,
+        "--kloc", "-k",
+        help="Kilo Lines of Code, as a single value or a three-point estimate 'low,likely,high'."
+    ),
+    mode: SimulationMode = typer.Option(
+        SimulationMode.SEMI_DETACHED,
+        "--mode", "-m",
+        case_sensitive=False,
+        help="The COCOMO project mode (Basic and Intermediate COCOMO only)."
+    ),
+    cost_per_month: str = typer.Option(
+        "8000",
+        "--cost-per-month", "-c",
+        help="Average cost of a developer per month, as a single value or 'low,likely,high'."
+    ),
+    driver: List[str] = typer.Option(
+        [],
+        "--driver", "-d",
+        help="A cost driver rating, or ratings with probabilities (e.g. 'cplx=high' or 'rely=nom:0.6,high:0.4'). Repeatable."
+    ),
+    samples: int = typer.Option(
+        1_000_000,
+        "--samples", "-n",
+        min=1,
+        help="Number of Monte Carlo samples."
+    ),
+    seed: Optional[int] = typer.Option(
+        None,
+        "--seed",
+        help="Random seed, for reproducible results."
+    ),
+):
+    """
+    Treats KLOC, the monthly cost and the cost drivers as distributions and reports P10/P50/P90.
+    """
+    try:
+        drivers = dict(_parse_driver(text) for text in driver)
+        with console.status(f"[bold green]Simulating {samples:,} estimates...[/bold green]"):
+            result = simulate(
+                _parse_estimate(kloc, "--kloc"),
+                ProjectMode(mode),
+                _parse_estimate(cost_per_month, "--cost-per-month"),
+                drivers=drivers,
+                samples=samples,
+                seed=seed
+            )
+    except ValueError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        raise typer.Exit(code=1)
+
+    console.print(f"\n--- [bold green]COCOMO Monte Carlo Simulation ({result.samples:,} samples)[/bold green] ---")
+    table = Table()
+    table.add_column("Metric", style="cyan")
+    for column in ("Mean", "P10", "P50", "P90"):
+        table.add_column(column, style="magenta", justify="right")
+
+    rows = [
+        ("Effort (person-months)", result.effort_person_months, "{:,.2f}"),
+        ("Development Time (months)", result.development_time_months, "{:,.2f}"),
+        ("Total Cost", result.total_cost, "$ {:,.2f}"),
+    ]
+    for label, summary, fmt in rows:
+        table.add_row(label, *(fmt.format(value) for value in (summary.mean, summary.p10, summary.p50, summary.p90)))
+    console.print(table)
+
+
+def _parse_estimate(text: str, option: str) -> Distribution:
+    """Parses '10' as a fixed value and '8,10,15' as a triangular distribution."""
+    try:
+        values = [float(value) for value in text.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid value for {option}: '{text}'.")
+    if len(values) == 1:
+        return Fixed(values[0])
+    if len(values) == 3:
+        return Triangular(*values)
+    raise ValueError(f"Invalid value for {option}: expected a value or 'low,likely,high', got '{text}'.")
+
+
+def _parse_driver(text: str) -> Tuple[str, Union[str, Discrete]]:
+    """Parses 'cplx=high' as a fixed rating and 'rely=nom:0.6,high:0.4' as a distribution of ratings."""
+    code, _, spec = text.partition("=")
+    if not spec:
+        raise ValueError(f"Invalid driver '{text}': expected 'code=rating' or 'code=rating:probability,...'.")
+    if ":" not in spec:
+        return code.strip(), spec.strip()
+    weights = {}
+    for item in spec.split(","):
+        rating, _, probability = item.partition(":")
+        try:
+            weights[rating.strip()] = float(probability)
+        except ValueError:
+            raise ValueError(f"Invalid probability in driver '{text}'.")
+    return code.strip(), Discrete(weights)
+
+
+@app.command(name="sensitivity", help="Rank the cost drivers by how much they move the estimate.")
+def sensitivity_analysis(
+    kloc: float = typer.Option(
+        ...,
+        "--kloc", "-k",
+        min=0.0,
+        help="Kilo Lines of Code of the project."
+    ),
+    mode: ProjectMode = typer.Option(
+        ProjectMode.SEMI_DETACHED,
+        "--mode", "-m",
+        case_sensitive=False,
+        help="The COCOMO project mode."
+    ),
+    cost_per_month: float = typer.Option(
+        8000.0,
+        "--cost-per-month", "-c",
+        help="Average cost of a developer per month (e.g., 8000.0)."
+    ),
+    driver: List[str] = typer.Option(
+        [],
+        "--driver", "-d",
+        help="A baseline cost driver rating, e.g. 'rely=high'. Repeatable."
+    ),
+    sweep_drivers: List[str] = typer.Option(
+        [],
+        "--sweep", "-s",
+        help="Also estimates every combination of ratings of these drivers (e.g. 'rely,cplx,acap'). Repeatable."
+    ),
+    calibration: Optional[Path] = typer.Option(
+        None,
+        "--calibration",
+        exists=True,
+        dir_okay=False,
+        help="A calibration profile written by 'cocomo calibrate', used in place of the built-in coefficients."
+    ),
+):
+    """
+    Prints the tornado table of the drivers, the elasticities and, with '--sweep', a summary of the grid.
+    """
+    from .sensitivity import sensitivity, sweep
+
+    try:
+        drivers = parse_drivers(driver)
+        calibration = open_calibration(calibration)
+        result = sensitivity(kloc, mode, cost_per_month, drivers, calibration=calibration)
+        codes = [code.strip() for text in sweep_drivers for code in text.split(",") if code.strip()]
+        start = time.perf_counter()
+        grid = sweep(kloc, mode, cost_per_month, codes, drivers, calibration) if codes else None
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        raise typer.Exit(code=1)
+
+    baseline = result.baseline.effort_person_months
+    console.print(f"\n--- [bold green]Cost Driver Sensitivity (baseline {baseline:,.2f} person-months)[/bold green] ---")
+    table = Table()
+    table.add_column("Driver", style="cyan")
+    for column in ("Low", "High", "Swing", "Variance Share"):
+        table.add_column(column, style="magenta", justify="right")
+    table.add_column("")
+    widest = max((row.swing for row in result.drivers), default=0.0) or 1.0
+    for row in result.drivers:
+        table.add_row(
+            f"{row.name} ({row.code.upper()})",
+            f"{row.effort_low:,.2f} ({row.low_rating})",
+            f"{row.effort_high:,.2f} ({row.high_rating})",
+            f"{row.swing:,.2f}",
+            f"{row.variance_share:.1%}",
+            "█" * round(20 * row.swing / widest)
+        )
+    console.print(table)
+
+    console.print("\n--- [bold green]Elasticities[/bold green] (% change of the output per 1% change of the input) ---")
+    table = Table()
+    table.add_column("Input", style="cyan")
+    for column in ("Effort", "Schedule", "People", "Cost"):
+        table.add_column(column, style="magenta", justify="right")
+    labels = {"kloc": "Lines of Code (KLOC)", "eaf": "Effort Adjustment Factor (EAF)", "cost_per_month": "Cost per Month"}
+    for name, row in result.elasticities.items():
+        table.add_row(labels[name], *(f"{row[key]:.3f}" for key in ("effort", "schedule", "people", "cost")))
+    console.print(table)
+
+    if grid is not None:
+        efforts = grid.effort_person_months
+        if hasattr(efforts, "argmin"):  # A NumPy array
+            import numpy
+
+            low, high, median = int(efforts.argmin()), int(efforts.argmax()), float(numpy.median(efforts))
+        else:
+            low = min(range(len(efforts)), key=efforts.__getitem__)
+            high = max(range(len(efforts)), key=efforts.__getitem__)
+            median = statistics.median(efforts)
+        console.print(f"\n--- [bold green]Driver Sweep ({len(grid):,} combinations in {elapsed:.2f}s)[/bold green] ---")
+        table = Table(show_header=False)
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", style="magenta")
+        for label, index in (("Lowest Effort", low), ("Highest Effort", high)):
+            ratings = ", ".join(f"{code}={rating}" for code, rating in grid.ratings_at(index).items())
+            table.add_row(label, f"{efforts[index]:,.2f} person-months ({ratings})")
+        table.add_row("Median Effort", f"{median:,.2f} person-months")
+        console.print(table)
+
+
+@app.command(name="calibrate", help="Fit the COCOMO coefficients on past projects.")
+def calibrate_model(
+    history: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        help="A CSV file of past projects: 'kloc', 'mode', 'effort_person_months', optionally "
+             "'development_time_months' and a column per rated cost driver."
+    ),
+    method: CalibrationMethod = typer.Option(
+        CalibrationMethod.OLS,
+        "--method",
+        case_sensitive=False,
+        help="'ols' for least squares on the logarithms, 'huber' for a fit robust to outlier projects."
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output", "-o",
+        dir_okay=False,
+        help="Saves the calibration profile, to be used with '--calibration'."
+    ),
+):
+    """
+    Fits 'a', 'b', 'c' and 'd' for every mode found in the history and reports the fit error.
+    """
+    from .calibration import calibrate, read_history, save_calibration
+
+    try:
+        calibration = calibrate(read_history(history), method)
+        if output is not None:
+            save_calibration(calibration, output)
+    except (ValueError, OSError) as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        raise typer.Exit(code=1)
+
+    console.print(f"\n--- [bold green]COCOMO Calibration ({calibration.method})[/bold green] ---")
+    table = Table()
+    for column in ("Mode", "Projects", "a", "b", "c", "d", "Effort MMRE", "Effort PRED(25)", "Schedule MMRE"):
+        table.add_column(column, style="cyan" if column == "Mode" else "magenta", justify="left" if column == "Mode" else "right")
+    for mode, fit in calibration.modes.items():
+        table.add_row(
+            COCOMO_MODES[mode]['name'], str(fit.n_projects), f"{fit.a:.3f}", f"{fit.b:.3f}", f"{fit.c:.3f}", f"{fit.d:.3f}",
+            f"{fit.effort_mmre:.1%}", f"{fit.effort_pred25:.0%}",
+            "-" if fit.schedule_mmre is None else f"{fit.schedule_mmre:.1%}"
+        )
+    console.print(table)
+    if output is not None:
+        console.print(f"Calibration profile saved to [bold]{output}[/bold]. Use it with '--calibration {output}'.")
+
+
 @app.command(name="explain", help="Explains the concepts of the COCOMO model.")
 def explain_cocomo(
     topic: str = typer.Argument(
         None,
         case_sensitive=False,
-        help="The topic to be explained ('modes' or 'drivers'). If omitted, explains both."
+        help="The topic to be explained ('modes', 'drivers' or 'cocomo2'). If omitted, explains all of them."
     )
 ):
     """
     Displays detailed descriptions of COCOMO project modes and cost drivers.
     """
-    if not topic or topic == "modes":
-        console.print("\n--- [bold green]COCOMO Project Modes[/bold green] ---")
-        for mode, details in COCOMO_MODES.items():
-            console.print(f"\n[bold cyan]{details['name']} ({mode})[/bold cyan]")
-            console.print(f"{details['description']}")
-
-    if not topic or topic == "drivers":
-        console.print("\n--- [bold green]COCOMO Cost Drivers[/bold green] ---")
-        for code, details in COST_DRIVERS.items():
-            ratings_str = ", ".join(details['ratings'].keys())
-            console.print(f"\n[bold cyan]{details['name']} ({code.upper()})[/bold cyan]")
-            console.print(f"{details['description']}")
-            console.print(f"[italic]Ratings: {ratings_str}[/italic]")
+    console.print(render(topic, markup=True))
 
 if __name__ == "__main__":
     app()
@@ -20,6 +20,13 @@ COCOMO_MODES = {
         "a": 3.6, "b": 1.20, "c": 2.5, "d": 0.32,
         "name": "Embedded",
         "description": "Projects developed under tight hardware, software, and operational constraints. They are often complex, innovative, and have strict reliability and performance requirements."
+    },
+    # COCOMO II.2000 Post-Architecture. Here 'b' and 'd' are only the base exponents:
+    # the scale factors add to them (see COCOMO2_SCALE_FACTORS).
+    "cocomo2": {
+        "a": 2.94, "b": 0.91, "c": 3.67, "d": 0.28,
+        "name": "COCOMO II (Post-Architecture)",
+        "description": "The COCOMO II.2000 Post-Architecture model, for projects whose architecture is known. The diseconomy of scale comes from five scale factors instead of a fixed mode, and 17 effort multipliers adjust the effort. A compressed schedule (SCED) raises the effort and shortens the development time."
     }
 }
 
@@ -102,3 +109,126 @@ COST_DRIVERS = {
         'ratings': {'vlow': 1.23, 'low': 1.08, 'nom': 1.00, 'high': 1.04, 'vhigh': 1.10}
     }
 }
+
+
+# The 5 scale factors of COCOMO II.2000. The exponent of the effort equation is
+# E = b + 0.01 * (sum of the scale factors). Unrated scale factors are nominal.
+COCOMO2_SCALE_FACTORS = {
+    'prec': {
+        'name': "Precedentedness",
+        'description': "Measures how familiar the organization is with this type of product. A thoroughly familiar product rates extra high, one without precedent rates very low.",
+        'ratings': {'vlow': 6.20, 'low': 4.96, 'nom': 3.72, 'high': 2.48, 'vhigh': 1.24, 'xhigh': 0.00}
+    },
+    'flex': {
+        'name': "Development Flexibility",
+        'description': "Measures how much the product must conform to preestablished requirements and external interfaces. Rigorous conformance rates very low, general goals rate extra high.",
+        'ratings': {'vlow': 5.07, 'low': 4.05, 'nom': 3.04, 'high': 2.03, 'vhigh': 1.01, 'xhigh': 0.00}
+    },
+    'resl': {
+        'name': "Architecture / Risk Resolution",
+        'description': "Measures how well the architecture is defined and the risks are eliminated before development. Little resolution rates very low, full resolution rates extra high.",
+        'ratings': {'vlow': 7.07, 'low': 5.65, 'nom': 4.24, 'high': 2.83, 'vhigh': 1.41, 'xhigh': 0.00}
+    },
+    'team': {
+        'name': "Team Cohesion",
+        'description': "Measures how well the stakeholders work together. Very difficult interactions rate very low, seamless interactions rate extra high.",
+        'ratings': {'vlow': 5.48, 'low': 4.38, 'nom': 3.29, 'high': 2.19, 'vhigh': 1.10, 'xhigh': 0.00}
+    },
+    'pmat': {
+        'name': "Process Maturity",
+        'description': "Measures the maturity of the software process, following the SEI CMM levels: level 1 (lower half) rates very low, level 5 rates extra high.",
+        'ratings': {'vlow': 7.80, 'low': 6.24, 'nom': 4.68, 'high': 3.12, 'vhigh': 1.56, 'xhigh': 0.00}
+    }
+}
+
+# The 17 effort multipliers of the COCOMO II.2000 Post-Architecture model.
+# SCED also stretches or compresses the development time: 'schedule' holds the
+# percentage of the nominal schedule of each rating.
+COCOMO2_EFFORT_MULTIPLIERS = {
+    'rely': {
+        'name': "Required Software Reliability",
+        'description': "Measures the extent to which the software must perform its intended function. A failure can range from a slight inconvenience to a risk to human life.",
+        'ratings': {'vlow': 0.82, 'low': 0.92, 'nom': 1.00, 'high': 1.10, 'vhigh': 1.26}
+    },
+    'data': {
+        'name': "Database Size",
+        'description': "Measures the size of the test data relative to the program size.",
+        'ratings': {'low': 0.90, 'nom': 1.00, 'high': 1.14, 'vhigh': 1.28}
+    },
+    'cplx': {
+        'name': "Product Complexity",
+        'description': "Assesses the complexity of the control, computational, device-dependent, data management and user interface operations.",
+        'ratings': {'vlow': 0.73, 'low': 0.87, 'nom': 1.00, 'high': 1.17, 'vhigh': 1.34, 'xhigh': 1.74}
+    },
+    'ruse': {
+        'name': "Developed for Reusability",
+        'description': "Accounts for the extra effort needed to build components intended for reuse in the current or future projects.",
+        'ratings': {'low': 0.95, 'nom': 1.00, 'high': 1.07, 'vhigh': 1.15, 'xhigh': 1.24}
+    },
+    'docu': {
+        'name': "Documentation Match to Life-Cycle Needs",
+        'description': "Measures how well the project documentation suits its life-cycle needs.",
+        'ratings': {'vlow': 0.81, 'low': 0.91, 'nom': 1.00, 'high': 1.11, 'vhigh': 1.23}
+    },
+    'time': {
+        'name': "Execution Time Constraint",
+        'description': "Measures the share of the available execution time the software is expected to use.",
+        'ratings': {'nom': 1.00, 'high': 1.11, 'vhigh': 1.29, 'xhigh': 1.63}
+    },
+    'stor': {
+        'name': "Main Storage Constraint",
+        'description': "Measures the share of the available storage the software is expected to use.",
+        'ratings': {'nom': 1.00, 'high': 1.05, 'vhigh': 1.17, 'xhigh': 1.46}
+    },
+    'pvol': {
+        'name': "Platform Volatility",
+        'description': "Measures how often the platform (hardware, operating system, compilers...) the software relies on changes.",
+        'ratings': {'low': 0.87, 'nom': 1.00, 'high': 1.15, 'vhigh': 1.30}
+    },
+    'acap': {
+        'name': "Analyst Capability",
+        'description': "Assesses the ability of the analysts to design, communicate and cooperate.",
+        'ratings': {'vlow': 1.42, 'low': 1.19, 'nom': 1.00, 'high': 0.85, 'vhigh': 0.71}
+    },
+    'pcap': {
+        'name': "Programmer Capability",
+        'description': "Assesses the capability of the programmers as a team.",
+        'ratings': {'vlow': 1.34, 'low': 1.15, 'nom': 1.00, 'high': 0.88, 'vhigh': 0.76}
+    },
+    'pcon': {
+        'name': "Personnel Continuity",
+        'description': "Measures the annual personnel turnover of the project.",
+        'ratings': {'vlow': 1.29, 'low': 1.12, 'nom': 1.00, 'high': 0.90, 'vhigh': 0.81}
+    },
+    'apex': {
+        'name': "Applications Experience",
+        'description': "Assesses the team's experience with this type of application.",
+        'ratings': {'vlow': 1.22, 'low': 1.10, 'nom': 1.00, 'high': 0.88, 'vhigh': 0.81}
+    },
+    'plex': {
+        'name': "Platform Experience",
+        'description': "Assesses the team's experience with the platform: user interfaces, databases, networking, middleware.",
+        'ratings': {'vlow': 1.19, 'low': 1.09, 'nom': 1.00, 'high': 0.91, 'vhigh': 0.85}
+    },
+    'ltex': {
+        'name': "Language and Tool Experience",
+        'description': "Assesses the team's experience with the programming language and the development tools.",
+        'ratings': {'vlow': 1.20, 'low': 1.09, 'nom': 1.00, 'high': 0.91, 'vhigh': 0.84}
+    },
+    'tool': {
+        'name': "Use of Software Tools",
+        'description': "Measures the capability, maturity and integration of the software tools used.",
+        'ratings': {'vlow': 1.17, 'low': 1.09, 'nom': 1.00, 'high': 0.90, 'vhigh': 0.78}
+    },
+    'site': {
+        'name': "Multisite Development",
+        'description': "Assesses how far apart the team is spread and how well it communicates, from international sites with mail to a single room with interactive multimedia.",
+        'ratings': {'vlow': 1.22, 'low': 1.09, 'nom': 1.00, 'high': 0.93, 'vhigh': 0.86, 'xhigh': 0.80}
+    },
+    'sced': {
+        'name': "Required Development Schedule",
+        'description': "Measures the schedule constraint, as a percentage of the nominal schedule. Compressing it raises the effort; stretching it does not lower it.",
+        'ratings': {'vlow': 1.43, 'low': 1.14, 'nom': 1.00, 'high': 1.00, 'vhigh': 1.00},
+        'schedule': {'vlow': 75, 'low': 85, 'nom': 100, 'high': 130, 'vhigh': 160}
+    }
+}
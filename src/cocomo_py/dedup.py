@@ -0,0 +1,224 @@
+"""
+Detection of duplicated source files, so copies do not inflate the KLOC.
+
+Exact duplicates are found by size first and content hash second: the index
+maps each file size to the hashes seen with it, so a file whose size is
+unique is never compared by hash, and a size bucket only grows into a set
+when two different files share it. The hash itself is computed by the
+counting workers while the file contents are in memory (or read from the
+line count cache), so detection costs no extra read.
+
+Near duplicates (a copied file with a few local edits) are found with
+content-defined chunking over lines: a chunk ends at a line whose CRC
+matches a mask, so an edit only changes the chunks around it. Only the
+chunk hashes that fall in a fixed sample (hash % CHUNK_SAMPLE == 0) are
+kept, which bounds both the per-file fingerprint and the index; a file is
+a near duplicate when most of its sampled chunks were already seen.
+
+The copy with the lowest path is counted and the others are reported in
+'LocReport.duplicates'. Worker processes return their batches in completion
+order and cached files come before the counted ones, so 'Deduplicator.filter'
+collects the files of a whole walk and checks them in path order: which copy
+survives does not depend on scheduling or on the cache.
+"""
+import hashlib
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from .models import DedupMode, FileCount, LanguageStats
+
+# A chunk ends at a non-blank line whose CRC has these bits clear (one line in 4)...
+CHUNK_MASK = 0x3
+# ...once it holds at least this many non-blank lines, so boilerplate like a lone '}' is not a chunk.
+MIN_CHUNK_LINES = 3
+# One chunk hash in CHUNK_SAMPLE is kept in the fingerprints.
+CHUNK_SAMPLE = 4
+# Share of sampled chunks already seen that makes a file a near duplicate...
+NEAR_THRESHOLD = 0.8
+# ...provided it has at least this many sampled chunks (shorter files are only compared exactly).
+MIN_SAMPLED_CHUNKS = 3
+# Maximum number of chunk hashes remembered (8 bytes each, plus the set overhead).
+DEFAULT_MAX_CHUNKS = 4_000_000
+
+
+class Fingerprint(NamedTuple):
+    """What the dedup stage knows about a file: its size, a content hash and its sampled chunk hashes."""
+    size: int
+    digest: int
+    chunks: Tuple[int, ...] = ()
+
+
+def fingerprint(data: bytes, digest: Optional[bytes] = None, near: bool = False) -> Fingerprint:
+    """
+    Fingerprints the contents of a file.
+
+    Args:
+        data: The raw file contents.
+        digest: Its blake2b digest, if already computed (e.g. for the line count cache).
+        near: Also compute the sampled chunk hashes, for near-duplicate detection.
+    """
+    if digest is None:
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+    return Fingerprint(len(data), int.from_bytes(digest[:8], "little"), sampled_chunks(data) if near else ())
+
+
+def sampled_chunks(data: bytes) -> Tuple[int, ...]:
+    """
+    Splits the non-blank lines of a file into content-defined chunks and returns
+    the distinct chunk hashes of the sample. Leading and trailing whitespace is
+    ignored, so re-indented copies still match.
+    """
+    sampler = ChunkSampler()
+    for line in data.splitlines():
+        sampler.add(line)
+    return sampler.chunks()
+
+
+class ChunkSampler:
+    """'sampled_chunks' fed one line at a time, for files read in blocks."""
+    __slots__ = ("_sampled", "_lines")
+
+    def __init__(self):
+        self._sampled: Set[int] = set()
+        self._lines: List[bytes] = []
+
+    def add(self, line: bytes) -> None:
+        """Adds the next line of the file (with or without its line ending)."""
+        line = line.strip()
+        if not line:
+            return
+        self._lines.append(line)
+        if len(self._lines) >= MIN_CHUNK_LINES and zlib.crc32(line) & CHUNK_MASK == 0:
+            _sample(self._sampled, self._lines)
+            self._lines = []
+
+    def feed(self, lines: Iterable[bytes]) -> Iterator[bytes]:
+        """Adds lines as they are iterated, passing them through."""
+        for line in lines:
+            self.add(line)
+            yield line
+
+    def chunks(self) -> Tuple[int, ...]:
+        """The sampled chunk hashes of the lines added so far, the last chunk ending with them."""
+        if self._lines:
+            _sample(self._sampled, self._lines)
+            self._lines = []
+        return tuple(sorted(self._sampled))
+
+
+def pack_chunks(chunks: Tuple[int, ...]) -> bytes:
+    """Serializes sampled chunk hashes (e.g. for the line count cache)."""
+    return array("Q", chunks).tobytes()
+
+
+def unpack_chunks(data: bytes) -> Tuple[int, ...]:
+    """Reads chunk hashes serialized by 'pack_chunks'."""
+    chunks = array("Q")
+    chunks.frombytes(data)
+    return tuple(chunks)
+
+
+def _path(item: Tuple[FileCount, Fingerprint]) -> str:
+    return item[0].path
+
+
+def _sample(sampled: Set[int], lines: List[bytes]) -> None:
+    value = int.from_bytes(hashlib.blake2b(b"\n".join(lines), digest_size=8).digest(), "little")
+    if value % CHUNK_SAMPLE == 0:
+        sampled.add(value)
+
+
+class Deduplicator:
+    """
+    Filters per-file counts, keeping the copy of every file with the lowest path.
+
+    Memory grows by one hash per distinct file (a single integer for a file
+    whose size is unique) and, for near duplicates, by the sampled chunks,
+    up to 'max_chunks'. Past that bound new chunks are no longer remembered:
+    later files are still compared against the known ones. 'filter' also holds
+    the counts and fingerprints of a walk until it is over.
+    """
+
+    def __init__(
+        self,
+        mode: DedupMode = DedupMode.EXACT,
+        threshold: float = NEAR_THRESHOLD,
+        max_chunks: int = DEFAULT_MAX_CHUNKS
+    ):
+        """
+        Args:
+            mode: 'exact' for identical files only, 'near' for near duplicates too.
+            threshold: Share of a file's sampled chunks already seen that makes it a near duplicate.
+            max_chunks: Maximum number of chunk hashes remembered.
+
+        Raises:
+            ValueError: If the mode is 'off' or the threshold is not in (0, 1].
+        """
+        if mode == DedupMode.OFF:
+            raise ValueError("A Deduplicator needs the 'exact' or 'near' mode.")
+        if not 0 < threshold <= 1:
+            raise ValueError("The near-duplicate threshold must be in (0, 1].")
+        self.near = mode == DedupMode.NEAR
+        self.threshold = threshold
+        self.max_chunks = max_chunks
+        self._sizes: Dict[int, Union[int, Set[int]]] = {}
+        self._chunks: Set[int] = set()
+        self._excluded: Dict[str, List[int]] = {}
+
+    def is_duplicate(self, count: FileCount, fingerprint: Fingerprint) -> bool:
+        """
+        Checks a file against the files seen so far, and remembers it if it is new.
+        Files without code lines are never duplicates: they add nothing to the KLOC.
+
+        Returns:
+            True if the file is a duplicate; its counts are then added to 'excluded'.
+        """
+        if count.code == 0:
+            return False
+        duplicate = self._seen(fingerprint.size, fingerprint.digest)
+        if not duplicate and self.near and len(fingerprint.chunks) >= MIN_SAMPLED_CHUNKS:
+            known = sum(chunk in self._chunks for chunk in fingerprint.chunks)
+            duplicate = known >= self.threshold * len(fingerprint.chunks)
+        if duplicate:
+            entry = self._excluded.setdefault(count.language, [0, 0, 0, 0])
+            entry[0] += 1
+            entry[1] += count.blank
+            entry[2] += count.comment
+            entry[3] += count.code
+        elif self.near:
+            room = self.max_chunks - len(self._chunks)
+            if room > 0:
+                self._chunks.update(fingerprint.chunks[:room])
+        return duplicate
+
+    def filter(self, counts: Iterable[Tuple[FileCount, Fingerprint]]) -> Iterator[FileCount]:
+        """
+        Yields the counts of the files that are not duplicates, in path order. The files
+        are checked once all of them are known, lowest path first, so the result does not
+        depend on the order of 'counts'.
+        """
+        for count, fingerprint in sorted(counts, key=_path):
+            if not self.is_duplicate(count, fingerprint):
+                yield count
+
+    @property
+    def excluded(self) -> LanguageStats:
+        """The total counts of the files found to be duplicates."""
+        return sum((LanguageStats(*entry) for entry in self._excluded.values()), LanguageStats())
+
+    def _seen(self, size: int, digest: int) -> bool:
+        """Looks the hash up among the files of the same size, adding it if missing."""
+        known = self._sizes.get(size)
+        if known is None:
+            self._sizes[size] = digest
+            return False
+        if isinstance(known, int):
+            if known == digest:
+                return True
+            self._sizes[size] = {known, digest}
+            return False
+        if digest in known:
+            return True
+        known.add(digest)
+        return False
@@ -0,0 +1,273 @@
+"""
+Compiled form of the Intermediate COCOMO cost drivers.
+
+'COST_DRIVERS' is turned once, at import time, into an integer-coded
+multiplier matrix: one row per driver, one column per rating level.
+A DriverProfile validates a set of ratings against it a single time and
+caches the resulting Effort Adjustment Factor (EAF), so it can be reused
+across any number of estimates.
+
+The COCOMO II ratings (scale factors and effort multipliers) are resolved
+the same way into a Cocomo2Profile.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .constants import COCOMO2_EFFORT_MULTIPLIERS, COCOMO2_SCALE_FACTORS, COST_DRIVERS
+from .models import InvalidDriverError
+
+# Rating levels, from the lowest to the highest. Not every driver defines every level.
+RATING_LEVELS: Tuple[str, ...] = ("vlow", "low", "nom", "high", "vhigh", "xhigh")
+
+# Driver codes, in the order of COST_DRIVERS.
+DRIVER_CODES: Tuple[str, ...] = tuple(COST_DRIVERS)
+
+DRIVER_INDEX: Dict[str, int] = {code: index for index, code in enumerate(DRIVER_CODES)}
+RATING_INDEX: Dict[str, int] = {rating: index for index, rating in enumerate(RATING_LEVELS)}
+
+# MULTIPLIER_TABLE[driver][rating] is the effort multiplier, or None when the
+# driver does not define that rating level.
+MULTIPLIER_TABLE: Tuple[Tuple[Optional[float], ...], ...] = tuple(
+    tuple(COST_DRIVERS[code]['ratings'].get(rating) for rating in RATING_LEVELS)
+    for code in DRIVER_CODES
+)
+
+# COCOMO II driver codes: the scale factors, then the effort multipliers.
+COCOMO2_DRIVERS: Dict[str, dict] = {**COCOMO2_SCALE_FACTORS, **COCOMO2_EFFORT_MULTIPLIERS}
+
+
+def resolve(code: str, rating: str) -> Tuple[int, int]:
+    """
+    Resolves a driver code and rating to their indexes in MULTIPLIER_TABLE.
+
+    Args:
+        code: The driver code, case-insensitive (e.g. 'RELY').
+        rating: The rating, case-insensitive (e.g. 'high').
+
+    Returns:
+        A tuple (driver index, rating index).
+
+    Raises:
+        InvalidDriverError: If the driver is unknown or does not define the rating.
+    """
+    driver = DRIVER_INDEX.get(code.lower()) if isinstance(code, str) else None
+    if driver is None:
+        raise InvalidDriverError(f"Invalid cost driver '{code}'. Choose from {', '.join(DRIVER_CODES)}")
+    level = RATING_INDEX.get(rating.lower()) if isinstance(rating, str) else None
+    if level is None or MULTIPLIER_TABLE[driver][level] is None:
+        valid = ", ".join(COST_DRIVERS[DRIVER_CODES[driver]]['ratings'])
+        raise InvalidDriverError(f"Invalid rating '{rating}' for driver '{code}'. Choose from {valid}")
+    return driver, level
+
+
+def multiplier(code: str, rating: str) -> float:
+    """
+    Returns the effort multiplier of a driver rating.
+
+    Raises:
+        InvalidDriverError: If the driver is unknown or does not define the rating.
+    """
+    driver, level = resolve(code, rating)
+    return MULTIPLIER_TABLE[driver][level]
+
+
+class DriverProfile:
+    """
+    A validated set of cost driver ratings, with its EAF computed once.
+
+    Build it once and pass it to 'calculate' as many times as needed:
+
+        profile = DriverProfile({'rely': 'high', 'cplx': 'vhigh'}, strict=True)
+        results = [calculate(kloc, mode, 8000, profile) for kloc in sizes]
+    """
+    __slots__ = ("_codes", "eaf")
+
+    def __init__(self, ratings: Optional[Mapping[str, str]] = None, strict: bool = False):
+        """
+        Validates the ratings and computes the EAF.
+
+        Args:
+            ratings: A dictionary from driver code to rating. Ex: {'rely': 'high', 'cplx': 'low'}
+            strict: Raise on unknown drivers or ratings instead of ignoring them
+                    (ignored ratings keep the multiplier 1.0).
+
+        Raises:
+            InvalidDriverError: In strict mode, if a driver or rating is invalid.
+        """
+        codes: List[Tuple[int, int]] = []
+        for code, rating in (ratings or {}).items():
+            try:
+                codes.append(resolve(code, rating))
+            except InvalidDriverError:
+                if strict:
+                    raise
+        self._codes = tuple(codes)
+        # Multiplied in the order the ratings were given, as 'calculate' always did.
+        eaf = 1.0
+        for driver, level in self._codes:
+            eaf *= MULTIPLIER_TABLE[driver][level]
+        self.eaf = eaf
+
+    @classmethod
+    def from_codes(cls, codes: Iterable[Tuple[int, int]]) -> "DriverProfile":
+        """Builds a profile from (driver index, rating index) pairs already resolved."""
+        profile = cls()
+        profile._codes = tuple(codes)
+        eaf = 1.0
+        for driver, level in profile._codes:
+            eaf *= MULTIPLIER_TABLE[driver][level]
+        profile.eaf = eaf
+        return profile
+
+    @property
+    def codes(self) -> Tuple[Tuple[int, int], ...]:
+        """The (driver index, rating index) pairs of the valid ratings."""
+        return self._codes
+
+    @property
+    def ratings(self) -> Dict[str, str]:
+        """The valid ratings, normalized to lower case."""
+        return {DRIVER_CODES[driver]: RATING_LEVELS[level] for driver, level in self._codes}
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DriverProfile) and self._codes == other._codes
+
+    def __hash__(self) -> int:
+        return hash(self._codes)
+
+    def __repr__(self) -> str:
+        return f"DriverProfile({self.ratings!r}, eaf={self.eaf!r})"
+
+
+@lru_cache(maxsize=1024)
+def cached_profile(items: Tuple[Tuple[str, str], ...], strict: bool = False) -> DriverProfile:
+    """
+    Returns the DriverProfile of a tuple of (code, rating) pairs, memoized, so that
+    estimates repeating the same driver dictionary do not validate it again.
+    """
+    return DriverProfile(dict(items), strict=strict)
+
+
+def resolve_profile(drivers: Mapping[str, str], strict: bool = False) -> DriverProfile:
+    """Returns the memoized profile of a driver dictionary, or a new one if its ratings are unhashable."""
+    try:
+        return cached_profile(tuple(drivers.items()), strict)
+    except TypeError:
+        return DriverProfile(drivers, strict=strict)
+
+
+def cocomo2_value(code: str, rating: str) -> float:
+    """
+    Returns the value of a COCOMO II rating: the scale factor of 'prec', 'flex',
+    'resl', 'team' and 'pmat', the effort multiplier of the other drivers.
+
+    Raises:
+        InvalidDriverError: If the driver is unknown or does not define the rating.
+    """
+    driver = COCOMO2_DRIVERS.get(code.lower()) if isinstance(code, str) else None
+    if driver is None:
+        raise InvalidDriverError(f"Invalid COCOMO II driver '{code}'. Choose from {', '.join(COCOMO2_DRIVERS)}")
+    value = driver['ratings'].get(rating.lower()) if isinstance(rating, str) else None
+    if value is None:
+        valid = ", ".join(driver['ratings'])
+        raise InvalidDriverError(f"Invalid rating '{rating}' for driver '{code}'. Choose from {valid}")
+    return value
+
+
+def schedule_fraction(rating: str) -> float:
+    """Returns the share of the nominal development time of a SCED rating (e.g. 0.75 for 'vlow')."""
+    return COCOMO2_EFFORT_MULTIPLIERS['sced']['schedule'][rating.lower()] / 100
+
+
+def scale_sum(scale_factors: Mapping[str, float]) -> float:
+    """
+    Sums the scale factors, the unrated ones at their nominal value, in the order
+    of COCOMO2_SCALE_FACTORS (the batch paths add them in the same order).
+    """
+    total = 0.0
+    for code, details in COCOMO2_SCALE_FACTORS.items():
+        total += scale_factors.get(code, details['ratings']['nom'])
+    return total
+
+
+class Cocomo2Profile:
+    """
+    A validated set of COCOMO II ratings, with its exponent and multipliers computed once.
+
+    'scale' is the sum of the five scale factors, 'em' the product of the effort
+    multipliers other than SCED, 'sced' the SCED multiplier and 'schedule' the
+    share of the nominal development time SCED asks for. 'eaf' is em * sced.
+    """
+    __slots__ = ("_ratings", "scale", "em", "sced", "schedule", "eaf")
+
+    def __init__(self, ratings: Optional[Mapping[str, str]] = None, strict: bool = False):
+        """
+        Validates the ratings.
+
+        Args:
+            ratings: A dictionary from driver code to rating. Ex: {'prec': 'high', 'rely': 'low'}
+            strict: Raise on unknown drivers or ratings instead of ignoring them
+                    (ignored scale factors stay nominal, ignored multipliers keep 1.0).
+
+        Raises:
+            InvalidDriverError: In strict mode, if a driver or rating is invalid.
+        """
+        valid: Dict[str, str] = {}
+        scale_factors: Dict[str, float] = {}
+        em = sced = schedule = 1.0
+        for code, rating in (ratings or {}).items():
+            try:
+                value = cocomo2_value(code, rating)
+            except InvalidDriverError:
+                if strict:
+                    raise
+                continue
+            code, rating = code.lower(), rating.lower()
+            valid[code] = rating
+            if code in COCOMO2_SCALE_FACTORS:
+                scale_factors[code] = value
+            elif code == 'sced':
+                sced, schedule = value, schedule_fraction(rating)
+            else:
+                # Multiplied in the order the ratings were given, like DriverProfile.
+                em *= value
+        self._ratings = valid
+        self.scale = scale_sum(scale_factors)
+        self.em = em
+        self.sced = sced
+        self.schedule = schedule
+        self.eaf = em * sced
+
+    @property
+    def ratings(self) -> Dict[str, str]:
+        """The valid ratings, normalized to lower case."""
+        return dict(self._ratings)
+
+    def __len__(self) -> int:
+        return len(self._ratings)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Cocomo2Profile) and self._ratings == other._ratings
+
+    def __hash__(self) -> int:
+        return hash(tuple(self._ratings.items()))
+
+    def __repr__(self) -> str:
+        return f"Cocomo2Profile({self._ratings!r}, scale={self.scale!r}, eaf={self.eaf!r})"
+
+
+@lru_cache(maxsize=1024)
+def cached_cocomo2_profile(items: Tuple[Tuple[str, str], ...], strict: bool = False) -> Cocomo2Profile:
+    """Returns the Cocomo2Profile of a tuple of (code, rating) pairs, memoized like 'cached_profile'."""
+    return Cocomo2Profile(dict(items), strict=strict)
+
+
+def resolve_cocomo2_profile(items: Tuple[Tuple[str, str], ...], strict: bool = False) -> Cocomo2Profile:
+    """Returns the memoized COCOMO II profile of (code, rating) pairs, like 'resolve_profile'."""
+    try:
+        return cached_cocomo2_profile(items, strict)
+    except TypeError:
+        return Cocomo2Profile(dict(items), strict=strict)
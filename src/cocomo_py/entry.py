@@ -0,0 +1,60 @@
+"""
+Entry point of the 'cocomo' command.
+
+Importing Typer and Rich takes longer than most commands themselves, so the
+entry point only loads what the command line asks for:
+
+- '--version' and 'explain' are answered here, from the standard library only
+  (this module does not even import 'typing');
+- machine-readable output ('--format json|jsonl|csv|parquet') is handled by
+  'cocomo_py.machine', which never imports Typer or Rich;
+- everything else goes to the interactive Typer application in 'cocomo_py.cli'.
+"""
+import sys
+
+MACHINE_FORMATS = frozenset({"json", "jsonl", "csv", "parquet"})
+
+EXPLAIN_TOPICS = frozenset({"modes", "drivers", "cocomo2"})
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    if "--version" in argv:
+        from . import __version__
+
+        print(f"cocomo-py version: {__version__}")
+        return
+    if _is_plain_explain(argv):
+        from .explain import render
+
+        print(render(argv[1] if len(argv) > 1 else None))
+        return
+    if _requested_format(argv) in MACHINE_FORMATS:
+        from .machine import main as machine_main
+
+        sys.exit(machine_main(argv))
+
+    from .cli import app
+
+    app()
+
+
+def _is_plain_explain(argv: list[str]) -> bool:
+    """'explain' with an optional topic; anything else (e.g. '--help') goes to Typer."""
+    if not argv or argv[0] != "explain" or len(argv) > 2:
+        return False
+    return len(argv) == 1 or argv[1].lower() in EXPLAIN_TOPICS
+
+
+def _requested_format(argv: list[str]) -> str | None:
+    """Finds the value of '--format' / '-f' without parsing the rest of the command line."""
+    for index, arg in enumerate(argv):
+        if arg in ("--format", "-f") and index + 1 < len(argv):
+            return argv[index + 1].lower()
+        if arg.startswith("--format="):
+            return arg.partition("=")[2].lower()
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Text of the 'cocomo explain' command.
+
+Kept apart from the Typer application so that the entry point can print it
+without importing Typer or Rich.
+"""
+from .constants import COCOMO2_EFFORT_MULTIPLIERS, COCOMO2_SCALE_FACTORS, COCOMO_MODES, COST_DRIVERS
+
+
+def render(topic: str | None = None, markup: bool = False) -> str:
+    """
+    Describes the COCOMO project modes, cost drivers and the COCOMO II drivers.
+
+    Args:
+        topic: 'modes', 'drivers' or 'cocomo2'. If omitted, explains all of them.
+        markup: Add Rich console markup (colors and styles).
+
+    Returns:
+        The explanation, one item per paragraph.
+    """
+    def style(text: str, tag: str) -> str:
+        return f"[{tag}]{text}[/{tag}]" if markup else text
+
+    topic = topic.lower() if topic else None
+    lines = []
+    if not topic or topic == "modes":
+        lines.append("\n--- " + style("COCOMO Project Modes", "bold green") + " ---")
+        for mode, details in COCOMO_MODES.items():
+            lines.append("\n" + style(f"{details['name']} ({mode})", "bold cyan"))
+            lines.append(details['description'])
+
+    if not topic or topic == "drivers":
+        lines.append("\n--- " + style("COCOMO Cost Drivers", "bold green") + " ---")
+        for code, details in COST_DRIVERS.items():
+            ratings_str = ", ".join(details['ratings'].keys())
+            lines.append("\n" + style(f"{details['name']} ({code.upper()})", "bold cyan"))
+            lines.append(details['description'])
+            lines.append(style(f"Ratings: {ratings_str}", "italic"))
+
+    if not topic or topic == "cocomo2":
+        for title, catalog in (
+            ("COCOMO II Scale Factors", COCOMO2_SCALE_FACTORS),
+            ("COCOMO II Effort Multipliers", COCOMO2_EFFORT_MULTIPLIERS),
+        ):
+            lines.append("\n--- " + style(title, "bold green") + " ---")
+            for code, details in catalog.items():
+                ratings_str = ", ".join(details['ratings'].keys())
+                lines.append("\n" + style(f"{details['name']} ({code.upper()})", "bold cyan"))
+                lines.append(details['description'])
+                lines.append(style(f"Ratings: {ratings_str}", "italic"))
+    return "\n".join(lines)
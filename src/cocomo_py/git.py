@@ -0,0 +1,279 @@
+"""
+Line counting straight from a git object database.
+
+Revisions are read with 'git ls-tree' and blob contents with a single
+long-lived 'git cat-file --batch' process, so nothing is ever checked out.
+Blob SHAs are content-addressed: a blob counted once is never read again,
+which makes counting many revisions of the same repository cheap.
+"""
+import os
+import subprocess
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .analyzer import (
+    EXCLUDED_DIRS, BATCH_SIZE, batched, map_batches, build_report, count_bytes, is_binary, make_deduplicator,
+    with_duplicates,
+)
+from .dedup import Deduplicator, Fingerprint
+from .ignore import IgnoreRules, is_generated, load_config
+from .languages import language_for_path
+from .models import AnalysisError, DedupMode, FileCount, LocReport
+
+# Memo of line counts per (blob SHA, language), shared across revisions,
+# with whether the blob holds generated code: (blank, comment, code, generated).
+# Binary blobs map to None.
+BlobCounts = Dict[Tuple[str, str], Optional[Tuple[int, int, int, bool]]]
+
+# Git file modes that are not regular files (symbolic links and submodules).
+_SKIPPED_MODES = {b"120000", b"160000"}
+
+
+def analyze_revisions(
+    repo_path: Path,
+    revisions: Iterable[str],
+    jobs: Optional[int] = None,
+    memo: Optional[BlobCounts] = None,
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF
+) -> Dict[str, LocReport]:
+    """
+    Counts the lines of code of several revisions of a git repository.
+
+    Args:
+        repo_path: The path to the repository (any directory inside its work tree, or a bare repository).
+        revisions: The revisions to count (commits, branches, tags...).
+        jobs: Number of worker processes used to count new blobs. Defaults to the number of CPUs.
+        memo: An optional dictionary of blob counts, reused and filled in across calls.
+        exclude: Extra globs of files and directories to ignore, in .gitignore syntax.
+        dedup: 'exact' counts the files of a revision that share a blob only once.
+
+    Returns:
+        A dictionary from each revision to its LocReport.
+
+    Raises:
+        AnalysisError: If 'git' is not found, the path is not a repository or a revision does not exist.
+        ValueError: If near duplicates are requested.
+    """
+    repo = str(repo_path)
+    memo = {} if memo is None else memo
+    rules = _revision_rules(repo, exclude)
+    reports = {}
+    with _BlobReader(repo) as reader:
+        for revision in revisions:
+            deduplicator = make_deduplicator(dedup)
+            counts = _count_revision(repo, revision, reader, jobs, memo, rules, deduplicator)
+            reports[revision] = with_duplicates(build_report(counts), deduplicator)
+    return reports
+
+
+def revision_file_counts(
+    repo_path: Path,
+    revision: str,
+    jobs: Optional[int] = None,
+    memo: Optional[BlobCounts] = None,
+    exclude: Sequence[str] = (),
+    dedup: Optional[Deduplicator] = None
+) -> List[FileCount]:
+    """
+    Counts the lines of every source file of a revision.
+
+    Args:
+        repo_path: The path to the repository.
+        revision: The revision to count.
+        jobs: Number of worker processes used to count new blobs. Defaults to the number of CPUs.
+        memo: An optional dictionary of blob counts, reused and filled in across calls.
+        exclude: Extra globs of files and directories to ignore, in .gitignore syntax.
+        dedup: An optional exact Deduplicator: files sharing a blob are then counted once,
+               and the others are added to its 'excluded' counts.
+
+    Returns:
+        A FileCount per source file, with paths relative to the repository root and '/'-separated.
+
+    Raises:
+        AnalysisError: If 'git' is not found, the path is not a repository or the revision does not exist.
+        ValueError: If the Deduplicator looks for near duplicates.
+    """
+    repo = str(repo_path)
+    rules = _revision_rules(repo, exclude)
+    with _BlobReader(repo) as reader:
+        return _count_revision(repo, revision, reader, jobs, {} if memo is None else memo, rules, dedup)
+
+
+def _revision_rules(repo: str, exclude: Sequence[str]) -> IgnoreRules:
+    """
+    The ignore rules of a repository, from its working tree configuration.
+    .gitignore files do not apply: every file of a commit is tracked.
+    """
+    return IgnoreRules(repo, config=replace(load_config(repo, exclude), gitignore=False))
+
+
+def _count_revision(
+    repo: str,
+    revision: str,
+    reader: "_BlobReader",
+    jobs: Optional[int],
+    memo: BlobCounts,
+    rules: Optional[IgnoreRules] = None,
+    dedup: Optional[Deduplicator] = None
+) -> List[FileCount]:
+    if dedup is not None and dedup.near:
+        raise ValueError("Near-duplicate detection is not available for git revisions.")
+    entries = list_tree(repo, revision, rules)
+    missing = {(sha, language) for _, sha, language in entries if (sha, language) not in memo}
+    blobs = ((sha, language, reader.read(sha)) for sha, language in missing)
+    batches = (((), batch) for batch in batched(blobs, BATCH_SIZE))
+    for _, results in map_batches(batches, _count_blob_batch, jobs):
+        for sha, language, counts in results:
+            memo[(sha, language)] = counts
+    skip_generated = rules is not None and rules.skip_generated
+    counts = []
+    for path, sha, language in entries:
+        counted = memo[(sha, language)]
+        if counted is None:
+            continue
+        blank, comment, code, generated = counted
+        if skip_generated and generated:
+            continue
+        # Blobs are content-addressed: the SHA stands for the size and content hash.
+        counts.append((FileCount(path, language, blank, comment, code), Fingerprint(0, int(sha[:16], 16))))
+    if dedup is not None:
+        return list(dedup.filter(counts))
+    return [count for count, _ in counts]
+
+
+def list_tree(repo_path: Path, revision: str, rules: Optional[IgnoreRules] = None) -> List[Tuple[str, str, str]]:
+    """
+    Lists the source files of a revision.
+
+    Args:
+        repo_path: The path to the repository.
+        revision: The revision to list.
+        rules: Optional ignore rules, matched against the paths of the revision.
+
+    Returns:
+        A list of (path, blob SHA, language) for every recognized source file,
+        skipping the same directories as the working tree analysis.
+
+    Raises:
+        AnalysisError: If 'git' is not found, the revision does not exist or is a range.
+    """
+    _check_single(revision)
+    output = _git(repo_path, "ls-tree", "-r", "-z", "--full-tree", revision)
+    entries = []
+    for record in output.split(b"\0"):
+        if not record:
+            continue
+        meta, _, raw_path = record.partition(b"\t")
+        mode, kind, sha = meta.split()
+        if kind != b"blob" or mode in _SKIPPED_MODES:
+            continue
+        path = os.fsdecode(raw_path)
+        *directories, _ = path.split("/")
+        if EXCLUDED_DIRS.intersection(directories):
+            continue
+        language = language_for_path(path)
+        if language is not None and not (rules is not None and rules.excluded(path)):
+            entries.append((path, sha.decode(), language))
+    return entries
+
+
+def rev_list(repo_path: Path, revision_range: str = "HEAD", max_count: Optional[int] = None) -> List[str]:
+    """
+    Lists the commits of a range, oldest first, to build a KLOC time series.
+
+    Args:
+        repo_path: The path to the repository.
+        revision_range: A revision or range understood by 'git rev-list' (e.g. 'v1.0..main').
+        max_count: Keep only the most recent 'max_count' commits.
+
+    Returns:
+        The commit SHAs, oldest first.
+
+    Raises:
+        AnalysisError: If 'git' is not found or the range is invalid.
+    """
+    args = ["rev-list", "--first-parent"]
+    if max_count is not None:
+        args.append(f"--max-count={max_count}")
+    output = _git(repo_path, *args, revision_range)
+    return output.decode().split()[::-1]
+
+
+def resolve_revision(repo_path: Path, revision: str) -> str:
+    """
+    Resolves a revision (branch, tag, abbreviated SHA...) to the SHA of its tree.
+
+    Two revisions with the same tree have the same line counts, so the tree SHA
+    is a fingerprint of the revision contents.
+
+    Raises:
+        AnalysisError: If 'git' is not found, the revision does not exist or is a range.
+    """
+    _check_single(revision)
+    return _git(repo_path, "rev-parse", "--verify", f"{revision}^{{tree}}").decode().strip()
+
+
+def _check_single(revision: str) -> None:
+    if ".." in revision:
+        raise AnalysisError(f"'{revision}' is a range of revisions, where a single revision is expected.")
+
+
+def _git(repo_path: Path, *args: str) -> bytes:
+    """Runs a git command in the repository and returns its standard output."""
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(repo_path), *args],
+            capture_output=True,
+            check=True
+        )
+    except FileNotFoundError:
+        raise AnalysisError("'git' command not found. Please install it and ensure it is in your system's PATH.")
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode(errors="replace").strip()
+        raise AnalysisError(f"An error occurred while reading the git repository: {message}")
+    return result.stdout
+
+
+def _count_blob_batch(
+    batch: List[Tuple[str, str, bytes]]
+) -> List[Tuple[str, str, Optional[Tuple[int, int, int, bool]]]]:
+    """Counts a batch of (SHA, language, contents) blobs, binary ones excepted. Runs inside the worker processes."""
+    return [
+        (sha, language, None if is_binary(data) else (*count_bytes(data, language), is_generated(data)))
+        for sha, language, data in batch
+    ]
+
+
+class _BlobReader:
+    """Reads blob contents through a single 'git cat-file --batch' process."""
+
+    def __init__(self, repo_path: str):
+        try:
+            self._process = subprocess.Popen(
+                ["git", "-C", repo_path, "cat-file", "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            raise AnalysisError("'git' command not found. Please install it and ensure it is in your system's PATH.")
+
+    def __enter__(self) -> "_BlobReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._process.stdin.close()
+        self._process.stdout.close()
+        self._process.wait()
+
+    def read(self, sha: str) -> bytes:
+        self._process.stdin.write(sha.encode() + b"\n")
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().split()
+        if len(header) != 3 or header[1] != b"blob":
+            raise AnalysisError(f"Could not read the git blob {sha}.")
+        data = self._process.stdout.read(int(header[2]))
+        self._process.stdout.read(1)  # The newline that terminates every object.
+        return data
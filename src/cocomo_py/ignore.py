@@ -0,0 +1,331 @@
+"""
+Ignore rules: nested .gitignore files, the project configuration and exclude globs.
+
+Every pattern source is compiled once into a PatternSet, a few regular
+expressions evaluated with gitignore semantics (last match wins, '!' negates,
+a trailing '/' only matches directories, a '/' elsewhere anchors the pattern
+to its directory). The walk asks an IgnoreRules object about each directory
+entry before descending into it, so an ignored subtree is never listed.
+
+Generated and vendored files are recognized by path (well-known vendor
+directories and generated file names) and by the banners generators write
+at the top of their output: a comment starting a line among the first lines
+of the file and reading '@generated', 'Code generated ... DO NOT EDIT.' or
+'Generated by the protocol buffer compiler.'. The phrases anywhere else (in
+a docstring, or further down a comment) do not count.
+
+The project configuration lives in '.cocomo.toml' at the project root:
+
+    [ignore]
+    exclude = ["docs/api/**", "*.pb.go"]   # gitignore syntax, relative to the root
+    gitignore = true                      # honor .gitignore files
+    generated = true                      # skip generated and vendored files
+"""
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Optional, Pattern, Sequence, Tuple
+
+# Directories never descended into, whatever the configuration. The first group matches
+# cloc's default version control exclusions, the second the directories excluded on the cloc command line.
+EXCLUDED_DIRS = frozenset({
+    ".git", ".hg", ".svn", ".bzr", "CVS", ".snapshot",
+    "node_modules", "vendor", "venv", "target", ".venv",
+})
+
+# Name of the project configuration file.
+CONFIG_FILE = ".cocomo.toml"
+
+# Vendored or tool-managed directories, skipped when 'generated' is enabled.
+# (The version control and package directories of EXCLUDED_DIRS are always skipped.)
+VENDORED_PATTERNS = (
+    "third_party/", "third-party/", "bower_components/", "jspm_packages/", "Pods/", "Carthage/",
+    "__pycache__/", ".tox/", ".nox/", ".mypy_cache/", ".pytest_cache/", ".ruff_cache/",
+    "site-packages/", ".eggs/", "*.egg-info/", ".gradle/", ".idea/", ".vscode/",
+)
+
+# File names that are generated by well-known tools.
+GENERATED_PATTERNS = (
+    "*.min.js", "*.min.css", "*.bundle.js", "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.pb.cc", "*.pb.h",
+    "*.pb.swift", "*.g.dart", "*.freezed.dart", "*.generated.*", "*.designer.cs", "*.Designer.cs",
+    "*_generated.go", "zz_generated*.go", "*.d.ts.map", "*.js.map",
+)
+
+# Banners of generated code: a line comment ('#', '//', '--', ';', '%') or a block comment
+# line ('/*', '*', '<!--') whose text starts with one of the generator conventions.
+GENERATED_HEADER = re.compile(
+    rb"^[ \t]*(?:#+|//+|--|;+|%+|/\*+|\*|<!--)[ \t]*"
+    rb"(?:@generated\b|Code generated .*DO NOT EDIT\.|Generated by the protocol buffer compiler\.)",
+    re.MULTILINE,
+)
+# The banner is searched in the first HEADER_LINES lines, within the first HEADER_SIZE bytes.
+HEADER_SIZE = 512
+HEADER_LINES = 5
+
+
+@dataclass(frozen=True)
+class IgnoreConfig:
+    """What to ignore besides the version control and package directories."""
+    exclude: Tuple[str, ...] = ()
+    gitignore: bool = True
+    generated: bool = True
+
+
+def load_config(project_path: Path, exclude: Sequence[str] = ()) -> IgnoreConfig:
+    """
+    Reads the '[ignore]' table of the project's '.cocomo.toml', if any.
+
+    Args:
+        project_path: The project root.
+        exclude: Extra exclude globs (e.g. from the command line), applied after the configured ones.
+
+    Raises:
+        ValueError: If the configuration file is not valid.
+    """
+    import tomllib
+
+    path = Path(project_path) / CONFIG_FILE
+    table = {}
+    try:
+        with open(path, "rb") as config:
+            table = tomllib.load(config).get("ignore", {})
+    except FileNotFoundError:
+        pass
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise ValueError(f"Invalid configuration file {path}: {e}")
+    configured = table.get("exclude", [])
+    if isinstance(configured, str) or not all(isinstance(glob, str) for glob in configured):
+        raise ValueError(f"Invalid configuration file {path}: 'exclude' must be a list of globs.")
+    return IgnoreConfig(
+        exclude=tuple(configured) + tuple(exclude),
+        gitignore=bool(table.get("gitignore", True)),
+        generated=bool(table.get("generated", True)),
+    )
+
+
+def is_generated(data: bytes) -> bool:
+    """Tells whether the contents of a file start with a generated-code banner."""
+    header = b"\n".join(data[:HEADER_SIZE].split(b"\n", HEADER_LINES)[:HEADER_LINES])
+    return GENERATED_HEADER.search(header) is not None
+
+
+class PatternSet:
+    """
+    Compiled gitignore patterns, matched against paths relative to their base directory.
+    """
+    __slots__ = ("base", "_rules", "_any", "_files")
+
+    def __init__(self, patterns: Iterable[str], base: str = ""):
+        """
+        Args:
+            patterns: Lines in gitignore syntax. Blank lines and comments are skipped.
+            base: The directory of the patterns, relative to the project root ('/'-separated).
+        """
+        self.base = base
+        self._rules: List[Tuple[Pattern[str], bool, bool]] = [
+            rule for rule in map(_compile, patterns) if rule is not None
+        ]
+        # Without negations the last-match-wins rule does not matter: one regex per kind of entry.
+        self._any = self._files = None
+        if not any(negate for _, negate, _ in self._rules):
+            self._any = _union(regex for regex, _, _ in self._rules)
+            self._files = _union(regex for regex, _, dir_only in self._rules if not dir_only)
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Decides about a path relative to the project root.
+
+        Returns:
+            True if ignored, False if re-included by a negated pattern, None if no pattern matches.
+        """
+        if self.base:
+            path = path[len(self.base) + 1:]
+        if self._any is not None:
+            return True if (self._any if is_dir else self._files).match(path) else None
+        for regex, negate, dir_only in reversed(self._rules):
+            if (is_dir or not dir_only) and regex.match(path):
+                return not negate
+        return None
+
+
+class IgnoreRules:
+    """
+    All the ignore rules of a project: exclude globs, nested .gitignore files and
+    the generated/vendored heuristics. Rules of .gitignore files are collected
+    during the walk: 'enter' returns the rules in force inside a directory.
+    """
+
+    def __init__(self, project_path: Path, exclude: Sequence[str] = (), config: Optional[IgnoreConfig] = None):
+        """
+        Args:
+            project_path: The project root.
+            exclude: Extra exclude globs, added to the configured ones.
+            config: The rules to apply. Defaults to the project's '.cocomo.toml'.
+
+        Raises:
+            ValueError: If the configuration file is not valid.
+        """
+        self.root = os.path.abspath(project_path)
+        self.config = config if config is not None else load_config(self.root, exclude)
+        # The configuration file itself is not part of the project's code.
+        self._exclude = PatternSet(("/" + CONFIG_FILE,) + self.config.exclude)
+        self._heuristics = _heuristics() if self.config.generated else PatternSet(())
+        root_rules: Tuple[PatternSet, ...] = ()
+        if self.config.gitignore:
+            info_exclude = os.path.join(self.root, ".git", "info", "exclude")
+            root_rules = tuple(rules for rules in (_read_patterns(info_exclude, ""),) if rules)
+        self.root_rules = self.enter(self.root, "", root_rules)
+        self._chains = {"": self.root_rules}
+
+    @property
+    def skip_generated(self) -> bool:
+        """Whether files with a generated-code header are skipped."""
+        return self.config.generated
+
+    def enter(self, directory: str, relative: str, rules: Tuple[PatternSet, ...]) -> Tuple[PatternSet, ...]:
+        """
+        Returns the .gitignore rules in force inside a directory.
+
+        Args:
+            directory: The absolute directory path.
+            relative: The directory relative to the root ('/'-separated, '' for the root).
+            rules: The rules in force in its parent.
+        """
+        if not self.config.gitignore:
+            return rules
+        patterns = _read_patterns(os.path.join(directory, ".gitignore"), relative)
+        return rules + (patterns,) if patterns else rules
+
+    def ignored(self, relative: str, is_dir: bool, rules: Tuple[PatternSet, ...] = ()) -> bool:
+        """
+        Tells whether an entry is ignored.
+
+        Args:
+            relative: The entry path relative to the root ('/'-separated).
+            is_dir: Whether the entry is a directory.
+            rules: The .gitignore rules in force in the entry's directory.
+        """
+        decision = self._exclude.match(relative, is_dir)
+        if decision is not None:
+            return decision
+        for patterns in reversed(rules):
+            decision = patterns.match(relative, is_dir)
+            if decision is not None:
+                return decision
+        return bool(self._heuristics.match(relative, is_dir))
+
+    def chain(self, relative: str) -> Tuple[PatternSet, ...]:
+        """
+        Returns the .gitignore rules in force inside a directory, reading the
+        .gitignore files of its ancestors once (for paths that are not walked,
+        e.g. watch events).
+
+        Args:
+            relative: The directory relative to the root ('/'-separated, '' for the root).
+        """
+        rules = self._chains.get(relative)
+        if rules is None:
+            parent, _, _ = relative.rpartition("/")
+            rules = self.enter(os.path.join(self.root, relative), relative, self.chain(parent))
+            self._chains[relative] = rules
+        return rules
+
+    def excluded(self, relative: str, is_dir: bool = False) -> bool:
+        """
+        Tells whether an entry, or any of its directories, is ignored.
+
+        Args:
+            relative: The entry path relative to the root ('/'-separated).
+            is_dir: Whether the entry is a directory.
+        """
+        parts = relative.split("/")
+        directory = ""
+        for name in parts[:-1]:
+            rules = self.chain(directory)
+            directory = f"{directory}/{name}" if directory else name
+            if name in EXCLUDED_DIRS or self.ignored(directory, True, rules):
+                return True
+        return self.ignored(relative, is_dir, self.chain(directory))
+
+
+def _read_patterns(path: str, base: str) -> Optional[PatternSet]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as source:
+            return PatternSet(source.read().splitlines(), base)
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=1)
+def _heuristics() -> PatternSet:
+    return PatternSet(VENDORED_PATTERNS + GENERATED_PATTERNS)
+
+
+def _union(regexes: Iterable[Pattern[str]]) -> Pattern[str]:
+    sources = [regex.pattern for regex in regexes]
+    # '(?!)' never matches: an empty set ignores nothing.
+    return re.compile("|".join(f"(?:{source})" for source in sources) or "(?!)")
+
+
+def _compile(line: str) -> Optional[Tuple[Pattern[str], bool, bool]]:
+    """Compiles one gitignore line into (regex, negated, directories only)."""
+    if not line or line.startswith("#"):
+        return None
+    # Trailing spaces are ignored unless escaped.
+    while line.endswith(" ") and not line.endswith("\\ "):
+        line = line[:-1]
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # A slash at the start or in the middle anchors the pattern to its directory.
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    body = []
+    index = 0
+    while index < len(line):
+        char = line[index]
+        if line.startswith("**", index) and (index == 0 or line[index - 1] == "/"):
+            end = index + 2
+            if end == len(line):
+                body.append(".*")
+                index = end
+                continue
+            if line[end] == "/":
+                body.append("(?:.*/)?")
+                index = end + 1
+                continue
+        if char == "*":
+            body.append("[^/]*")
+        elif char == "?":
+            body.append("[^/]")
+        elif char == "[":
+            close = line.find("]", index + 2 if line.startswith(("[!", "[^"), index) else index + 1)
+            if close == -1:
+                body.append(re.escape(char))
+            else:
+                content = line[index + 1:close]
+                if content[:1] in ("!", "^"):
+                    content = "^" + content[1:]
+                body.append("[" + content.replace("\\", "\\\\") + "]")
+                index = close
+        elif char == "\\" and index + 1 < len(line):
+            index += 1
+            body.append(re.escape(line[index]))
+        else:
+            body.append(re.escape(char))
+        index += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + "".join(body) + r"\Z"), negate, dir_only
@@ -0,0 +1,273 @@
+"""
+This module centralizes the language definitions used by the native
+line counter. Language names follow the ones reported by 'cloc' so that
+both backends produce comparable per-language totals.
+"""
+from pathlib import PurePath
+from typing import Dict, Optional
+
+# Dictionary with the languages recognized by the native counter.
+# 'extensions' and 'filenames' identify the files of each language,
+# 'line_comments' and 'block_comments' are the comment markers and
+# 'strings' are the quote characters whose contents are never treated as comments.
+LANGUAGES = {
+    "Python": {
+        "extensions": ["py", "pyw", "pyi"],
+        "line_comments": ["#"],
+        "block_comments": [('"""', '"""'), ("'''", "'''")],
+        "strings": ['"', "'"],
+    },
+    "C": {
+        "extensions": ["c", "ec", "pgc"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "C/C++ Header": {
+        "extensions": ["h", "hh", "hpp", "hxx", "inl"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "C++": {
+        "extensions": ["cpp", "cc", "cxx", "c++", "pcc", "ino"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "C#": {
+        "extensions": ["cs"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "Java": {
+        "extensions": ["java"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "Kotlin": {
+        "extensions": ["kt", "kts"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "Scala": {
+        "extensions": ["scala", "sc"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "Go": {
+        "extensions": ["go"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"', "`"],
+    },
+    "Rust": {
+        "extensions": ["rs"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "Swift": {
+        "extensions": ["swift"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"'],
+    },
+    "Dart": {
+        "extensions": ["dart"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"', "'"],
+    },
+    "JavaScript": {
+        "extensions": ["js", "mjs", "cjs", "jsx"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"', "'", "`"],
+    },
+    "TypeScript": {
+        "extensions": ["ts", "tsx", "mts", "cts"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"', "'", "`"],
+    },
+    "PHP": {
+        "extensions": ["php", "php3", "php4", "php5", "phtml"],
+        "line_comments": ["//", "#"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"', "'"],
+    },
+    "Ruby": {
+        "extensions": ["rb", "rake", "gemspec"],
+        "filenames": ["Rakefile", "Gemfile"],
+        "line_comments": ["#"],
+        "block_comments": [("=begin", "=end")],
+        "strings": ['"', "'"],
+    },
+    "Perl": {
+        "extensions": ["pl", "pm"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": ['"', "'"],
+    },
+    "Lua": {
+        "extensions": ["lua"],
+        "line_comments": ["--"],
+        "block_comments": [("--[[", "]]")],
+        "strings": ['"', "'"],
+    },
+    "R": {
+        "extensions": ["r"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": ['"', "'"],
+    },
+    "Haskell": {
+        "extensions": ["hs", "lhs"],
+        "line_comments": ["--"],
+        "block_comments": [("{-", "-}")],
+        "strings": ['"'],
+    },
+    "Elixir": {
+        "extensions": ["ex", "exs"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": ['"'],
+    },
+    "Erlang": {
+        "extensions": ["erl", "hrl"],
+        "line_comments": ["%"],
+        "block_comments": [],
+        "strings": ['"'],
+    },
+    "Bourne Shell": {
+        "extensions": ["sh"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": ['"', "'"],
+    },
+    "Bourne Again Shell": {
+        "extensions": ["bash"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": ['"', "'"],
+    },
+    "PowerShell": {
+        "extensions": ["ps1", "psm1", "psd1"],
+        "line_comments": ["#"],
+        "block_comments": [("<#", "#>")],
+        "strings": ['"', "'"],
+    },
+    "SQL": {
+        "extensions": ["sql"],
+        "line_comments": ["--"],
+        "block_comments": [("/*", "*/")],
+        "strings": ["'"],
+    },
+    "HTML": {
+        "extensions": ["html", "htm", "xhtml"],
+        "line_comments": [],
+        "block_comments": [("<!--", "-->")],
+        "strings": [],
+    },
+    "XML": {
+        "extensions": ["xml", "xsd", "xsl", "xslt"],
+        "line_comments": [],
+        "block_comments": [("<!--", "-->")],
+        "strings": [],
+    },
+    "CSS": {
+        "extensions": ["css"],
+        "line_comments": [],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"', "'"],
+    },
+    "SCSS": {
+        "extensions": ["scss"],
+        "line_comments": ["//"],
+        "block_comments": [("/*", "*/")],
+        "strings": ['"', "'"],
+    },
+    "Markdown": {
+        "extensions": ["md", "markdown"],
+        "line_comments": [],
+        "block_comments": [("<!--", "-->")],
+        "strings": [],
+    },
+    "JSON": {
+        "extensions": ["json"],
+        "line_comments": [],
+        "block_comments": [],
+        "strings": [],
+    },
+    "YAML": {
+        "extensions": ["yaml", "yml"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": ['"', "'"],
+    },
+    "TOML": {
+        "extensions": ["toml"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": ['"', "'"],
+    },
+    "make": {
+        "extensions": ["mk", "mak"],
+        "filenames": ["Makefile", "makefile", "GNUmakefile"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": [],
+    },
+    "Dockerfile": {
+        "extensions": ["dockerfile"],
+        "filenames": ["Dockerfile"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": [],
+    },
+    "CMake": {
+        "extensions": ["cmake"],
+        "filenames": ["CMakeLists.txt"],
+        "line_comments": ["#"],
+        "block_comments": [],
+        "strings": ['"'],
+    },
+}
+
+# Reverse indexes built once at import time, so that identifying the language
+# of a file is a single dictionary lookup.
+_EXTENSION_INDEX: Dict[str, str] = {
+    extension: language
+    for language, details in LANGUAGES.items()
+    for extension in details["extensions"]
+}
+_FILENAME_INDEX: Dict[str, str] = {
+    filename: language
+    for language, details in LANGUAGES.items()
+    for filename in details.get("filenames", [])
+}
+
+
+def language_for_path(path: str) -> Optional[str]:
+    """
+    Identifies the language of a file from its name.
+
+    Args:
+        path: The file path (only the final component is inspected).
+
+    Returns:
+        The language name, or None if the file is not source code we recognize.
+    """
+    name = PurePath(path).name
+    language = _FILENAME_INDEX.get(name)
+    if language is not None:
+        return language
+    _, dot, extension = name.rpartition(".")
+    if not dot:
+        return None
+    return _EXTENSION_INDEX.get(extension.lower())
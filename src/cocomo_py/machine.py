@@ -0,0 +1,298 @@
+"""
+Machine-readable command-line interface.
+
+The 'cocomo' entry point hands over to this module when '--format' selects
+json, jsonl, csv or parquet. It is built on argparse, so neither Typer nor
+Rich is imported, and every estimate is written as soon as it is ready.
+The Typer commands call the same 'run_*' functions for these formats.
+"""
+import argparse
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from . import __version__
+from .analyzer import analyze_tree
+from .cache import LocCache, default_cache_path
+from .calculator import calculate
+from .models import AnalysisError, Backend, Calibration, DedupMode, LocTree, OutputFormat, ProfileFormat, ProjectMode
+from .output import estimate_record, open_writer
+from .scan import collect_repositories, scan_repositories
+from .timings import Timings, phase
+
+
+# Error of '--intermediate' with a machine-readable format: its prompts would mix with the records.
+INTERMEDIATE_NEEDS_TABLE = "'--intermediate' prompts for the cost drivers and needs '--format table'; rate them with '--driver'."
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Runs the machine-readable CLI.
+
+    Args:
+        argv: The command-line arguments, without the program name.
+
+    Returns:
+        The process exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "estimate":
+        if args.intermediate:
+            parser.error(INTERMEDIATE_NEEDS_TABLE)
+        timings = Timings() if args.timings or args.profile is not None else None
+        code = guarded(lambda: run_estimate(
+            args.project_path, args.mode, args.cost_per_month, parse_drivers(args.driver), args.backend,
+            args.no_cache, args.rebuild_cache, args.revision, args.format, args.output,
+            args.depth if args.breakdown else None, args.exclude, args.dedup, open_calibration(args.calibration),
+            timings
+        ))
+        if code == 0 and timings is not None:
+            code = guarded(lambda: report_timings(timings, args.timings, args.profile, args.profile_format))
+        return code
+    if args.command == "watch":
+        return guarded(lambda: run_watch(
+            args.project_path, args.mode, args.cost_per_month, parse_drivers(args.driver), args.no_cache,
+            args.debounce, args.polling, args.format, args.output, args.exclude, open_calibration(args.calibration)
+        ))
+    return guarded(lambda: run_scan(
+        collect_repositories(args.paths, args.manifest, args.root, args.glob),
+        args.mode, args.cost_per_month, parse_drivers(args.driver), args.workers, args.backend,
+        args.no_cache, args.format, args.output, args.exclude, args.dedup, open_calibration(args.calibration)
+    ))
+
+
+def guarded(command: Callable[[], int]) -> int:
+    """Runs a command, reporting expected errors on the standard error instead of a traceback."""
+    try:
+        return command()
+    except (AnalysisError, ValueError, ImportError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argparse equivalent of the 'estimate', 'scan' and 'watch' commands.
+    Their options must stay those of the Typer commands, which tests/test_entry.py checks.
+    """
+    parser = argparse.ArgumentParser(prog="cocomo", description="A CLI tool to estimate software costs using the COCOMO model.")
+    parser.add_argument("--version", action="version", version=f"cocomo-py version: {__version__}")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--mode", "-m", type=lambda value: ProjectMode(value.lower()), default=ProjectMode.SEMI_DETACHED,
+                        help="The COCOMO project mode.")
+    common.add_argument("--cost-per-month", "-c", type=float, default=8000.0,
+                        help="Average cost of a developer per month (e.g., 8000.0).")
+    common.add_argument("--driver", "-d", action="append", default=[],
+                        help="A cost driver rating, e.g. 'rely=high'. Repeatable.")
+    common.add_argument("--no-cache", action="store_true",
+                        help="Counts every file again, without reading or updating the line count cache.")
+    common.add_argument("--exclude", "-x", action="append", default=[],
+                        help="A glob of files or directories to ignore, in .gitignore syntax. Repeatable.")
+    common.add_argument("--calibration", type=Path, default=None,
+                        help="A calibration profile written by 'cocomo calibrate', used in place of the built-in coefficients.")
+    common.add_argument("--format", "-f", type=lambda value: OutputFormat(value.lower()), required=True,
+                        choices=[f for f in OutputFormat if f != OutputFormat.TABLE], help="The output format.")
+    common.add_argument("--output", "-o", default=None,
+                        help="The output file. Defaults to the standard output.")
+
+    estimate = commands.add_parser("estimate", parents=[common], help="Estimate the effort and cost of a software project.")
+    estimate.add_argument("project_path", type=Path,
+                          help="The path to the project folder to be analyzed, or a tar or zip archive ('-' for the standard input).")
+    estimate.add_argument("--backend", "-b", type=lambda value: Backend(value.lower()), default=Backend.NATIVE,
+                          help="The line counting engine: 'native' or 'cloc'.")
+    estimate.add_argument("--intermediate", "-i", action="store_true",
+                          help="Prompts for the cost drivers: only with '--format table'.")
+    estimate.add_argument("--version", action="version", version=f"cocomo-py version: {__version__}")
+    estimate.add_argument("--rebuild-cache", action="store_true",
+                          help="Discards the line count cache and rebuilds it from scratch.")
+    estimate.add_argument("--revision", "-r", default=None,
+                          help="Counts a git revision straight from the repository, without checking it out.")
+    estimate.add_argument("--breakdown", action="store_true",
+                          help="Adds the per-directory breakdown of the line counts to the record.")
+    estimate.add_argument("--depth", type=int, default=2,
+                          help="Directory levels of the breakdown; deeper files count in their ancestor.")
+    estimate.add_argument("--dedup", type=lambda value: DedupMode(value.lower()), default=DedupMode.OFF,
+                          choices=list(DedupMode), help="Count duplicated files once: 'exact' or 'near' copies.")
+    estimate.add_argument("--timings", action="store_true",
+                          help="Prints the time of each phase, the files and bytes per second and the slowest files on the standard error.")
+    estimate.add_argument("--profile", type=Path, default=None,
+                          help="Writes the timings of the run to this file.")
+    estimate.add_argument("--profile-format", type=lambda value: ProfileFormat(value.lower()), default=ProfileFormat.JSON,
+                          choices=list(ProfileFormat), help="The '--profile' format: 'json', or 'chrome' for a Chrome trace.")
+
+    scan = commands.add_parser("scan", parents=[common], help="Estimate many repositories concurrently.")
+    scan.add_argument("paths", nargs="*", type=Path, help="Repository folders to analyze.")
+    scan.add_argument("--manifest", type=Path, default=None, help="A file listing one repository path per line.")
+    scan.add_argument("--root", type=Path, default=None,
+                      help="A workspace folder whose subfolders matching '--glob' are analyzed.")
+    scan.add_argument("--glob", default="*", help="Glob pattern, relative to '--root', selecting the repositories.")
+    scan.add_argument("--backend", "-b", type=lambda value: Backend(value.lower()), default=Backend.NATIVE,
+                      help="The line counting engine: 'native' or 'cloc'.")
+    scan.add_argument("--workers", "-w", type=int, default=None,
+                      help="Number of repositories analyzed in parallel. Defaults to the number of CPUs.")
+    scan.add_argument("--dedup", type=lambda value: DedupMode(value.lower()), default=DedupMode.OFF,
+                      choices=list(DedupMode), help="Count duplicated files once: 'exact' or 'near' copies.")
+
+    watch = commands.add_parser("watch", parents=[common], help="Keep a live estimate of a project while its files change.")
+    watch.add_argument("project_path", type=Path, help="The path to the project folder to be watched.")
+    watch.add_argument("--debounce", type=float, default=0.25,
+                       help="Seconds without new changes before the estimate is updated.")
+    watch.add_argument("--polling", action="store_true",
+                       help="Polls the tree for changes instead of using inotify.")
+    return parser
+
+
+def parse_drivers(values: Sequence[str]) -> Dict[str, str]:
+    """
+    Parses 'code=rating' arguments into a driver dictionary.
+
+    Raises:
+        ValueError: If an argument is not of the form 'code=rating'.
+    """
+    drivers = {}
+    for value in values:
+        code, _, rating = value.partition("=")
+        if not code.strip() or not rating.strip():
+            raise ValueError(f"Invalid driver '{value}': expected 'code=rating'.")
+        drivers[code.strip()] = rating.strip()
+    return drivers
+
+
+def open_calibration(path: Optional[Path]) -> Optional[Calibration]:
+    """Loads the calibration profile of the '--calibration' option, if given."""
+    if path is None:
+        return None
+    from .calibration import load_calibration
+
+    return load_calibration(path)
+
+
+def analyze_project(
+    project_path: Path,
+    backend: Backend,
+    no_cache: bool = False,
+    rebuild_cache: bool = False,
+    revision: Optional[str] = None,
+    depth: Optional[int] = 0,
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    timings: Optional[Timings] = None
+) -> LocTree:
+    """
+    Counts the lines of a project the way the CLI does: through the default
+    line count cache, unless disabled or irrelevant (cloc backend, git revision, archive).
+    The tree keeps 'depth' directory levels; the root's report is the whole project.
+    """
+    use_cache = backend == Backend.NATIVE and revision is None and not no_cache and Path(project_path).is_dir()
+    with LocCache() if use_cache else nullcontext() as cache:
+        if cache is not None and rebuild_cache:
+            cache.clear()
+        return analyze_tree(
+            project_path, depth, backend=backend, cache=cache, revision=revision, exclude=exclude, dedup=dedup,
+            timings=timings
+        )
+
+
+def run_estimate(
+    project_path: Path,
+    mode: ProjectMode,
+    cost_per_month: float,
+    drivers: Dict[str, str],
+    backend: Backend,
+    no_cache: bool,
+    rebuild_cache: bool,
+    revision: Optional[str],
+    format: OutputFormat,
+    output: Optional[str],
+    breakdown_depth: Optional[int] = None,
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    calibration: Optional[Calibration] = None,
+    timings: Optional[Timings] = None
+) -> int:
+    """
+    Estimates one project and writes a single record. Returns the exit code.
+    With a 'breakdown_depth', the record includes the per-directory line counts.
+    """
+    start = time.perf_counter()
+    tree = analyze_project(
+        project_path, backend, no_cache, rebuild_cache, revision, breakdown_depth or 0, exclude, dedup, timings
+    )
+    with phase(timings, "estimate"):
+        result = calculate(tree.kloc, mode, cost_per_month, drivers, calibration=calibration)
+    with phase(timings, "write"), open_writer(format, output, single=True) as writer:
+        writer.write(estimate_record(
+            result, tree.report, path=str(project_path), elapsed_seconds=time.perf_counter() - start,
+            tree=tree if breakdown_depth is not None else None
+        ))
+    return 0
+
+
+def report_timings(timings: Timings, show: bool, profile: Optional[Path], profile_format: ProfileFormat) -> int:
+    """Prints the timings summary on the standard error and writes the '--profile' file. Returns the exit code."""
+    if show:
+        print(timings.summary(), file=sys.stderr)
+    if profile is not None:
+        timings.write(profile, profile_format)
+    return 0
+
+
+def run_watch(
+    project_path: Path,
+    mode: ProjectMode,
+    cost_per_month: float,
+    drivers: Dict[str, str],
+    no_cache: bool,
+    debounce: float,
+    polling: bool,
+    format: OutputFormat,
+    output: Optional[str],
+    exclude: Sequence[str] = (),
+    calibration: Optional[Calibration] = None
+) -> int:
+    """Writes a record after the initial scan and after every change, until interrupted. Returns the exit code."""
+    from .watch import watch
+
+    with LocCache() if not no_cache else nullcontext() as cache, open_writer(format, output) as writer:
+        try:
+            for update in watch(project_path, mode, cost_per_month, drivers, debounce, polling, cache=cache,
+                                exclude=exclude, calibration=calibration):
+                writer.write(estimate_record(
+                    update.result, update.report, path=str(project_path), elapsed_seconds=update.elapsed_seconds
+                ))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def run_scan(
+    repositories: List[Path],
+    mode: ProjectMode,
+    cost_per_month: float,
+    drivers: Dict[str, str],
+    workers: Optional[int],
+    backend: Backend,
+    no_cache: bool,
+    format: OutputFormat,
+    output: Optional[str],
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    calibration: Optional[Calibration] = None
+) -> int:
+    """Estimates many repositories, writing each record as it completes. Returns the exit code."""
+    if not repositories:
+        raise ValueError("No repositories to scan. Pass paths, '--manifest' or '--root'.")
+    cache_path = None if no_cache else default_cache_path()
+    failed = 0
+    with open_writer(format, output) as writer:
+        for scan in scan_repositories(
+            repositories, mode, cost_per_month, drivers, workers, backend, cache_path, exclude, dedup, calibration
+        ):
+            failed += not scan.ok
+            writer.write(estimate_record(scan.result, scan.report, scan.path, scan.error, scan.elapsed_seconds))
+    return 1 if failed else 0
@@ -1,10 +1,40 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import StrEnum
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
 class ProjectMode(StrEnum):
     ORGANIC = "organic"
     SEMI_DETACHED = "semi-detached"
     EMBEDDED = "embedded"
+    COCOMO_II = "cocomo2"
+
+class Backend(StrEnum):
+    NATIVE = "native"
+    CLOC = "cloc"
+
+class OutputFormat(StrEnum):
+    TABLE = "table"
+    JSON = "json"
+    JSONL = "jsonl"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+class DedupMode(StrEnum):
+    OFF = "off"
+    EXACT = "exact"
+    NEAR = "near"
+
+class ProfileFormat(StrEnum):
+    JSON = "json"
+    CHROME = "chrome"
+
+class CalibrationMethod(StrEnum):
+    OLS = "ols"
+    HUBER = "huber"
+
+class StaffingCurve(StrEnum):
+    RAYLEIGH = "rayleigh"
+    FLAT = "flat"
 
 @dataclass(frozen=True)
 class CocomoResult:
@@ -22,6 +52,380 @@ class CocomoResult:
     eaf: float
     is_intermediate: bool
 
+@dataclass(frozen=True)
+class CocomoBatchResult:
+    """
+    Columnar results of 'calculate_batch'. Each field holds one value per estimate,
+    as a list or as a NumPy array when the vectorized path was used.
+    """
+    kloc: Sequence[float]
+    mode: List[ProjectMode]
+    effort_person_months: Sequence[float]
+    development_time_months: Sequence[float]
+    people_required: Sequence[float]
+    total_cost: Sequence[float]
+    cost_per_month: Sequence[float]
+    eaf: Sequence[float]
+    is_intermediate: Sequence[bool]
+
+    def __len__(self) -> int:
+        return len(self.mode)
+
+    def __getitem__(self, index: int) -> CocomoResult:
+        return CocomoResult(
+            kloc=float(self.kloc[index]),
+            mode=self.mode[index],
+            effort_person_months=float(self.effort_person_months[index]),
+            development_time_months=float(self.development_time_months[index]),
+            people_required=float(self.people_required[index]),
+            total_cost=float(self.total_cost[index]),
+            cost_per_month=float(self.cost_per_month[index]),
+            eaf=float(self.eaf[index]),
+            is_intermediate=bool(self.is_intermediate[index]),
+        )
+
+    def __iter__(self) -> Iterator[CocomoResult]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def columns(self) -> Dict[str, Any]:
+        """Returns the columns as a dictionary, ready for a DataFrame or Arrow table."""
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+@dataclass(frozen=True)
+class DriverSensitivity:
+    """
+    How much one cost driver moves the estimate, the others staying at their baseline.
+    'effort_low' and 'effort_high' are the efforts at its least and most costly ratings,
+    'swing' their difference. 'variance_share' is its first-order Sobol index: the share
+    of the variance of the log-effort it explains when every rating is equally likely.
+    """
+    code: str
+    name: str
+    low_rating: str
+    high_rating: str
+    effort_low: float
+    effort_high: float
+    swing: float
+    variance_share: float
+
+@dataclass(frozen=True)
+class SensitivityResult:
+    """
+    Sensitivity of an estimate: the drivers in tornado order (largest swing first),
+    and the point elasticities of effort, schedule and cost ('elasticities[input][output]')
+    with respect to the KLOC, the EAF and the monthly cost.
+    """
+    baseline: CocomoResult
+    drivers: List[DriverSensitivity]
+    elasticities: Dict[str, Dict[str, float]]
+
+@dataclass(frozen=True)
+class DriverSweep:
+    """
+    The estimates of every combination of ratings of the swept drivers, in
+    'itertools.product' order of their ratings (the last driver varies fastest).
+    The columns are lists, or NumPy arrays when the vectorized path was used.
+    """
+    kloc: float
+    mode: ProjectMode
+    cost_per_month: float
+    ratings: Dict[str, Sequence[str]]
+    baseline: Dict[str, str]
+    eaf: Sequence[float]
+    effort_person_months: Sequence[float]
+    development_time_months: Sequence[float]
+
+    def __len__(self) -> int:
+        return len(self.effort_person_months)
+
+    def ratings_at(self, index: int) -> Dict[str, str]:
+        """The ratings of the swept drivers in the combination at 'index'."""
+        combination = {}
+        for code in reversed(list(self.ratings)):
+            index, position = divmod(index, len(self.ratings[code]))
+            combination[code] = self.ratings[code][position]
+        return dict(reversed(list(combination.items())))
+
+    def __getitem__(self, index: int) -> CocomoResult:
+        effort = float(self.effort_person_months[index])
+        time = float(self.development_time_months[index])
+        return CocomoResult(
+            kloc=self.kloc,
+            mode=self.mode,
+            effort_person_months=effort,
+            development_time_months=time,
+            people_required=effort / time if time > 0 else 0,
+            total_cost=effort * self.cost_per_month,
+            cost_per_month=self.cost_per_month,
+            eaf=float(self.eaf[index]),
+            is_intermediate=True
+        )
+
+@dataclass(frozen=True)
+class PortfolioTimeline:
+    """
+    Monthly staffing of a portfolio of estimates, on a timeline starting at month 0.
+    'headcount' is the staff of each month (person-months spent in the month),
+    'cost' its cost and 'active' the number of projects staffed in it. The columns
+    are lists, or NumPy arrays when the vectorized path was used. Month ranges are
+    half-open, like slices: 'peak_headcount(3, 6)' covers months 3, 4 and 5.
+    """
+    headcount: Sequence[float]
+    cost: Sequence[float]
+    active: Sequence[int]
+    n_projects: int
+    curve: StaffingCurve
+
+    def __len__(self) -> int:
+        return len(self.headcount)
+
+    def quarter(self, index: int) -> Tuple[int, int]:
+        """The (start, stop) months of a quarter, the first one being 0."""
+        return 3 * index, 3 * index + 3
+
+    def peak_headcount(self, start: int = 0, stop: Optional[int] = None) -> float:
+        """The largest monthly headcount between two months, 0 outside the timeline."""
+        return float(max(self.headcount[start:stop], default=0.0))
+
+    def peak_month(self, start: int = 0, stop: Optional[int] = None) -> Optional[int]:
+        """The first month of largest headcount between two months, or None outside the timeline."""
+        months = range(len(self))[start:stop]
+        return max(months, key=self.headcount.__getitem__) if months else None
+
+    def effort(self, start: int = 0, stop: Optional[int] = None) -> float:
+        """The person-months spent between two months."""
+        return float(sum(self.headcount[start:stop]))
+
+    def spend(self, start: int = 0, stop: Optional[int] = None) -> float:
+        """The cost incurred between two months."""
+        return float(sum(self.cost[start:stop]))
+
+    def quarterly_peaks(self) -> List[float]:
+        """The peak headcount of every quarter, the last one possibly partial."""
+        return [self.peak_headcount(start, start + 3) for start in range(0, len(self), 3)]
+
+    def over_capacity(self, capacity: float) -> List[int]:
+        """The months whose headcount exceeds the capacity."""
+        return [month for month, staff in enumerate(self.headcount) if staff > capacity]
+
+    def shortfall(self, capacity: float) -> float:
+        """The person-months above the capacity, summed over the timeline."""
+        return float(sum(max(staff - capacity, 0.0) for staff in self.headcount))
+
+    def columns(self) -> Dict[str, Any]:
+        """Returns the monthly columns as a dictionary, ready for a DataFrame or Arrow table."""
+        return {"month": list(range(len(self))), "headcount": self.headcount, "cost": self.cost, "active": self.active}
+
+@dataclass(frozen=True)
+class PercentileSummary:
+    """
+    Summary of a simulated quantity: its mean and the requested percentiles.
+    """
+    mean: float
+    percentiles: Dict[float, float]
+
+    @property
+    def p10(self) -> float:
+        return self.percentiles[10]
+
+    @property
+    def p50(self) -> float:
+        return self.percentiles[50]
+
+    @property
+    def p90(self) -> float:
+        return self.percentiles[90]
+
+@dataclass(frozen=True)
+class SimulationResult:
+    """
+    Data structure to store the results of a Monte Carlo simulation of the COCOMO estimate.
+    """
+    samples: int
+    mode: ProjectMode
+    effort_person_months: PercentileSummary
+    development_time_months: PercentileSummary
+    total_cost: PercentileSummary
+
+@dataclass(frozen=True)
+class ScanResult:
+    """
+    Outcome of estimating one repository during a multi-repository scan.
+    'result' is None and 'error' holds the reason when the repository failed.
+    """
+    path: str
+    result: Optional[CocomoResult]
+    error: Optional[str]
+    elapsed_seconds: float
+    report: Optional["LocReport"] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass(frozen=True)
+class WatchUpdate:
+    """
+    A live estimate emitted by 'watch': after the initial scan ('changed_files' is then
+    the number of files counted) and after every debounced batch of changes.
+    """
+    result: CocomoResult
+    report: "LocReport"
+    changed_files: int
+    elapsed_seconds: float
+
+@dataclass(frozen=True)
+class ScanSummary:
+    """
+    Totals of a multi-repository scan, summed from the successful ScanResults.
+    """
+    repositories: int
+    failed: int
+    kloc: float
+    effort_person_months: float
+    total_cost: float
+    elapsed_seconds: float
+
+@dataclass(frozen=True)
+class ModeFit:
+    """
+    The coefficients of a project mode fitted on historical projects, and their fit error.
+    MMRE is the mean magnitude of the relative error, PRED(25) the share of projects
+    estimated within 25% of their actual value. The schedule fields are None when
+    no project of the mode reported its duration.
+    """
+    a: float
+    b: float
+    c: float
+    d: float
+    n_projects: int
+    effort_mmre: float
+    effort_pred25: float
+    n_schedules: int = 0
+    schedule_mmre: Optional[float] = None
+    schedule_pred25: Optional[float] = None
+
+@dataclass(frozen=True)
+class Calibration:
+    """
+    A calibration profile: the fitted coefficients of each calibrated mode, which
+    'calculate' uses in place of COCOMO_MODES. Other modes keep the built-in values.
+    """
+    method: CalibrationMethod
+    modes: Dict[str, ModeFit]
+
+class FileCount(NamedTuple):
+    """Line counts of a single source file, as produced by the native counter."""
+    path: str
+    language: str
+    blank: int
+    comment: int
+    code: int
+
+@dataclass(frozen=True)
+class LanguageStats:
+    """
+    Line counts for one language (or for the whole project, in 'LocReport.total').
+    """
+    n_files: int = 0
+    blank: int = 0
+    comment: int = 0
+    code: int = 0
+
+    def __add__(self, other: "LanguageStats") -> "LanguageStats":
+        return LanguageStats(
+            n_files=self.n_files + other.n_files,
+            blank=self.blank + other.blank,
+            comment=self.comment + other.comment,
+            code=self.code + other.code,
+        )
+
+@dataclass(frozen=True)
+class LocReport:
+    """
+    Result of a line count, broken down per language.
+    'total' mirrors the 'SUM' entry of cloc's JSON output. With duplicate
+    detection, 'duplicates' holds the counts of the copies left out of it.
+    """
+    languages: Dict[str, LanguageStats] = field(default_factory=dict)
+    total: LanguageStats = field(default_factory=LanguageStats)
+    duplicates: LanguageStats = field(default_factory=LanguageStats)
+
+    @property
+    def kloc(self) -> float:
+        """The total thousands of lines of code ('KLOC')."""
+        return self.total.code / 1000.0
+
+    @property
+    def duplicate_kloc(self) -> float:
+        """The thousands of lines of code excluded as duplicates."""
+        return self.duplicates.code / 1000.0
+
+    def as_cloc_dict(self) -> Dict[str, Dict[str, int]]:
+        """Returns the counts in the same layout as 'cloc --json'."""
+        def entry(stats: LanguageStats) -> Dict[str, int]:
+            return {"nFiles": stats.n_files, "blank": stats.blank, "comment": stats.comment, "code": stats.code}
+
+        data = {language: entry(stats) for language, stats in self.languages.items()}
+        data["SUM"] = entry(self.total)
+        return data
+
+@dataclass(frozen=True)
+class LocTree:
+    """
+    Line counts of a directory subtree, per language, with its subdirectories.
+
+    'report' covers every file under the directory, subdirectories included,
+    so any node can be estimated on its own. A node is 'truncated' when the
+    depth limit folded deeper directories into it.
+    """
+    path: str = ""
+    report: LocReport = field(default_factory=LocReport)
+    children: Dict[str, "LocTree"] = field(default_factory=dict)
+    truncated: bool = False
+
+    @property
+    def name(self) -> str:
+        """The last component of the path ('' for the project root)."""
+        return self.path.rpartition("/")[2]
+
+    @property
+    def kloc(self) -> float:
+        """The thousands of lines of code of the subtree."""
+        return self.report.kloc
+
+    def subtree(self, path: str) -> "LocTree":
+        """
+        Finds a descendant by its '/'-separated path, relative to this node.
+
+        Raises:
+            KeyError: If the directory is not in the tree (no source files, or beyond the depth limit).
+        """
+        node = self
+        for part in (part for part in path.strip("/").split("/") if part not in ("", ".")):
+            if part not in node.children:
+                raise KeyError(f"No directory '{path}' in the line count tree.")
+            node = node.children[part]
+        return node
+
+    def walk(self, max_depth: Optional[int] = None) -> Iterator["LocTree"]:
+        """Yields this node and its descendants, depth first, down to 'max_depth' levels below it."""
+        yield self
+        if max_depth is None or max_depth > 0:
+            for child in self.children.values():
+                yield from child.walk(None if max_depth is None else max_depth - 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the tree as nested dictionaries, with the cloc-style counts of every node."""
+        return {
+            "path": self.path,
+            "kloc": self.kloc,
+            "truncated": self.truncated,
+            "languages": self.report.as_cloc_dict(),
+            "children": [child.as_dict() for child in self.children.values()],
+        }
+
 # Custom exceptions for the library
 class AnalysisError(Exception):
     """Generic error during source code analysis."""
@@ -31,3 +435,6 @@ class ClocNotFoundError(AnalysisError):
     """Exception raised when the 'cloc' command is not found."""
     pass
 
+class InvalidDriverError(ValueError):
+    """Exception raised in strict mode for an unknown cost driver or rating."""
+    pass
@@ -0,0 +1,220 @@
+"""
+Machine-readable serialization of estimates: JSON, JSON Lines, CSV and Parquet.
+
+Every writer accepts one record at a time and writes it out immediately
+(Parquet in small row groups), so long scans stream their results instead of
+buffering them. This module only depends on the standard library; pyarrow is
+imported when a Parquet writer is created.
+"""
+import csv
+import json
+import sys
+from typing import IO, Any, Dict, Optional
+
+from .models import CocomoResult, LocReport, LocTree
+
+FORMATS = ("json", "jsonl", "csv", "parquet")
+
+# Columns of the flat formats (CSV and Parquet). The per-language and per-directory
+# breakdowns are JSON strings.
+FIELDS = (
+    "path", "mode", "kloc", "duplicate_kloc", "eaf", "is_intermediate", "effort_person_months",
+    "development_time_months", "people_required", "cost_per_month", "total_cost",
+    "languages", "breakdown", "error", "elapsed_seconds",
+)
+
+
+def estimate_record(
+    result: Optional[CocomoResult],
+    report: Optional[LocReport] = None,
+    path: Optional[str] = None,
+    error: Optional[str] = None,
+    elapsed_seconds: Optional[float] = None,
+    tree: Optional[LocTree] = None
+) -> Dict[str, Any]:
+    """
+    Builds the serializable record of an estimate.
+
+    Args:
+        result: The estimate, or None if it failed.
+        report: The line count it was based on, for the per-language breakdown.
+        path: The analyzed project.
+        error: The reason of a failure.
+        elapsed_seconds: The time taken by the analysis and the estimate.
+        tree: The per-directory line counts, for the 'breakdown' field.
+
+    Returns:
+        A dictionary with the FIELDS keys; 'languages' maps each language to its counts,
+        'duplicate_kloc' is the code left out as duplicates and 'breakdown' is the
+        nested directory tree (see 'LocTree.as_dict').
+    """
+    record: Dict[str, Any] = dict.fromkeys(FIELDS)
+    record["path"] = path
+    if result is not None:
+        record.update(
+            mode=str(result.mode),
+            kloc=result.kloc,
+            eaf=result.eaf,
+            is_intermediate=result.is_intermediate,
+            effort_person_months=result.effort_person_months,
+            development_time_months=result.development_time_months,
+            people_required=result.people_required,
+            cost_per_month=result.cost_per_month,
+            total_cost=result.total_cost,
+        )
+    if report is not None:
+        record["duplicate_kloc"] = report.duplicate_kloc
+        record["languages"] = {
+            language: {"n_files": stats.n_files, "blank": stats.blank, "comment": stats.comment, "code": stats.code}
+            for language, stats in report.languages.items()
+        }
+    if tree is not None:
+        record["breakdown"] = tree.as_dict()
+    record["error"] = error
+    record["elapsed_seconds"] = elapsed_seconds
+    return record
+
+
+def open_writer(format: str, output: Optional[str] = None, single: bool = False):
+    """
+    Creates the writer of a format.
+
+    Args:
+        format: One of FORMATS.
+        output: The destination file, or None / '-' for the standard output.
+        single: For 'json', write one object instead of an array of records.
+
+    Returns:
+        A writer with 'write(record)' and 'close()', usable as a context manager.
+
+    Raises:
+        ValueError: If the format is unknown, or Parquet is written to the standard output.
+    """
+    to_stdout = output in (None, "-")
+    if format == "parquet":
+        if to_stdout:
+            raise ValueError("Parquet output needs a file: pass '--output'.")
+        return ParquetWriter(output)
+    if format not in FORMATS:
+        raise ValueError(f"Invalid format '{format}'. Choose from {', '.join(FORMATS)}")
+
+    stream = sys.stdout if to_stdout else open(output, "w", encoding="utf-8", newline="")
+    if format == "json":
+        return JsonWriter(stream, single=single, owned=not to_stdout)
+    if format == "jsonl":
+        return JsonLinesWriter(stream, owned=not to_stdout)
+    return CsvWriter(stream, owned=not to_stdout)
+
+
+class _StreamWriter:
+    def __init__(self, stream: IO[str], owned: bool = False):
+        self._stream = stream
+        self._owned = owned
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stream.flush()
+        if self._owned:
+            self._stream.close()
+
+
+class JsonLinesWriter(_StreamWriter):
+    """One JSON object per line."""
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._stream.write(json.dumps(record) + "\n")
+        self._stream.flush()
+
+
+class JsonWriter(_StreamWriter):
+    """A JSON array of records, written element by element (or a single object)."""
+
+    def __init__(self, stream: IO[str], single: bool = False, owned: bool = False):
+        super().__init__(stream, owned)
+        self._single = single
+        self._count = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._single:
+            if self._count:
+                raise ValueError("A single-object JSON writer accepts only one record.")
+            self._stream.write(json.dumps(record, indent=2))
+        else:
+            self._stream.write(("[\n  " if self._count == 0 else ",\n  ") + json.dumps(record))
+        self._count += 1
+        self._stream.flush()
+
+    def close(self) -> None:
+        if not self._single:
+            self._stream.write("[]" if self._count == 0 else "\n]")
+        self._stream.write("\n")
+        super().close()
+
+
+class CsvWriter(_StreamWriter):
+    """Comma-separated values with a header row; 'languages' is a JSON string."""
+
+    def __init__(self, stream: IO[str], owned: bool = False):
+        super().__init__(stream, owned)
+        self._writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        self._writer.writeheader()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._writer.writerow(_flatten(record))
+        self._stream.flush()
+
+
+class ParquetWriter:
+    """A Parquet file written in row groups of 'row_group_size' records. Requires pyarrow."""
+
+    def __init__(self, path: str, row_group_size: int = 1024):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow. Install it with 'pip install cocomo-py[parquet]'.")
+        self._pa = pa
+        self._schema = pa.schema([
+            ("path", pa.string()), ("mode", pa.string()), ("kloc", pa.float64()),
+            ("duplicate_kloc", pa.float64()), ("eaf", pa.float64()),
+            ("is_intermediate", pa.bool_()), ("effort_person_months", pa.float64()),
+            ("development_time_months", pa.float64()), ("people_required", pa.float64()),
+            ("cost_per_month", pa.float64()), ("total_cost", pa.float64()), ("languages", pa.string()),
+            ("breakdown", pa.string()), ("error", pa.string()), ("elapsed_seconds", pa.float64()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._row_group_size = row_group_size
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._rows.append(_flatten(record))
+        if len(self._rows) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+def _flatten(record: Dict[str, Any]) -> Dict[str, Any]:
+    flat = dict(record)
+    for key in ("languages", "breakdown"):
+        if flat.get(key) is not None:
+            flat[key] = json.dumps(flat[key])
+    return flat
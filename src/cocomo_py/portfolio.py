@@ -0,0 +1,149 @@
+"""
+Staffing of a portfolio of estimates on a shared monthly timeline.
+
+'people_required' is the average staff of a project over its schedule. Real
+projects ramp up and down: following Putnam and Norden, the staff of a project
+of effort K and schedule T follows a Rayleigh curve, whose cumulative effort is
+
+    E(t) = K * (1 - exp(-3 * (t / T)**2)) / (1 - exp(-3))
+
+The shape 3 puts the staffing peak at T / sqrt(6), about 40% of the schedule,
+and 95% of the effort under the untruncated curve before T; the curve is cut at
+T and rescaled so the whole effort falls within the COCOMO schedule.
+
+The effort of a month is the difference of E at its boundaries, so the months
+of a project always add up to its effort, whatever its start and schedule (in
+fractional months). With NumPy the boundaries of a chunk of projects form one
+(projects, months) matrix, and the monthly efforts are scattered onto the
+timeline with 'bincount': the cost is a few array operations per chunk, not
+per project.
+"""
+import math
+from typing import Optional, Sequence, Union
+
+from .calculator import load_numpy
+from .models import CocomoBatchResult, CocomoResult, PortfolioTimeline, StaffingCurve
+
+# Shape of the Rayleigh curve: the share of the effort under the untruncated curve
+# before the end of the schedule is 1 - exp(-_SHAPE), i.e. 95%.
+_SHAPE = 3.0
+
+# Cumulative share of the untruncated curve at the end of the schedule, -expm1(-_SHAPE).
+_RAYLEIGH_TOTAL = -math.expm1(-_SHAPE)
+
+# Largest (projects, months) matrices of the NumPy path, in cells.
+_CHUNK_CELLS = 1 << 20
+
+
+def portfolio(
+    estimates: Union[Sequence[CocomoResult], CocomoBatchResult],
+    start_months: Optional[Sequence[float]] = None,
+    curve: StaffingCurve = StaffingCurve.RAYLEIGH,
+    use_numpy: Optional[bool] = None
+) -> PortfolioTimeline:
+    """
+    Spreads the effort and cost of many estimates month by month and sums them.
+
+    Args:
+        estimates: The estimates, a list of CocomoResult or a CocomoBatchResult.
+        start_months: The month each project starts, counted from the start of the
+                      timeline and possibly fractional. Defaults to 0 for every project.
+        curve: 'rayleigh' to ramp the staff up and down along a Rayleigh curve, 'flat'
+               to keep 'people_required' for the whole schedule.
+        use_numpy: Forces (True) or disables (False) the vectorized NumPy path.
+                   By default NumPy is used when it is installed.
+
+    Returns:
+        A PortfolioTimeline from month 0 to the end of the last project.
+
+    Raises:
+        ValueError: If the curve is invalid, or the start months are negative or do
+                    not match the estimates.
+    """
+    curve = StaffingCurve(curve)
+    if isinstance(estimates, CocomoBatchResult):
+        effort = estimates.effort_person_months
+        schedule = estimates.development_time_months
+        cost_per_month = estimates.cost_per_month
+    else:
+        effort = [result.effort_person_months for result in estimates]
+        schedule = [result.development_time_months for result in estimates]
+        cost_per_month = [result.cost_per_month for result in estimates]
+    n_projects = len(effort)
+    if start_months is None:
+        start_months = [0.0] * n_projects
+    if len(start_months) != n_projects:
+        raise ValueError(f"Got {len(start_months)} start months for {n_projects} estimates.")
+    if not all(0 <= start < math.inf for start in start_months):
+        raise ValueError("Start months must be finite and non-negative.")
+
+    np = load_numpy(use_numpy)
+    if np is not None:
+        headcount, cost, active = _timeline_numpy(np, effort, schedule, cost_per_month, start_months, curve)
+    else:
+        headcount, cost, active = _timeline_python(effort, schedule, cost_per_month, start_months, curve)
+    return PortfolioTimeline(headcount=headcount, cost=cost, active=active, n_projects=n_projects, curve=curve)
+
+
+def _timeline_numpy(np, effort, schedule, cost_per_month, start_months, curve: StaffingCurve):
+    effort = np.asarray(effort, dtype=float)
+    schedule = np.asarray(schedule, dtype=float)
+    monthly_cost = effort * np.asarray(cost_per_month, dtype=float)
+    starts = np.asarray(start_months, dtype=float)
+    # A project is staffed from the month it starts in to the month it ends in.
+    first = np.floor(starts).astype(np.int64)
+    spans = np.maximum(np.ceil(starts + schedule).astype(np.int64) - first, 1)
+    n_months = int((first + spans).max()) if len(spans) else 0
+    headcount = np.zeros(n_months)
+    cost = np.zeros(n_months)
+    active = np.zeros(n_months, dtype=np.int64)
+
+    # Chunks of projects of similar spans, longest first, keep the padded matrices small.
+    order = np.argsort(-spans, kind="stable")
+    begin = 0
+    while begin < len(order):
+        width = int(spans[order[begin]])
+        chunk = order[begin:begin + max(1, _CHUNK_CELLS // (width + 1))]
+        begin += len(chunk)
+        steps = np.arange(width + 1)
+        bounds = first[chunk, None] + steps
+        length = schedule[chunk, None]
+        elapsed = np.clip(bounds - starts[chunk, None], 0.0, length)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # A project without a schedule spends its whole effort in its first month.
+            progress = np.where(length > 0, elapsed / length, steps >= 1)
+        if curve == StaffingCurve.RAYLEIGH:
+            progress = -np.expm1(-_SHAPE * progress * progress) / _RAYLEIGH_TOTAL
+        shares = np.diff(progress, axis=1)
+        staffed = (steps[:-1] < spans[chunk, None]) & (shares > 0) & (effort[chunk, None] > 0)
+        months = bounds[:, :-1][staffed]
+        headcount += np.bincount(months, weights=(effort[chunk, None] * shares)[staffed], minlength=n_months)
+        cost += np.bincount(months, weights=(monthly_cost[chunk, None] * shares)[staffed], minlength=n_months)
+        active += np.bincount(months, minlength=n_months)
+    return headcount, cost, active
+
+
+def _timeline_python(effort, schedule, cost_per_month, start_months, curve: StaffingCurve):
+    ends = [math.floor(start) + max(math.ceil(start + length) - math.floor(start), 1)
+            for start, length in zip(start_months, schedule)]
+    n_months = max(ends, default=0)
+    headcount = [0.0] * n_months
+    cost = [0.0] * n_months
+    active = [0] * n_months
+    rayleigh = curve == StaffingCurve.RAYLEIGH
+    for total, length, rate, start, end in zip(effort, schedule, cost_per_month, start_months, ends):
+        done = 0.0
+        for month in range(math.floor(start), end):
+            if length > 0:
+                progress = min(max(month + 1 - start, 0.0) / length, 1.0)
+            else:
+                progress = 1.0
+            if rayleigh:
+                progress = -math.expm1(-_SHAPE * progress * progress) / _RAYLEIGH_TOTAL
+            share = progress - done
+            done = progress
+            if share > 0 and total > 0:
+                headcount[month] += total * share
+                cost[month] += total * rate * share
+                active[month] += 1
+    return headcount, cost, active
@@ -0,0 +1,177 @@
+"""
+Estimation of many repositories at once.
+
+Repositories are analyzed concurrently by a pool of worker processes, one
+repository per task. Results are streamed as soon as each repository is done,
+and a failing repository is reported instead of aborting the run.
+"""
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .analyzer import analyze_loc
+from .cache import LocCache
+from .calculator import calculate
+from .models import Backend, Calibration, DedupMode, ProjectMode, ScanResult, ScanSummary
+
+
+def read_manifest(manifest: Path) -> List[Path]:
+    """
+    Reads a manifest file with one repository path per line.
+
+    Blank lines and lines starting with '#' are ignored. Relative paths are
+    resolved against the directory of the manifest.
+
+    Args:
+        manifest: The path to the manifest file.
+
+    Returns:
+        The repository paths, in the order of the manifest.
+    """
+    base = Path(manifest).parent
+    paths = []
+    for line in Path(manifest).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            paths.append((base / line).resolve())
+    return paths
+
+
+def collect_repositories(
+    paths: Iterable[Path] = (),
+    manifest: Optional[Path] = None,
+    root: Optional[Path] = None,
+    pattern: str = "*"
+) -> List[Path]:
+    """
+    Gathers the repositories to scan from explicit paths, a manifest and a workspace glob.
+
+    Returns:
+        The paths, followed by the manifest entries and the matching workspace directories.
+    """
+    repositories = [Path(path) for path in paths]
+    if manifest is not None:
+        repositories += read_manifest(manifest)
+    if root is not None:
+        repositories += discover_repositories(root, pattern)
+    return repositories
+
+
+def discover_repositories(root: Path, pattern: str = "*") -> List[Path]:
+    """
+    Lists the directories of a workspace matching a glob pattern.
+
+    Args:
+        root: The workspace root.
+        pattern: A glob relative to the root (e.g. '*' or 'services/*').
+
+    Returns:
+        The matching directories, sorted by path.
+    """
+    return sorted(path.resolve() for path in Path(root).glob(pattern) if path.is_dir())
+
+
+def scan_repositories(
+    paths: Iterable[Path],
+    mode: ProjectMode,
+    cost_per_month: float,
+    drivers: Optional[Dict[str, str]] = None,
+    workers: Optional[int] = None,
+    backend: Backend = Backend.NATIVE,
+    cache_path: Optional[Path] = None,
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    calibration: Optional[Calibration] = None
+) -> Iterator[ScanResult]:
+    """
+    Estimates every repository concurrently and yields the results as they finish.
+
+    Args:
+        paths: The repository paths.
+        mode: The project mode used for every repository.
+        cost_per_month: The average monthly cost of a developer.
+        drivers: Optional cost driver ratings used for every repository.
+        workers: Number of worker processes. Defaults to the number of CPUs.
+        backend: The line counting engine.
+        cache_path: An optional LocCache database shared by the workers.
+        exclude: Extra globs ignored in every repository, on top of its own
+                 .gitignore files and '.cocomo.toml'.
+        dedup: Count the duplicated files of each repository once ('exact' or 'near').
+        calibration: An optional calibration profile used for every estimate.
+
+    Yields:
+        A ScanResult per repository, in completion order. Failures are reported
+        in the result's 'error' instead of being raised.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _scan_one, str(path), mode, cost_per_month, drivers, backend, cache_path, tuple(exclude), dedup,
+                calibration
+            ): str(path)
+            for path in paths
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:  # The worker itself died (e.g. out of memory).
+                yield ScanResult(path=futures[future], result=None, error=f"Worker failed: {e}", elapsed_seconds=0.0)
+
+
+def summarize(results: Iterable[ScanResult], elapsed_seconds: float = 0.0) -> ScanSummary:
+    """
+    Totals the results of a scan. Only successful repositories contribute to the sums.
+
+    Args:
+        results: The ScanResults.
+        elapsed_seconds: The wall-clock duration of the whole scan.
+
+    Returns:
+        A ScanSummary.
+    """
+    repositories = failed = 0
+    kloc = effort = cost = 0.0
+    for scan in results:
+        repositories += 1
+        if scan.result is None:
+            failed += 1
+            continue
+        kloc += scan.result.kloc
+        effort += scan.result.effort_person_months
+        cost += scan.result.total_cost
+    return ScanSummary(
+        repositories=repositories,
+        failed=failed,
+        kloc=kloc,
+        effort_person_months=effort,
+        total_cost=cost,
+        elapsed_seconds=elapsed_seconds
+    )
+
+
+def _scan_one(
+    path: str,
+    mode: ProjectMode,
+    cost_per_month: float,
+    drivers: Optional[Dict[str, str]],
+    backend: Backend,
+    cache_path: Optional[Path],
+    exclude: Sequence[str] = (),
+    dedup: DedupMode = DedupMode.OFF,
+    calibration: Optional[Calibration] = None
+) -> ScanResult:
+    """Analyzes and estimates one repository. Runs inside the worker processes."""
+    start = time.perf_counter()
+    try:
+        # Repositories are already spread across processes, so each one is counted serially.
+        if cache_path is not None and backend == Backend.NATIVE:
+            with LocCache(cache_path) as cache:
+                report = analyze_loc(Path(path), backend=backend, jobs=1, cache=cache, exclude=exclude, dedup=dedup)
+        else:
+            report = analyze_loc(Path(path), backend=backend, jobs=1, exclude=exclude, dedup=dedup)
+        result = calculate(report.kloc, mode, cost_per_month, drivers, calibration=calibration)
+    except Exception as e:
+        return ScanResult(path=path, result=None, error=str(e), elapsed_seconds=time.perf_counter() - start)
+    return ScanResult(path=path, result=result, error=None, elapsed_seconds=time.perf_counter() - start, report=report)
@@ -0,0 +1,256 @@
+"""
+Sensitivity of COCOMO estimates to the cost drivers.
+
+The effort is the nominal effort times one multiplier per driver, so its
+logarithm is a sum of one term per driver. That makes the analyses below
+cheap and exact:
+
+- the tornado moves one driver at a time over its ratings, the others
+  staying at their baseline;
+- the variance of the log-effort over all rating combinations is the sum of
+  the per-driver variances, so the first-order Sobol indices are exact
+  ratios, without sampling (they are also the total-order indices: the
+  drivers do not interact on the log scale);
+- the grid sweep builds the EAF of every combination from prefix products:
+  the product of the first k drivers is computed once per combination of
+  their ratings and shared by every combination extending it, so a grid of
+  N combinations costs about N multiplications. The schedule, c * effort**d,
+  is a product as well (of the multipliers raised to d), built the same way.
+
+For COCOMO II a scale factor adds 0.01 * SF to the exponent, i.e. a term
+0.01 * SF * ln(KSLOC) to the log-effort: still one term per driver. Its
+schedule exponent mixes the scale factors with the effort, though, so COCOMO II
+sweeps go through 'calculate_batch', which resolves each rating once.
+"""
+import itertools
+import math
+from statistics import pvariance
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from .calculator import calculate, calculate_batch, load_numpy, mode_parameters
+from .constants import COCOMO2_SCALE_FACTORS, COCOMO_MODES, COST_DRIVERS
+from .drivers import COCOMO2_DRIVERS, Cocomo2Profile, cocomo2_value, multiplier, resolve_profile
+from .models import Calibration, DriverSensitivity, DriverSweep, InvalidDriverError, ProjectMode, SensitivityResult
+
+# Largest grid 'sweep' builds by default: a few columns of 8 bytes per combination.
+DEFAULT_MAX_COMBINATIONS = 10_000_000
+
+
+def sensitivity(
+    kloc: float,
+    mode: ProjectMode,
+    cost_per_month: float,
+    drivers: Optional[Mapping[str, str]] = None,
+    codes: Optional[Sequence[str]] = None,
+    calibration: Optional[Calibration] = None
+) -> SensitivityResult:
+    """
+    Ranks the cost drivers by how much they move the estimate.
+
+    Args:
+        kloc: Kilo Lines of Code.
+        mode: The project mode; with 'cocomo2' the COCOMO II drivers are analyzed.
+        cost_per_month: The average monthly cost of a developer.
+        drivers: The baseline ratings. Unrated drivers are nominal.
+        codes: The drivers to analyze. Defaults to every driver of the model.
+        calibration: An optional calibration profile, see 'calculate'.
+
+    Returns:
+        A SensitivityResult with the drivers in tornado order and the elasticities.
+
+    Raises:
+        ValueError: If the mode is invalid.
+        InvalidDriverError: If a driver or rating is invalid.
+    """
+    catalog = _catalog(mode)
+    baseline_ratings = dict(drivers or {})
+    baseline = calculate(kloc, mode, cost_per_month, baseline_ratings, strict=True, calibration=calibration)
+    params = mode_parameters(mode, calibration)
+    log_kloc = math.log(kloc) if kloc > 0 else 0.0
+
+    rows = []
+    variances = []
+    for code in _codes(codes, catalog):
+        others = {key: value for key, value in baseline_ratings.items() if key.lower() != code}
+        efforts = {
+            rating: calculate(kloc, mode, cost_per_month, {**others, code: rating}, calibration=calibration).effort_person_months
+            for rating in catalog[code]['ratings']
+        }
+        low = min(efforts, key=efforts.__getitem__)
+        high = max(efforts, key=efforts.__getitem__)
+        rows.append((code, low, high, efforts[low], efforts[high]))
+        variances.append(pvariance([_log_term(mode, code, rating, log_kloc) for rating in catalog[code]['ratings']]))
+
+    total_variance = math.fsum(variances)
+    result = [
+        DriverSensitivity(
+            code=code,
+            name=catalog[code]['name'],
+            low_rating=low,
+            high_rating=high,
+            effort_low=effort_low,
+            effort_high=effort_high,
+            swing=effort_high - effort_low,
+            variance_share=variance / total_variance if total_variance > 0 else 0.0
+        )
+        for (code, low, high, effort_low, effort_high), variance in zip(rows, variances)
+    ]
+    result.sort(key=lambda row: row.swing, reverse=True)
+    return SensitivityResult(baseline=baseline, drivers=result, elasticities=_elasticities(mode, params, baseline_ratings))
+
+
+def sweep(
+    kloc: float,
+    mode: ProjectMode,
+    cost_per_month: float,
+    codes: Sequence[str],
+    drivers: Optional[Mapping[str, str]] = None,
+    calibration: Optional[Calibration] = None,
+    use_numpy: Optional[bool] = None,
+    max_combinations: int = DEFAULT_MAX_COMBINATIONS
+) -> DriverSweep:
+    """
+    Estimates every combination of ratings of some drivers.
+
+    Args:
+        kloc: Kilo Lines of Code.
+        mode: The project mode.
+        cost_per_month: The average monthly cost of a developer.
+        codes: The drivers swept over all their ratings.
+        drivers: Fixed ratings of the other drivers.
+        calibration: An optional calibration profile, see 'calculate'.
+        use_numpy: Forces (True) or disables (False) the NumPy path. By default
+                   NumPy is used when it is installed.
+        max_combinations: Refuse grids larger than this.
+
+    Returns:
+        A DriverSweep: one estimate per combination, with the fixed ratings followed by
+        the combination. The EAF and effort are identical to those of 'calculate'. The
+        schedule is built from prefix products, so it may differ from 'calculate' in the
+        last bits (relative differences below 1e-15); COCOMO II sweeps go through
+        'calculate_batch' and are identical.
+
+    Raises:
+        ValueError: If the mode is invalid or the grid is larger than 'max_combinations'.
+        InvalidDriverError: If a driver or rating is invalid.
+    """
+    catalog = _catalog(mode)
+    codes = _codes(codes, catalog)
+    ratings = {code: tuple(catalog[code]['ratings']) for code in codes}
+    size = math.prod(len(values) for values in ratings.values())
+    if size > max_combinations:
+        raise ValueError(
+            f"The grid has {size:,} combinations, more than {max_combinations:,}. Sweep fewer drivers."
+        )
+    fixed = {key.lower(): value.lower() for key, value in (drivers or {}).items() if key.lower() not in ratings}
+    for code, rating in fixed.items():
+        _value(mode, code, rating)
+
+    np = load_numpy(use_numpy)
+    if mode == ProjectMode.COCOMO_II:
+        return _sweep_batch(np, kloc, mode, cost_per_month, ratings, fixed, calibration)
+
+    params = mode_parameters(mode, calibration)
+    # Same operation order as 'calculate': the fixed ratings first, then the swept ones.
+    base = resolve_profile(fixed, True).eaf if fixed else 1.0
+    nominal_effort = params['a'] * (kloc ** params['b'])
+    eaf = [base]
+    schedule = [params['c'] * (nominal_effort * base) ** params['d']]
+    if np is not None:
+        eaf, schedule = np.array(eaf), np.array(schedule)
+    for code, values in ratings.items():
+        multipliers = [multiplier(code, rating) for rating in values]
+        eaf = _outer(np, eaf, multipliers)
+        schedule = _outer(np, schedule, [m ** params['d'] for m in multipliers])
+    effort = nominal_effort * eaf if np is not None else [nominal_effort * value for value in eaf]
+    return DriverSweep(
+        kloc=kloc,
+        mode=ProjectMode(mode),
+        cost_per_month=cost_per_month,
+        ratings=ratings,
+        baseline=fixed,
+        eaf=eaf,
+        effort_person_months=effort,
+        development_time_months=schedule
+    )
+
+
+def _outer(np, prefix, factors):
+    """Extends every prefix product by every factor, the factors varying fastest."""
+    if np is not None:
+        return np.multiply.outer(prefix, np.asarray(factors)).ravel()
+    return [value * factor for value in prefix for factor in factors]
+
+
+def _sweep_batch(np, kloc, mode, cost_per_month, ratings, fixed, calibration) -> DriverSweep:
+    """Sweeps through 'calculate_batch', with one rating column per swept driver."""
+    size = math.prod(len(values) for values in ratings.values())
+    if np is not None:
+        columns, repeat = {}, size
+        for code, values in ratings.items():
+            repeat //= len(values)
+            columns[code] = np.tile(np.repeat(np.array(values, dtype=object), repeat), size // (repeat * len(values)))
+    else:
+        columns = dict(zip(ratings, map(list, zip(*itertools.product(*ratings.values()))))) if ratings else {}
+    batch = calculate_batch(
+        [kloc] * size, mode, cost_per_month, drivers={**fixed, **columns},
+        use_numpy=np is not None, strict=True, calibration=calibration
+    )
+    return DriverSweep(
+        kloc=kloc,
+        mode=ProjectMode(mode),
+        cost_per_month=cost_per_month,
+        ratings=ratings,
+        baseline=fixed,
+        eaf=batch.eaf,
+        effort_person_months=batch.effort_person_months,
+        development_time_months=batch.development_time_months
+    )
+
+
+def _elasticities(mode, params, ratings) -> Dict[str, Dict[str, float]]:
+    """
+    d ln(output) / d ln(input) at the baseline. The effort grows as KLOC**b (KSLOC**E for
+    COCOMO II) and the schedule as effort**d (PM_NS**F), the staffing being their ratio.
+    """
+    exponent, schedule_exponent = params['b'], params['d']
+    if mode == ProjectMode.COCOMO_II:
+        exponent = params['b'] + 0.01 * Cocomo2Profile(ratings).scale
+        schedule_exponent = params['d'] + 0.2 * (exponent - params['b'])
+    rows = {
+        "kloc": (exponent, exponent * schedule_exponent, exponent),
+        "eaf": (1.0, schedule_exponent, 1.0),
+        "cost_per_month": (0.0, 0.0, 1.0),
+    }
+    return {
+        name: {"effort": effort, "schedule": schedule, "people": effort - schedule, "cost": cost}
+        for name, (effort, schedule, cost) in rows.items()
+    }
+
+
+def _log_term(mode, code: str, rating: str, log_kloc: float) -> float:
+    """The term a rating adds to the log-effort."""
+    if mode == ProjectMode.COCOMO_II and code in COCOMO2_SCALE_FACTORS:
+        return 0.01 * cocomo2_value(code, rating) * log_kloc
+    return math.log(_value(mode, code, rating))
+
+
+def _value(mode, code: str, rating: str) -> float:
+    return cocomo2_value(code, rating) if mode == ProjectMode.COCOMO_II else multiplier(code, rating)
+
+
+def _catalog(mode) -> Mapping[str, dict]:
+    if mode not in COCOMO_MODES:
+        raise ValueError(f"Invalid mode '{mode}'. Choose from {', '.join(COCOMO_MODES.keys())}")
+    return COCOMO2_DRIVERS if mode == ProjectMode.COCOMO_II else COST_DRIVERS
+
+
+def _codes(codes: Optional[Sequence[str]], catalog: Mapping[str, dict]) -> List[str]:
+    """Normalizes and checks driver codes; None means every driver of the catalog."""
+    if codes is None:
+        return list(catalog)
+    normalized = list(dict.fromkeys(code.lower() for code in codes))
+    for code in normalized:
+        if code not in catalog:
+            raise InvalidDriverError(f"Invalid cost driver '{code}'. Choose from {', '.join(catalog)}")
+    return normalized
@@ -0,0 +1,366 @@
+"""
+Long-running estimation service with an HTTP/JSON API ('cocomo serve').
+
+The server is a small HTTP/1.1 implementation on top of asyncio streams, so
+it only depends on the standard library. Cheap requests ('/calculate') are
+answered on the event loop; repository analysis runs in a process pool, so a
+long scan never delays them.
+
+Estimates are cached in an LRU keyed by (repository path, tree fingerprint,
+mode, drivers, ...). The fingerprint only stats the source files (or resolves
+the git tree of a revision), so an unchanged repository is answered without
+counting a single line. Concurrent requests for the same repository and
+fingerprint share a single scan.
+
+Endpoints:
+    GET  /health      -> {"status": "ok", "version": ...}
+    GET  /stats       -> cache and scan counters
+    POST /calculate   {"kloc", "mode", "cost_per_month", "drivers"} -> estimate record
+    POST /estimate    {"path", "mode", "cost_per_month", "drivers", "revision",
+                       "backend", "breakdown", "depth", "exclude"} -> estimate record
+"""
+import asyncio
+import json
+import math
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+from . import __version__
+from .analyzer import analyze_tree, fingerprint_tree
+from .cache import LocCache
+from .calculator import calculate
+from .models import AnalysisError, Backend, LocTree, ProjectMode
+from .output import estimate_record
+
+# Default number of estimates kept by the result cache.
+DEFAULT_CACHE_SIZE = 1024
+
+# Largest request body accepted, in bytes.
+MAX_BODY_SIZE = 1 << 20
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """An error answered to the client with the given status code."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class EstimationService:
+    """
+    The request handlers, the result cache and the scan coalescing of 'cocomo serve'.
+
+    Use it as a context manager, so the process pool is shut down.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_path: Optional[Path] = None,
+        roots: Sequence[Path] = ()
+    ):
+        """
+        Args:
+            workers: Number of analysis processes. Defaults to the number of CPUs.
+            cache_size: Maximum number of estimates kept in memory.
+            cache_path: An optional LocCache database used by the analysis processes.
+            roots: If given, only repositories inside these directories can be analyzed.
+        """
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.roots = [Path(root).resolve() for root in roots]
+        # The event loop runs threads (fingerprints), and forking a threaded process can
+        # deadlock the child: workers are started from a clean fork server instead.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self._results: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._scans: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "scans": 0, "coalesced": 0}
+
+    def __enter__(self) -> "EstimationService":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    async def handle(self, method: str, path: str, body: bytes) -> Dict[str, Any]:
+        """
+        Answers one request.
+
+        Raises:
+            HttpError: If the route, the method or the request is invalid.
+        """
+        self.stats["requests"] += 1
+        if path == "/health":
+            _expect(method, "GET")
+            return {"status": "ok", "version": __version__}
+        if path == "/stats":
+            _expect(method, "GET")
+            return dict(self.stats, cached_estimates=len(self._results), running_scans=len(self._scans))
+        if path == "/calculate":
+            _expect(method, "POST")
+            return self.calculate(_parse_json(body))
+        if path == "/estimate":
+            _expect(method, "POST")
+            return await self.estimate(_parse_json(body))
+        raise HttpError(404, f"No route for '{path}'.")
+
+    def calculate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answers '/calculate': an estimate from a known KLOC, computed on the event loop."""
+        try:
+            kloc = float(request["kloc"])
+        except (KeyError, TypeError, ValueError):
+            raise HttpError(400, "'kloc' is required and must be a number.")
+        if not 0 <= kloc < math.inf:
+            raise HttpError(400, "'kloc' must be a finite, non-negative number.")
+        mode, cost_per_month, drivers = _estimate_parameters(request)
+        result = calculate(kloc, mode, cost_per_month, drivers)
+        return estimate_record(result)
+
+    async def estimate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answers '/estimate': analyzes a repository (or reuses a cached analysis) and estimates it."""
+        start = time.perf_counter()
+        path = request.get("path")
+        if not isinstance(path, str) or not path:
+            raise HttpError(400, "'path' is required.")
+        project = Path(path).resolve()
+        if self.roots and not any(project.is_relative_to(root) for root in self.roots):
+            raise HttpError(400, f"'{path}' is outside the directories served.")
+        mode, cost_per_month, drivers = _estimate_parameters(request)
+        revision = request.get("revision")
+        breakdown = bool(request.get("breakdown"))
+        depth = request.get("depth", 2) if breakdown else 0
+        if not isinstance(depth, int) or depth < 0:
+            raise HttpError(400, "'depth' must be a non-negative integer.")
+        try:
+            backend = Backend(str(request.get("backend", Backend.NATIVE)).lower())
+        except ValueError:
+            raise HttpError(400, f"Invalid backend. Choose from {', '.join(Backend)}")
+        exclude = request.get("exclude") or []
+        if not isinstance(exclude, list) or not all(isinstance(glob, str) for glob in exclude):
+            raise HttpError(400, "'exclude' must be a list of globs.")
+        exclude = tuple(exclude)
+
+        loop = asyncio.get_running_loop()
+        try:
+            fingerprint = await loop.run_in_executor(None, _fingerprint, project, revision, exclude)
+        except AnalysisError as e:
+            raise HttpError(422, str(e))
+        except ValueError as e:
+            raise HttpError(400, str(e))
+
+        analysis_key = (str(project), fingerprint, revision, backend, depth, exclude)
+        # The scan is shared whatever 'breakdown', but only a breakdown record holds the tree.
+        key = analysis_key + (breakdown, mode, cost_per_month, tuple(sorted(drivers.items())))
+        if fingerprint is not None and key in self._results:
+            self._results.move_to_end(key)
+            self.stats["hits"] += 1
+            return dict(self._results[key], cached=True)
+        self.stats["misses"] += 1
+
+        try:
+            tree = await self._analyze(analysis_key)
+        except AnalysisError as e:
+            raise HttpError(422, str(e))
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        result = calculate(tree.kloc, mode, cost_per_month, drivers)
+        record = estimate_record(
+            result, tree.report, path=str(project), elapsed_seconds=time.perf_counter() - start,
+            tree=tree if breakdown else None
+        )
+        # A tree that is still changing (no fingerprint) is never cached, though concurrent
+        # requests for it still share the scan.
+        if fingerprint is not None:
+            self._results[key] = record
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return dict(record, cached=False)
+
+    async def _analyze(self, key: Tuple) -> LocTree:
+        """Runs the analysis in the process pool, joining a scan of the same tree already running."""
+        if key in self._scans:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._scans[key])
+        project, _, revision, backend, depth, exclude = key
+        self.stats["scans"] += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self._pool, _analyze, project, revision, backend, depth, exclude, self.cache_path
+        )
+        self._scans[key] = future
+        try:
+            # Shielded: a client that disconnects must not cancel the scan shared with others.
+            return await asyncio.shield(future)
+        finally:
+            self._scans.pop(key, None)
+
+
+async def start_server(
+    service: EstimationService,
+    host: str = "127.0.0.1",
+    port: int = 8000
+) -> asyncio.AbstractServer:
+    """Starts listening; the returned server is closed with 'close()' and 'wait_closed()'."""
+    async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await _serve_connection(service, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(on_connection, host, port)
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: Optional[int] = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    cache_path: Optional[Path] = None,
+    roots: Sequence[Path] = ()
+) -> None:
+    """
+    Runs the estimation service until interrupted.
+
+    Args:
+        host: The interface to listen on. Keep the default unless the network is trusted:
+              the service reads any directory it is asked to, unless 'roots' is given.
+        port: The TCP port.
+        workers: Number of analysis processes. Defaults to the number of CPUs.
+        cache_size: Maximum number of estimates kept in memory.
+        cache_path: An optional LocCache database used by the analysis processes.
+        roots: If given, only repositories inside these directories can be analyzed.
+    """
+    async def main() -> None:
+        with EstimationService(workers, cache_size, cache_path, roots) as service:
+            server = await start_server(service, host, port)
+            async with server:
+                await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve_connection(
+    service: EstimationService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter
+) -> None:
+    """Answers the requests of one connection, keeping it alive as HTTP/1.1 does by default."""
+    while True:
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            await _respond(writer, 400, {"error": "Malformed request line."}, keep_alive=False)
+            return
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = (headers.get("connection", "").lower() != "close") and version == "HTTP/1.1"
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_SIZE:
+            await _respond(writer, 413 if length > 0 else 400, {"error": "Invalid Content-Length."}, keep_alive=False)
+            return
+        body = await reader.readexactly(length) if length else b""
+
+        try:
+            status, payload = 200, await service.handle(method, target.partition("?")[0], body)
+        except HttpError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:  # Never let one request take the server down.
+            status, payload = 500, {"error": f"An unexpected error occurred: {e}"}
+        await _respond(writer, status, payload, keep_alive)
+        if not keep_alive:
+            return
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+def _expect(method: str, allowed: str) -> None:
+    if method != allowed:
+        raise HttpError(405, f"Use {allowed} for this route.")
+
+
+def _parse_json(body: bytes) -> Dict[str, Any]:
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError:
+        raise HttpError(400, "The request body is not valid JSON.")
+    if not isinstance(request, dict):
+        raise HttpError(400, "The request body must be a JSON object.")
+    return request
+
+
+def _estimate_parameters(request: Dict[str, Any]) -> Tuple[ProjectMode, float, Dict[str, str]]:
+    """Validates the mode, monthly cost and drivers shared by both estimate routes."""
+    try:
+        mode = ProjectMode(str(request.get("mode", ProjectMode.SEMI_DETACHED)).lower())
+    except ValueError:
+        raise HttpError(400, f"Invalid mode. Choose from {', '.join(ProjectMode)}")
+    try:
+        cost_per_month = float(request.get("cost_per_month", 8000.0))
+    except (TypeError, ValueError):
+        raise HttpError(400, "'cost_per_month' must be a number.")
+    drivers = request.get("drivers") or {}
+    if not isinstance(drivers, dict) or not all(isinstance(v, str) for v in drivers.values()):
+        raise HttpError(400, "'drivers' must map driver codes to ratings.")
+    return mode, cost_per_month, drivers
+
+
+def _fingerprint(project: Path, revision: Optional[str], exclude: Sequence[str] = ()) -> Optional[str]:
+    """The tree SHA of a revision, or the stat fingerprint of the working tree."""
+    if revision is not None:
+        from .git import resolve_revision
+
+        return resolve_revision(project, revision)
+    return fingerprint_tree(project, exclude)
+
+
+def _analyze(
+    project: str,
+    revision: Optional[str],
+    backend: Backend,
+    depth: int,
+    exclude: Sequence[str],
+    cache_path: Optional[Path]
+) -> LocTree:
+    """Counts one repository. Runs inside the worker processes."""
+    # Requests are already spread across processes, so each repository is counted serially.
+    if cache_path is not None and backend == Backend.NATIVE and revision is None:
+        with LocCache(cache_path) as cache:
+            return analyze_tree(Path(project), depth, backend=backend, jobs=1, cache=cache, exclude=exclude)
+    return analyze_tree(Path(project), depth, backend=backend, jobs=1, revision=revision, exclude=exclude)
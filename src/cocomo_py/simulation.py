@@ -0,0 +1,294 @@
+"""
+Monte Carlo simulation of COCOMO estimates.
+
+KLOC, the monthly cost and every cost driver rating can be given as
+probability distributions. Samples are drawn in fixed-size chunks and folded
+into log-spaced histograms, so memory use does not depend on the number of
+samples; percentiles are read back from the histograms.
+"""
+import math
+import random
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+
+from .calculator import load_numpy
+from .constants import COCOMO_MODES
+from .drivers import multiplier
+from .models import PercentileSummary, ProjectMode, SimulationResult
+
+# Number of samples drawn at a time. Each chunk needs a few arrays of this length.
+DEFAULT_CHUNK_SIZE = 262_144
+
+# Number of log-spaced histogram bins. The relative error of a percentile is
+# at most (max / min) ** (1 / _BINS) - 1, i.e. below 0.03% for a 1e6 range.
+_BINS = 1 << 16
+
+
+@dataclass(frozen=True)
+class Fixed:
+    """A constant value."""
+    value: float
+
+    @property
+    def bounds(self) -> Tuple[float, float]:
+        return self.value, self.value
+
+    def sample(self, rng, size: int, np=None):
+        if np is not None:
+            return np.full(size, float(self.value))
+        return [float(self.value)] * size
+
+
+@dataclass(frozen=True)
+class Uniform:
+    """A value uniformly distributed between 'low' and 'high'."""
+    low: float
+    high: float
+
+    def __post_init__(self):
+        if not self.low <= self.high:
+            raise ValueError(f"Invalid uniform distribution: low ({self.low}) must not exceed high ({self.high}).")
+
+    @property
+    def bounds(self) -> Tuple[float, float]:
+        return self.low, self.high
+
+    def sample(self, rng, size: int, np=None):
+        if np is not None:
+            return rng.uniform(self.low, self.high, size)
+        return [rng.uniform(self.low, self.high) for _ in range(size)]
+
+
+@dataclass(frozen=True)
+class Triangular:
+    """A three-point estimate: the lowest, the most likely and the highest value."""
+    low: float
+    mode: float
+    high: float
+
+    def __post_init__(self):
+        if not self.low <= self.mode <= self.high:
+            raise ValueError(
+                f"Invalid triangular distribution: expected low <= mode <= high, got {self.low}, {self.mode}, {self.high}."
+            )
+
+    @property
+    def bounds(self) -> Tuple[float, float]:
+        return self.low, self.high
+
+    def sample(self, rng, size: int, np=None):
+        if np is not None:
+            if self.low == self.high:
+                return np.full(size, float(self.low))
+            return rng.triangular(self.low, self.mode, self.high, size)
+        return [rng.triangular(self.low, self.high, self.mode) for _ in range(size)]
+
+
+@dataclass(frozen=True)
+class Discrete:
+    """
+    A value drawn from a finite set with the given probabilities (normalized to sum 1).
+    For cost drivers, the values are ratings. Ex: Discrete({'nom': 0.6, 'high': 0.4})
+    """
+    weights: Mapping[Union[str, float], float]
+
+    def __post_init__(self):
+        if not self.weights or any(weight < 0 for weight in self.weights.values()) or sum(self.weights.values()) <= 0:
+            raise ValueError("Invalid discrete distribution: weights must be non-negative and not all zero.")
+
+    @property
+    def bounds(self) -> Tuple[float, float]:
+        return min(self.weights), max(self.weights)
+
+    def sample(self, rng, size: int, np=None):
+        values = list(self.weights)
+        total = sum(self.weights.values())
+        probabilities = [weight / total for weight in self.weights.values()]
+        if np is not None:
+            return rng.choice(np.asarray(values, dtype=float), size=size, p=probabilities)
+        return rng.choices(values, weights=probabilities, k=size)
+
+
+Distribution = Union[Fixed, Uniform, Triangular, Discrete]
+
+
+def simulate(
+    kloc: Union[float, Distribution],
+    mode: ProjectMode,
+    cost_per_month: Union[float, Distribution],
+    drivers: Optional[Dict[str, Union[str, Distribution]]] = None,
+    samples: int = 1_000_000,
+    seed: Optional[int] = None,
+    percentiles: Sequence[float] = (10, 50, 90),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_numpy: Optional[bool] = None
+) -> SimulationResult:
+    """
+    Runs a Monte Carlo simulation of the COCOMO estimate.
+
+    Args:
+        kloc: Kilo Lines of Code, a number or a distribution.
+        mode: The project mode ('organic', 'semi-detached', 'embedded').
+        cost_per_month: The average monthly cost of a developer, a number or a distribution.
+        drivers: An optional dictionary from driver code to a rating or to a Discrete
+                 distribution of ratings. Ex: {'rely': 'high', 'cplx': Discrete({'nom': 0.5, 'high': 0.5})}
+        samples: Number of samples to draw.
+        seed: Seed of the random generator, for reproducible results. Results are
+              reproducible for the same seed, chunk size and NumPy availability.
+        percentiles: The percentiles to report, between 0 and 100.
+        chunk_size: Number of samples drawn at a time, which bounds the memory use.
+        use_numpy: Forces (True) or disables (False) the vectorized NumPy path.
+                   By default NumPy is used when it is installed.
+
+    Returns:
+        A SimulationResult with the mean and percentiles of effort, schedule and cost.
+
+    Raises:
+        ValueError: If the mode, a driver, a rating or a distribution is invalid, the mode is 'cocomo2',
+                    or KLOC or the monthly cost can be negative or infinite.
+    """
+    if mode not in COCOMO_MODES:
+        raise ValueError(f"Invalid mode '{mode}'. Choose from {', '.join(COCOMO_MODES.keys())}")
+    if mode == ProjectMode.COCOMO_II:
+        raise ValueError("The simulation supports the Basic and Intermediate COCOMO modes only.")
+    if samples <= 0 or chunk_size <= 0:
+        raise ValueError("The number of samples and the chunk size must be positive.")
+    if any(not 0 <= q <= 100 for q in percentiles):
+        raise ValueError("Percentiles must be between 0 and 100.")
+
+    np = load_numpy(use_numpy)
+
+    params = COCOMO_MODES[mode]
+    kloc = _as_distribution(kloc)
+    cost_per_month = _as_distribution(cost_per_month)
+    # A negative KLOC has no real power, and infinite bounds give no histogram range.
+    for name, distribution in (("KLOC", kloc), ("The cost per month", cost_per_month)):
+        low, high = distribution.bounds
+        if not 0 <= low <= high < math.inf:
+            raise ValueError(f"{name} must be finite and non-negative, got values between {low} and {high}.")
+    multipliers = [_driver_multipliers(code, rating) for code, rating in (drivers or {}).items()]
+
+    # Every output is monotonic in its inputs, so the extreme inputs give the histogram ranges.
+    eaf_low = math.prod(m.bounds[0] for m in multipliers)
+    eaf_high = math.prod(m.bounds[1] for m in multipliers)
+    effort_low = params['a'] * kloc.bounds[0] ** params['b'] * eaf_low
+    effort_high = params['a'] * kloc.bounds[1] ** params['b'] * eaf_high
+    effort = _LogHistogram(effort_low, effort_high, np)
+    schedule = _LogHistogram(params['c'] * effort_low ** params['d'], params['c'] * effort_high ** params['d'], np)
+    cost = _LogHistogram(effort_low * cost_per_month.bounds[0], effort_high * cost_per_month.bounds[1], np)
+
+    rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+    remaining = samples
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        remaining -= size
+        if np is not None:
+            eaf = np.ones(size)
+            for factor in multipliers:
+                eaf *= factor.sample(rng, size, np)
+            efforts = params['a'] * np.power(kloc.sample(rng, size, np), params['b']) * eaf
+            effort.add(efforts)
+            schedule.add(params['c'] * np.power(efforts, params['d']))
+            cost.add(efforts * cost_per_month.sample(rng, size, np))
+        else:
+            eaf = [1.0] * size
+            for factor in multipliers:
+                eaf = [e * m for e, m in zip(eaf, factor.sample(rng, size))]
+            efforts = [params['a'] * k ** params['b'] * e for k, e in zip(kloc.sample(rng, size), eaf)]
+            effort.add(efforts)
+            schedule.add([params['c'] * e ** params['d'] for e in efforts])
+            cost.add([e * c for e, c in zip(efforts, cost_per_month.sample(rng, size))])
+
+    return SimulationResult(
+        samples=samples,
+        mode=ProjectMode(mode),
+        effort_person_months=effort.summary(percentiles),
+        development_time_months=schedule.summary(percentiles),
+        total_cost=cost.summary(percentiles)
+    )
+
+
+def _as_distribution(value: Union[float, Distribution]) -> Distribution:
+    if isinstance(value, (Fixed, Uniform, Triangular, Discrete)):
+        return value
+    return Fixed(float(value))
+
+
+def _driver_multipliers(code: str, rating: Union[str, Distribution]) -> Distribution:
+    """Turns a rating, or a distribution of ratings, into a distribution of effort multipliers."""
+    if isinstance(rating, str):
+        return Fixed(multiplier(code, rating))
+    if isinstance(rating, Fixed):
+        return Fixed(multiplier(code, rating.value))
+    if not isinstance(rating, Discrete):
+        raise ValueError(f"Driver '{code}' must be a rating or a Discrete distribution of ratings.")
+    weights: Dict[float, float] = {}
+    for value, weight in rating.weights.items():
+        value = multiplier(code, value)
+        weights[value] = weights.get(value, 0.0) + weight
+    return Discrete(weights)
+
+
+class _LogHistogram:
+    """
+    Fixed-size histogram with log-spaced bins between known bounds. Samples of zero
+    (e.g. zero KLOC) have no logarithm: they are counted apart, and the percentiles
+    they cover are exactly 0.
+    """
+
+    def __init__(self, low: float, high: float, np=None):
+        self._np = np
+        # A zero lower bound is clamped: the smallest positive samples land in the first bin.
+        high = max(high, 1e-300)
+        low = min(max(low, high * 1e-12), high)
+        self._log_low = math.log(low)
+        span = math.log(high) - self._log_low
+        self._scale = _BINS / span if span > 0 else 0.0
+        self._counts = np.zeros(_BINS, dtype=np.int64) if np is not None else [0] * _BINS
+        self._total = 0.0
+        self._n = 0
+        self._zeros = 0
+
+    def add(self, values) -> None:
+        np = self._np
+        if np is not None:
+            positive = values[values > 0]
+            self._zeros += len(values) - len(positive)
+            logs = np.log(positive)
+            index = ((logs - self._log_low) * self._scale).astype(np.int64)
+            np.clip(index, 0, _BINS - 1, out=index)
+            self._counts += np.bincount(index, minlength=_BINS)
+            self._total += float(values.sum())
+            self._n += len(values)
+            return
+        counts = self._counts
+        for value in values:
+            self._total += value
+            if value <= 0:
+                self._zeros += 1
+                continue
+            index = int((math.log(value) - self._log_low) * self._scale)
+            counts[min(max(index, 0), _BINS - 1)] += 1
+        self._n += len(values)
+
+    def quantile(self, q: float) -> float:
+        """Interpolates the q-th percentile (0-100) inside its bin, in log space."""
+        rank = q / 100.0 * self._n
+        if self._zeros and rank <= self._zeros:
+            return 0.0
+        if self._scale == 0.0:
+            return math.exp(self._log_low)
+        cumulative = self._zeros
+        counts = self._counts.tolist() if self._np is not None else self._counts
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                fraction = (rank - cumulative) / count
+                return math.exp(self._log_low + (index + fraction) / self._scale)
+            cumulative += count
+        return math.exp(self._log_low + _BINS / self._scale)
+
+    def summary(self, percentiles: Sequence[float]) -> PercentileSummary:
+        return PercentileSummary(
+            mean=self._total / self._n,
+            percentiles={q: self.quantile(q) for q in percentiles}
+        )
@@ -0,0 +1,244 @@
+"""
+Timing instrumentation of analysis runs.
+
+A Timings object handed to 'analyze_loc' or 'analyze_tree' (or created by the
+CLI's '--timings' and '--profile' options) collects:
+
+- the wall time of the phases of the main process: walking the tree, cache
+  lookups, counting in process, waiting for the worker processes or for the
+  members of an archive, running cloc, estimating and rendering. Phases nest, and the time of a phase
+  excludes the phases opened inside it, so no time is counted twice;
+- the read and count time of every file, measured where the file is counted
+  (usually a worker process) and sent back with its batch. They give the
+  files/s and bytes/s rates and the slowest files and directories;
+- a span per phase and per batch, for the Chrome trace.
+
+Without a Timings nothing is measured: the analyzer checks for one once per
+batch, and the workers once per file.
+"""
+import heapq
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import ProfileFormat
+
+# Phase of the time spent in 'analyze_loc' and 'analyze_tree' outside of the other phases.
+ANALYZE = "analyze"
+
+# Marks the end of an iterator timed by 'Timings.iterate'.
+_END = object()
+
+
+class Timings:
+    """Per-phase timings, file rates and slowest files of analysis runs."""
+
+    def __init__(self, top: int = 10):
+        """
+        Args:
+            top: Number of slowest files and directories kept.
+        """
+        self.top = top
+        self.files_read = 0
+        self.files_cached = 0
+        self.bytes_read = 0
+        self._origin = time.perf_counter_ns()
+        self._phases: Dict[str, int] = {}
+        self._stack: List[List[Any]] = []  # [phase, time it was last resumed]
+        self._spans: List[Tuple[str, int, int, int, Dict[str, Any]]] = []  # (name, pid, start, end, args)
+        self._read_ns = 0
+        self._count_ns = 0
+        self._slowest: List[Tuple[int, str, int, int, int, int]] = []  # heap of (total, path, size, read, pid, start)
+        self._directories: Dict[str, List[int]] = {}  # directory -> [files, bytes, total]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times a block of code as a phase, with its own span in the Chrome trace."""
+        start = self._enter(name)
+        try:
+            yield
+        finally:
+            self._spans.append((name, os.getpid(), start, self._exit(), {}))
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterator:
+        """Times the production of the items of an iterable as a phase (without spans: there is one per item)."""
+        iterator = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator, _END)
+            finally:
+                self._exit()
+            if item is _END:
+                return
+            yield item
+
+    def add_cached(self, n_files: int) -> None:
+        """Counts files whose lines came from the cache, without being read."""
+        self.files_cached += n_files
+
+    def add_batch(self, result: Any, files: List[Tuple[str, int, int, int]], span: Tuple[int, int, int]) -> Any:
+        """
+        Records a batch timed by 'analyzer._profiled_batch' and returns its result.
+
+        Args:
+            result: The result of the batch.
+            files: (path, size, start, start + time spent reading) of every file read, in
+                   order. A file is counted from its start to the start of the next one.
+            span: (process id, start, end) of the batch.
+        """
+        pid, batch_start, batch_end = span
+        size_total = 0
+        for index, (path, size, start, read_end) in enumerate(files):
+            end = files[index + 1][2] if index + 1 < len(files) else batch_end
+            total = end - start
+            self._read_ns += read_end - start
+            self._count_ns += end - read_end
+            size_total += size
+            entry = (total, path, size, read_end - start, pid, start)
+            if len(self._slowest) < self.top:
+                heapq.heappush(self._slowest, entry)
+            elif total > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+            directory = self._directories.setdefault(os.path.dirname(path), [0, 0, 0])
+            directory[0] += 1
+            directory[1] += size
+            directory[2] += total
+        self.files_read += len(files)
+        self.bytes_read += size_total
+        self._spans.append(("batch", pid, batch_start, batch_end, {"files": len(files), "bytes": size_total}))
+        return result
+
+    @property
+    def phases(self) -> Dict[str, float]:
+        """Seconds spent in each phase of the main process, phases opened inside it excluded."""
+        return {name: ns / 1e9 for name, ns in self._phases.items()}
+
+    @property
+    def wall_seconds(self) -> float:
+        """Seconds since the Timings was created."""
+        return (time.perf_counter_ns() - self._origin) / 1e9
+
+    @property
+    def analysis_seconds(self) -> float:
+        """Wall seconds spent in the analyses (the 'analyze' spans), or the wall time without any."""
+        total = sum(end - start for name, _, start, end, _ in self._spans if name == ANALYZE)
+        return total / 1e9 if total else self.wall_seconds
+
+    def slowest_files(self) -> List[Dict[str, Any]]:
+        """The slowest files to read and count, slowest first."""
+        return [
+            {"path": path, "bytes": size, "seconds": total / 1e9, "read_seconds": read / 1e9}
+            for total, path, size, read, _, _ in sorted(self._slowest, reverse=True)
+        ]
+
+    def slowest_directories(self) -> List[Dict[str, Any]]:
+        """The directories whose own files (not their subdirectories') took longest, slowest first."""
+        slowest = heapq.nlargest(self.top, self._directories.items(), key=lambda item: item[1][2])
+        return [
+            {"path": path, "files": files, "bytes": size, "seconds": total / 1e9}
+            for path, (files, size, total) in slowest
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The timings as JSON-serializable data."""
+        seconds = self.analysis_seconds
+        return {
+            "wall_seconds": self.wall_seconds,
+            "analysis_seconds": seconds,
+            "phases": self.phases,
+            "files": {
+                "read": self.files_read,
+                "cached": self.files_cached,
+                "bytes": self.bytes_read,
+                "files_per_second": (self.files_read + self.files_cached) / seconds if seconds else 0.0,
+                "bytes_per_second": self.bytes_read / seconds if seconds else 0.0,
+                # Summed over the worker processes, so they can exceed the wall time.
+                "read_seconds": self._read_ns / 1e9,
+                "count_seconds": self._count_ns / 1e9,
+            },
+            "slowest_files": self.slowest_files(),
+            "slowest_directories": self.slowest_directories(),
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        The timings in the Chrome trace event format, for chrome://tracing or Perfetto:
+        the phases and batches as spans, one row per process, and the slowest files.
+        """
+        main = os.getpid()
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+             "args": {"name": "cocomo" if pid == main else f"worker {pid}"}}
+            for pid in sorted({pid for _, pid, _, _, _ in self._spans} | {main})
+        ]
+        for name, pid, start, end, args in self._spans:
+            events.append(self._event(name, pid, start, end - start, args))
+        for total, path, size, read, pid, start in self._slowest:
+            events.append(self._event(path, pid, start, total, {"bytes": size, "read_us": read / 1e3}, tid=1))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def summary(self) -> str:
+        """A plain text report of 'to_dict'."""
+        data = self.to_dict()
+        files = data["files"]
+        lines = [f"Wall time: {data['wall_seconds']:.3f}s (analysis {data['analysis_seconds']:.3f}s)"]
+        lines += [f"  {name:<10} {seconds:10.3f}s" for name, seconds in data["phases"].items()]
+        lines.append(
+            f"Files: {files['read']:,} read, {files['cached']:,} cached, {files['bytes']:,} bytes; "
+            f"{files['files_per_second']:,.0f} files/s, {files['bytes_per_second'] / 1e6:,.2f} MB/s"
+        )
+        lines.append(f"  reading {files['read_seconds']:.3f}s, counting {files['count_seconds']:.3f}s (all processes)")
+        for title, key in (("Slowest files", "slowest_files"), ("Slowest directories", "slowest_directories")):
+            if data[key]:
+                lines.append(f"{title}:")
+                lines += [f"  {entry['seconds']:10.4f}s  {entry['path']}" for entry in data[key]]
+        return "\n".join(lines)
+
+    def write(self, path: Path, format: ProfileFormat = ProfileFormat.JSON) -> None:
+        """Writes the timings as 'to_dict' JSON or as a Chrome trace."""
+        if ProfileFormat(format) == ProfileFormat.CHROME:
+            self.write_chrome_trace(path)
+        else:
+            self.write_json(path)
+
+    def write_json(self, path: Path) -> None:
+        """Writes 'to_dict' as JSON."""
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2) + "\n", encoding="utf-8")
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Writes 'chrome_trace' as JSON."""
+        Path(path).write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+
+    def _event(self, name: str, pid: int, start: int, duration: int, args: Dict[str, Any], tid: int = 0) -> dict:
+        # perf_counter is a system-wide monotonic clock, so the worker timestamps line up with the main process.
+        return {
+            "name": name, "ph": "X", "pid": pid, "tid": tid,
+            "ts": (start - self._origin) / 1e3, "dur": duration / 1e3, "args": args,
+        }
+
+    def _enter(self, name: str) -> int:
+        now = time.perf_counter_ns()
+        if self._stack:
+            parent = self._stack[-1]
+            self._phases[parent[0]] = self._phases.get(parent[0], 0) + now - parent[1]
+        self._stack.append([name, now])
+        return now
+
+    def _exit(self) -> int:
+        now = time.perf_counter_ns()
+        name, resumed = self._stack.pop()
+        self._phases[name] = self._phases.get(name, 0) + now - resumed
+        if self._stack:
+            self._stack[-1][1] = now
+        return now
+
+
+def phase(timings: Optional[Timings], name: str):
+    """'timings.phase(name)', or a no-op context without Timings."""
+    if timings is None:
+        return nullcontext()
+    return timings.phase(name)
@@ -0,0 +1,446 @@
+"""
+Live estimates of a working tree ('cocomo watch').
+
+The tree is counted once; afterwards only the files reported as changed are
+counted again, and per-language running totals are adjusted by the difference.
+Changes come from inotify (through ctypes, Linux only) or, where it is not
+available, from periodic stat walks. Bursts of changes (a save, a checkout)
+are debounced into a single update. Ignored directories are neither counted
+nor watched; a change to a .gitignore file or to '.cocomo.toml' reloads the
+ignore rules and counts the tree again.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .analyzer import (
+    EXCLUDED_DIRS, BATCH_SIZE, add_count, batched, count_batch, count_files, iter_source_files, map_batches,
+    totals_report,
+)
+from .cache import LocCache
+from .calculator import calculate
+from .ignore import CONFIG_FILE, IgnoreRules
+from .languages import language_for_path
+from .models import AnalysisError, Calibration, FileCount, LocReport, ProjectMode, WatchUpdate
+
+# Changes are applied once no new event arrived for this long (seconds)...
+DEFAULT_DEBOUNCE = 0.25
+# ...or at the latest this long after the first one, so a busy tree still gets updates.
+MAX_DELAY = 2.0
+# Seconds between two stat walks of the polling watcher.
+DEFAULT_POLL_INTERVAL = 1.0
+# Files whose change reloads the ignore rules.
+_RULE_FILES = frozenset({".gitignore", CONFIG_FILE})
+
+# inotify event masks (see <sys/inotify.h>).
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_ONLYDIR | _IN_DONT_FOLLOW
+)
+_EVENT = struct.Struct("iIII")
+
+
+class LiveCounts:
+    """
+    Per-file line counts of a tree with running per-language totals.
+
+    'apply' recounts a set of changed paths (files or whole directories) and
+    adjusts the totals by the difference, so the report is always up to date
+    without walking the tree again.
+    """
+
+    def __init__(self, project_path: Path, jobs: Optional[int] = None, rules: Optional[IgnoreRules] = None):
+        self.root = os.path.abspath(project_path)
+        self.jobs = jobs
+        self.rules = rules if rules is not None else IgnoreRules(self.root)
+        self._files: Dict[str, FileCount] = {}
+        self._totals: Dict[str, List[int]] = {}
+        # Every directory that ever held a counted file, so that removing an
+        # unknown path only searches the counts when it may be a directory.
+        self._directories: Set[str] = set()
+
+    def scan(self, cache: Optional[LocCache] = None) -> int:
+        """Counts the whole tree, replacing the current counts. Returns the number of files."""
+        self._files.clear()
+        self._totals.clear()
+        self._directories.clear()
+        for count in count_files(self.root, self.rules, self.jobs, cache):
+            self._add(count)
+        return len(self._files)
+
+    def apply(self, paths: Iterable[str]) -> int:
+        """
+        Recounts changed paths. A path that is now a directory is counted as a
+        whole; a path that no longer exists is removed, with everything below it.
+
+        Returns:
+            The number of source files added, recounted or removed.
+        """
+        # A file created in a new directory is reported twice: by itself and by the directory.
+        todo: Dict[str, str] = {}
+        removed = 0
+        for path in set(paths):
+            if not self._watched(path):
+                continue
+            if os.path.isdir(path) and not os.path.islink(path):
+                removed += self._remove_below(path)
+                todo.update(iter_source_files(path, self.rules))
+                continue
+            language = language_for_path(os.path.basename(path))
+            if language is not None and os.path.isfile(path) and not os.path.islink(path):
+                todo[path] = language
+            elif path in self._files:
+                self._subtract(self._files.pop(path))
+                removed += 1
+            elif path in self._directories:
+                removed += self._remove_below(path)
+
+        batches = (((), batch) for batch in batched(todo.items(), BATCH_SIZE))
+        counter = partial(count_batch, skip_generated=True) if self.rules.skip_generated else count_batch
+        counted = set()
+        for _, counts in map_batches(batches, counter, self.jobs):
+            for count in counts:
+                counted.add(count.path)
+                previous = self._files.pop(count.path, None)
+                if previous is not None:
+                    self._subtract(previous)
+                self._add(count)
+        # Files that vanished between the event and the count, or became generated, are dropped too.
+        for path in todo:
+            if path not in counted and path in self._files:
+                self._subtract(self._files.pop(path))
+        return len(todo) + removed
+
+    def report(self) -> LocReport:
+        """The current per-language counts."""
+        return totals_report({language: entry for language, entry in self._totals.items() if entry[0]})
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def _watched(self, path: str) -> bool:
+        relative = os.path.relpath(path, self.root)
+        if relative == os.curdir:
+            return True
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return False
+        is_dir = os.path.isdir(path) and not os.path.islink(path)
+        return not self.rules.excluded(relative.replace(os.sep, "/"), is_dir)
+
+    def _add(self, count: FileCount) -> None:
+        self._files[count.path] = count
+        add_count(self._totals, count)
+        directory = os.path.dirname(count.path)
+        while directory not in self._directories and len(directory) > len(self.root):
+            self._directories.add(directory)
+            directory = os.path.dirname(directory)
+
+    def _subtract(self, count: FileCount) -> None:
+        entry = self._totals[count.language]
+        entry[0] -= 1
+        entry[1] -= count.blank
+        entry[2] -= count.comment
+        entry[3] -= count.code
+
+    def _remove_below(self, directory: str) -> int:
+        self._directories.discard(directory)
+        prefix = os.path.join(directory, "")
+        below = [path for path in self._files if path.startswith(prefix)]
+        for path in below:
+            self._subtract(self._files.pop(path))
+        return len(below)
+
+
+class PollingWatcher:
+    """Finds changed source files by comparing stat snapshots of the tree."""
+
+    def __init__(self, project_path: Path, interval: float = DEFAULT_POLL_INTERVAL, rules: Optional[IgnoreRules] = None):
+        self.root = os.path.abspath(project_path)
+        self.interval = interval
+        self.rules = rules if rules is not None else IgnoreRules(self.root)
+        self._snapshot = self._stat_tree()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """
+        Waits for changes.
+
+        Args:
+            timeout: Seconds to wait, or None to wait until something changes.
+
+        Returns:
+            The changed paths (empty on timeout).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic()))
+            time.sleep(delay)
+            snapshot = self._stat_tree()
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        self._snapshot = {}
+
+    def _stat_tree(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        # Only the rule files of the root are polled, not those of every directory.
+        paths = [os.path.join(self.root, name) for name in _RULE_FILES]
+        paths.extend(path for path, _ in iter_source_files(self.root, self.rules))
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+
+class InotifyWatcher:
+    """
+    Finds changed paths with Linux inotify, one watch per directory.
+
+    Raises:
+        OSError: If inotify is not available, or the watch limit
+                 (/proc/sys/fs/inotify/max_user_watches) is reached.
+    """
+
+    def __init__(self, project_path: Path, rules: Optional[IgnoreRules] = None):
+        self.root = os.path.abspath(project_path)
+        self.rules = rules if rules is not None else IgnoreRules(self.root)
+        name = ctypes.util.find_library("c")
+        try:
+            self._libc = ctypes.CDLL(name, use_errno=True)
+            init = self._libc.inotify_init1
+        except (OSError, AttributeError, TypeError):
+            raise OSError("inotify is not available on this system.")
+        self._fd = init(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[int, str] = {}
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """
+        Waits for changes.
+
+        Args:
+            timeout: Seconds to wait, or None to wait until something changes.
+
+        Returns:
+            The changed paths (empty on timeout), or None when the kernel queue
+            overflowed and the whole tree must be counted again.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = self._read_events()
+            if changed is None or changed:
+                return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch_tree(self, top: str) -> None:
+        """Watches a directory and every directory below it, except the ignored ones."""
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if descriptor < 0:
+                error = ctypes.get_errno()
+                if directory == top or error == errno.ENOSPC:  # Out of watches.
+                    raise OSError(error, f"Could not watch {directory}: {os.strerror(error)}")
+                continue  # Removed or unreadable meanwhile.
+            self._directories[descriptor] = directory
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and not self._ignored(entry.path):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _ignored(self, directory: str) -> bool:
+        relative = os.path.relpath(directory, self.root).replace(os.sep, "/")
+        return self.rules.excluded(relative, True)
+
+    def _unwatch_tree(self, top: str) -> None:
+        """Stops watching a directory moved away: its watches would keep reporting the old paths."""
+        prefix = os.path.join(top, "")
+        for descriptor, directory in list(self._directories.items()):
+            if directory == top or directory.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, descriptor)
+                del self._directories[descriptor]
+
+    def _read_events(self) -> Optional[Set[str]]:
+        changed: Set[str] = set()
+        overflow = False
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                descriptor, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self._directories.get(descriptor)
+                if mask & _IN_IGNORED:
+                    self._directories.pop(descriptor, None)
+                    continue
+                if directory is None:
+                    continue
+                path = os.path.join(directory, name) if name else directory
+                if mask & _IN_ISDIR:
+                    if name in EXCLUDED_DIRS or self._ignored(path):
+                        continue
+                    if mask & _IN_MOVED_FROM:
+                        self._unwatch_tree(path)
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        self._watch_tree(path)
+                changed.add(path)
+        return None if overflow else changed
+
+
+def open_watcher(
+    project_path: Path,
+    polling: bool = False,
+    interval: float = DEFAULT_POLL_INTERVAL,
+    rules: Optional[IgnoreRules] = None
+):
+    """
+    Creates the best available watcher: inotify, or polling when it is unavailable or 'polling' is set.
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(project_path, rules)
+        except OSError:
+            pass
+    return PollingWatcher(project_path, interval, rules)
+
+
+def watch(
+    project_path: Path,
+    mode: ProjectMode,
+    cost_per_month: float,
+    drivers: Optional[Dict[str, str]] = None,
+    debounce: float = DEFAULT_DEBOUNCE,
+    polling: bool = False,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    jobs: Optional[int] = None,
+    cache: Optional[LocCache] = None,
+    exclude: Sequence[str] = (),
+    calibration: Optional[Calibration] = None
+) -> Iterator[WatchUpdate]:
+    """
+    Keeps the COCOMO estimate of a working tree up to date.
+
+    Counts the tree once, then waits for changes and recounts only the changed
+    files. Runs until the iteration is stopped (or interrupted).
+
+    Args:
+        project_path: The path to the project directory.
+        mode: The project mode.
+        cost_per_month: The average monthly cost of a developer.
+        drivers: Optional cost driver ratings.
+        debounce: Seconds without new changes before an update is computed.
+        polling: Use periodic stat walks instead of inotify.
+        poll_interval: Seconds between two stat walks of the polling watcher.
+        jobs: Number of worker processes for large batches of changes.
+        cache: An optional LocCache for the initial scan.
+        exclude: Extra globs of files and directories to ignore, in .gitignore syntax.
+        calibration: An optional calibration profile for the estimates.
+
+    Yields:
+        A WatchUpdate after the initial scan and after every batch of changes
+        that changed the line counts.
+
+    Raises:
+        AnalysisError: If the directory does not exist.
+    """
+    if not os.path.isdir(project_path):
+        raise AnalysisError(f"The specified directory does not exist: {project_path}")
+
+    start = time.perf_counter()
+    rules = IgnoreRules(project_path, exclude)
+    # The watcher starts first, so changes made during the initial scan are not missed.
+    watcher = open_watcher(project_path, polling, poll_interval, rules)
+    try:
+        counts = LiveCounts(project_path, jobs, rules)
+        scanned = counts.scan(cache)
+        report = counts.report()
+        yield WatchUpdate(calculate(report.kloc, mode, cost_per_month, drivers, calibration=calibration), report, scanned,
+                          time.perf_counter() - start)
+
+        while True:
+            changed = watcher.wait()
+            first = time.monotonic()
+            while changed is not None and time.monotonic() - first < MAX_DELAY:
+                more = watcher.wait(debounce)
+                if more is None:
+                    changed = None
+                elif more:
+                    changed |= more
+                    continue
+                break
+
+            start = time.perf_counter()
+            if changed is not None and any(os.path.basename(path) in _RULE_FILES for path in changed):
+                # The ignore rules changed: the tree is watched and counted again from scratch.
+                counts.rules = rules = IgnoreRules(project_path, exclude)
+                watcher.close()
+                watcher = open_watcher(project_path, polling, poll_interval, rules)
+                changed = None
+            if changed is None:
+                touched = counts.scan()
+            else:
+                touched = counts.apply(changed)
+            new_report = counts.report()
+            if new_report == report:
+                continue
+            report = new_report
+            yield WatchUpdate(calculate(report.kloc, mode, cost_per_month, drivers, calibration=calibration), report, touched,
+                              time.perf_counter() - start)
+    finally:
+        watcher.close()
@@ -0,0 +1,128 @@
+import pytest
+from cocomo_py.analyzer import analyze_kloc, analyze_loc, analyze_tree, classify_lines, count_bytes, count_file
+from cocomo_py.cache import LocCache
+from cocomo_py.models import AnalysisError
+
+PYTHON_SOURCE = '''\
+"""Module docstring."""
+import os  # trailing comment
+
+# A full-line comment
+
+def main():
+    """
+    A multi-line docstring.
+    """
+    return "# not a comment"
+'''
+
+C_SOURCE = '''\
+/* A block
+   comment */
+int main(void) {
+    const char *s = "/* not a comment */";
+
+    return 0; // trailing comment
+}
+'''
+
+# Fixture for a small project tree
+@pytest.fixture
+def project(tmp_path):
+    """Creates a small project with Python and C files and an excluded directory."""
+    (tmp_path / "app.py").write_text(PYTHON_SOURCE)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.c").write_text(C_SOURCE)
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "lib.js").write_text("var x = 1;\n")
+    (tmp_path / "notes.txt").write_text("not source code\n")
+    return tmp_path
+
+def test_classify_python_lines():
+    """Tests blank, comment and code classification for Python, including docstrings."""
+    blank, comment, code = classify_lines(PYTHON_SOURCE.splitlines(), "Python")
+    assert (blank, comment, code) == (2, 5, 3)
+
+def test_classify_c_lines():
+    """Tests that comment markers inside string literals are not treated as comments."""
+    blank, comment, code = classify_lines(C_SOURCE.splitlines(), "C")
+    assert (blank, comment, code) == (1, 2, 4)
+
+def test_line_endings_and_unicode_whitespace():
+    """Tests that bytes are classified like decoded text, whatever the line endings."""
+    data = PYTHON_SOURCE.encode()
+    expected = classify_lines(PYTHON_SOURCE.splitlines(), "Python")
+    for newline in (b"\r\n", b"\r"):
+        assert count_bytes(data.replace(b"\n", newline), "Python") == expected
+    # No-break and ideographic spaces are whitespace; a non-ASCII identifier is code.
+    assert count_bytes("\u00a0\n\u3000 # caf\u00e9\n\u00e9t\u00e9 = 1\u00a0\n".encode(), "Python") == (1, 1, 1)
+
+def test_files_read_in_blocks(tmp_path, monkeypatch):
+    """Tests that files longer than a block, split anywhere (even inside a CR LF), count the same."""
+    path = tmp_path / "app.c"
+    data = C_SOURCE.replace("\n", "\r\n").encode()
+    path.write_bytes(data)
+    for size in (1, 2, 7, 64):
+        monkeypatch.setattr("cocomo_py.analyzer.READ_SIZE", size)
+        count = count_file(str(path), "C")
+        assert (count.blank, count.comment, count.code) == count_bytes(data, "C") == (1, 2, 4)
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_binary_files_are_skipped(project, tmp_path, cached):
+    """Tests that files with a NUL byte near their start are not counted, cached or not."""
+    (project / "blob.py").write_bytes(b"x = 1\n\0\x89PNG\n")
+    with LocCache(tmp_path / "cache.sqlite3") as cache:
+        for _ in range(2 if cached else 1):
+            report = analyze_loc(project, jobs=1, cache=cache if cached else None)
+    assert report.languages["Python"].n_files == 1
+    assert count_file(str(project / "blob.py"), "Python") is None
+
+def test_analyze_loc_per_language(project):
+    """Tests the per-language breakdown and the excluded directories."""
+    report = analyze_loc(project, jobs=1)
+    assert set(report.languages) == {"Python", "C"}
+    assert report.languages["Python"].code == 3
+    assert report.languages["C"].code == 4
+    assert report.total.n_files == 2
+    assert report.total.code == 7
+    assert report.as_cloc_dict()["SUM"]["code"] == 7
+
+def test_analyze_kloc_parallel_matches_serial(tmp_path):
+    """Tests that the process pool produces the same totals as the serial path."""
+    for i in range(600):
+        (tmp_path / f"module_{i}.py").write_text(PYTHON_SOURCE)
+    assert analyze_kloc(tmp_path, jobs=2) == analyze_kloc(tmp_path, jobs=1) == 1.8
+
+def test_analyze_missing_directory(tmp_path):
+    """Tests that an exception is raised for a directory that does not exist."""
+    with pytest.raises(AnalysisError, match="does not exist"):
+        analyze_kloc(tmp_path / "missing")
+
+def test_analyze_tree_per_directory(project):
+    """Tests that every subtree adds up its descendants and the root matches analyze_loc."""
+    (project / "src" / "lib" / "deep").mkdir(parents=True)
+    (project / "src" / "lib" / "deep" / "util.py").write_text(PYTHON_SOURCE)
+
+    tree = analyze_tree(project, jobs=1)
+    assert tree.report == analyze_loc(project, jobs=1)
+    assert list(tree.children) == ["src"]
+    src = tree.subtree("src")
+    assert src.report.total.code == 7
+    assert set(src.report.languages) == {"Python", "C"}
+    assert tree.subtree("src/lib/deep").report.total.n_files == 1
+    assert [node.path for node in tree.walk()] == ["", "src", "src/lib", "src/lib/deep"]
+    with pytest.raises(KeyError):
+        tree.subtree("node_modules")
+
+def test_analyze_tree_depth_limit(project):
+    """Tests that files beyond the depth limit are folded into their ancestor."""
+    (project / "src" / "lib").mkdir()
+    (project / "src" / "lib" / "util.py").write_text(PYTHON_SOURCE)
+
+    tree = analyze_tree(project, max_depth=1, jobs=1)
+    src = tree.subtree("src")
+    assert src.children == {}
+    assert src.truncated
+    assert src.report.total.code == 7
+    assert tree.report.total.code == 10
+    assert analyze_tree(project, max_depth=0, jobs=1).children == {}
@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import shutil
+import sys
+import tarfile
+
+import pytest
+from cocomo_py.analyzer import analyze_loc, analyze_tree
+from cocomo_py.archive import analyze_archive
+from cocomo_py.machine import main
+from cocomo_py.models import AnalysisError, Backend, DedupMode
+
+# Fixture for a project directory and its archives
+@pytest.fixture
+def project(tmp_path):
+    """Creates a project with source, binary, generated and excluded files, inside a top-level directory."""
+    root = tmp_path / "delivery" / "acme-1.0"
+    (root / "src" / "core").mkdir(parents=True)
+    for i in range(300):
+        (root / "src" / "core" / f"m{i}.py").write_text(f"# Module {i}\r\nvalue = {i}\r\n\r\n")
+    (root / "src" / "main.c").write_text("/* Entry */\nint main(void) {\n    return 0;\n}\n")
+    (root / "src" / "copy.c").write_text("/* Entry */\nint main(void) {\n    return 0;\n}\n")
+    (root / "src" / "blob.py").write_bytes(b"x = 1\n\0\x89PNG\n")
+    (root / "src" / "api_pb2.py").write_text("# Generated by the protocol buffer compiler.\nx = 1\n")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "lib.js").write_text("var x = 1;\n")
+    (root / "docs").mkdir()
+    (root / "docs" / "notes.md").write_text("# Notes\n")
+    return tmp_path / "delivery"
+
+def _archive(project, path, format):
+    """Archives the project directory, whose members then start with 'acme-1.0/'."""
+    if format == "zip":
+        shutil.make_archive(str(path), "zip", project)
+        return path.with_suffix(".zip")
+    with tarfile.open(f"{path}.tar.{format}", f"w:{format}") as archive:
+        archive.add(project / "acme-1.0", "acme-1.0")
+    return path.parent / f"{path.name}.tar.{format}"
+
+class _Pipe(io.RawIOBase):
+    """A non-seekable stream, like the standard input fed by a pipe."""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+@pytest.mark.parametrize("format", ["gz", "bz2", "xz", "zip"])
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_archive_matches_extracted_directory(project, tmp_path, format, jobs):
+    """Tests that an archive counts like the directory it extracts to, serially and in worker processes."""
+    archive = _archive(project, tmp_path / "acme", format)
+    expected = analyze_loc(project, jobs=1)
+    assert expected.total.n_files == 303
+    assert analyze_loc(archive, jobs=jobs) == expected
+    assert analyze_loc(archive, jobs=jobs, exclude=["acme-1.0/src/core/"]) == analyze_loc(
+        project, jobs=1, exclude=["acme-1.0/src/core/"]
+    )
+
+@pytest.mark.parametrize("format", ["gz", "zip"])
+def test_streams(project, tmp_path, format):
+    """Tests archives read from a pipe, zip archives included, with duplicates and as a tree."""
+    data = _archive(project, tmp_path / "acme", format).read_bytes()
+    report = analyze_archive(_Pipe(data), jobs=1, dedup=DedupMode.EXACT)
+    assert (report.total.n_files, report.duplicates.n_files) == (302, 1)
+    tree = analyze_tree(_archive(project, tmp_path / "acme", format), jobs=1, max_depth=2)
+    assert tree.subtree("acme-1.0/src").report == analyze_tree(project, jobs=1).subtree("acme-1.0/src").report
+
+def test_damaged_archives(project, tmp_path):
+    """Tests that truncated archives and the cloc backend are refused, and that other files are not archives."""
+    archive = _archive(project, tmp_path / "acme", "gz")
+    truncated = tmp_path / "truncated.tar.gz"
+    truncated.write_bytes(archive.read_bytes()[:5000])
+    with pytest.raises(AnalysisError, match="Could not read the archive"):
+        analyze_loc(truncated, jobs=1)
+    with pytest.raises(AnalysisError, match="directory does not exist"):
+        analyze_loc(project / "acme-1.0" / "src" / "main.c", jobs=1)
+    # Without a known extension, archives are recognized by their magic number.
+    for format in ("gz", "zip"):
+        renamed = tmp_path / f"delivery-{format}"
+        renamed.write_bytes(_archive(project, tmp_path / "acme", format).read_bytes())
+        assert analyze_loc(renamed, jobs=1) == analyze_loc(project, jobs=1)
+    plain = tmp_path / "plain"
+    with tarfile.open(plain, "w") as tar:
+        tar.add(project / "acme-1.0", "acme-1.0")
+    assert analyze_loc(plain, jobs=1) == analyze_loc(project, jobs=1)
+    with pytest.raises(ValueError, match="native backend"):
+        analyze_loc(archive, backend=Backend.CLOC)
+
+@pytest.mark.parametrize("format", [tarfile.GNU_FORMAT, tarfile.PAX_FORMAT])
+def test_hard_links(project, tmp_path, format):
+    """Tests that hard links count like the files they link to, long link names included, except from a pipe."""
+    root = project / "acme-1.0"
+    deep = root / ("d" * 60) / ("e" * 60)
+    deep.mkdir(parents=True)
+    os.link(root / "src" / "main.c", root / "src" / "linked.c")
+    os.link(root / "src" / "core" / "m1.py", deep / "m1.py")
+    os.link(deep / "m1.py", root / "m1.py")
+    archive = tmp_path / "linked.tar.gz"
+    with tarfile.open(archive, "w:gz", format=format) as tar:
+        tar.add(root, "acme-1.0")
+    assert sum(member.islnk() for member in tarfile.open(archive)) == 3
+    expected = analyze_loc(project, jobs=1)
+    assert expected.total.n_files == 306
+    assert analyze_loc(archive, jobs=1) == expected
+    report = analyze_archive(_Pipe(archive.read_bytes()), jobs=1)
+    assert report.total.n_files == 303
+
+def test_cli_standard_input(project, tmp_path, monkeypatch, capsys):
+    """Tests that '-' reads the archive from the standard input."""
+    data = _archive(project, tmp_path / "acme", "gz").read_bytes()
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BufferedReader(_Pipe(data))))
+    assert main(["estimate", "-", "-f", "json"]) == 0
+    record = json.loads(capsys.readouterr().out)
+    assert record["path"] == "-"
+    assert record["kloc"] == analyze_loc(project, jobs=1).kloc
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from cocomo_py.analyzer import analyze_loc
+from cocomo_py.cache import LocCache
+
+# Fixture for a cache stored in a temporary directory
+@pytest.fixture
+def cache(tmp_path):
+    """Returns a LocCache that is closed at the end of the test."""
+    with LocCache(tmp_path / "cache.sqlite3") as cache:
+        yield cache
+
+def _age(path, seconds=60):
+    """Moves the mtime of a file to the past, out of the racy window."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+def test_cached_run_matches_uncached(tmp_path, cache):
+    """Tests that the counts are the same with a cold cache, a warm cache and no cache."""
+    project = tmp_path / "project"
+    project.mkdir()
+    for i in range(10):
+        source = project / f"m{i}.py"
+        source.write_text("x = 1\n" * (i + 1))
+        _age(source)
+
+    expected = analyze_loc(project, jobs=1)
+    assert analyze_loc(project, jobs=1, cache=cache) == expected
+    assert len(cache) == 10
+    assert analyze_loc(project, jobs=1, cache=cache) == expected
+
+def test_unchanged_files_are_not_read(tmp_path, cache, monkeypatch):
+    """Tests that a warm cache skips files whose size and mtime did not change."""
+    project = tmp_path / "project"
+    project.mkdir()
+    source = project / "app.py"
+    source.write_text("x = 1\n")
+    _age(source)
+    analyze_loc(project, jobs=1, cache=cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("a cached file was read again")
+
+    monkeypatch.setattr("cocomo_py.analyzer._SourceFile", fail)
+    assert analyze_loc(project, jobs=1, cache=cache).total.code == 1
+
+def test_modified_file_is_recounted(tmp_path, cache):
+    """Tests that a changed file is counted again."""
+    project = tmp_path / "project"
+    project.mkdir()
+    source = project / "app.py"
+    source.write_text("x = 1\n")
+    analyze_loc(project, jobs=1, cache=cache)
+
+    source.write_text("x = 1\ny = 2\n")
+    assert analyze_loc(project, jobs=1, cache=cache).total.code == 2
+
+def test_eviction_keeps_the_most_recent_entries(tmp_path):
+    """Tests that the least recently used entries are evicted beyond the size bound."""
+    project = tmp_path / "project"
+    project.mkdir()
+    for i in range(5):
+        (project / f"m{i}.py").write_text("x = 1\n")
+
+    path = tmp_path / "cache.sqlite3"
+    with LocCache(path, max_entries=3) as cache:
+        analyze_loc(project, jobs=1, cache=cache)
+    with LocCache(path, max_entries=3) as cache:
+        assert len(cache) == 3
+        cache.clear()
+        assert len(cache) == 0
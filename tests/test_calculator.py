@@ -1,6 +1,6 @@
 import pytest
-from cocomo_py.calculator import calculate
-from cocomo_py.models import ProjectMode
+from cocomo_py.calculator import calculate, calculate_batch, calculate_table
+from cocomo_py.models import InvalidDriverError, ProjectMode
 
 # Fixture for common test data
 @pytest.fixture
@@ -69,3 +69,83 @@ def test_invalid_mode():
             mode="invalid-mode", # type: ignore
             cost_per_month=10000
         )
+
+def test_calculate_batch_matches_calculate(sample_drivers):
+    """Tests that the pure-Python batch path reproduces 'calculate' exactly."""
+    klocs = [10, 50, 100, 0.5]
+    modes = [ProjectMode.ORGANIC, ProjectMode.SEMI_DETACHED, ProjectMode.EMBEDDED, ProjectMode.ORGANIC]
+    costs = [10000, 8000, 12000, 9000]
+    drivers = {"rely": ["high", None, "vlow", None], "cplx": ["vhigh", None, "low", "HIGH"]}
+    batch = calculate_batch(klocs, modes, costs, drivers=drivers, use_numpy=False)
+
+    assert len(batch) == 4
+    for index, result in enumerate(batch):
+        row_drivers = {code: column[index] for code, column in drivers.items() if column[index] is not None}
+        assert result == calculate(klocs[index], modes[index], costs[index], row_drivers)
+
+def test_calculate_batch_numpy_matches_calculate():
+    """Tests the vectorized path against 'calculate'."""
+    pytest.importorskip("numpy")
+    klocs = [10, 50, 100, 1234.5678, 0.001]
+    batch = calculate_batch(klocs, ProjectMode.EMBEDDED, 8000, drivers={"acap": "high"}, use_numpy=True)
+    for index, result in enumerate(batch):
+        expected = calculate(klocs[index], ProjectMode.EMBEDDED, 8000, {"acap": "high"})
+        assert result == expected
+
+def test_calculate_table():
+    """Tests estimates from a dictionary of columns, with a driver column."""
+    table = {"kloc": [10, 20], "mode": ["organic", "embedded"], "cost_per_month": [1000, 2000], "rely": ["high", "nom"]}
+    batch = calculate_table(table, use_numpy=False)
+    assert batch[0] == calculate(10, ProjectMode.ORGANIC, 1000, {"rely": "high"})
+    assert batch.columns()["eaf"] == [1.15, 1.0]
+
+def test_calculate_batch_invalid_mode():
+    """Tests that an exception is raised for an invalid mode in a batch."""
+    with pytest.raises(ValueError, match="Invalid mode 'invalid-mode'"):
+        calculate_batch([10], ["invalid-mode"], 10000)
+
+@pytest.mark.parametrize("drivers, effort, schedule", [
+    # COCOMO II Model Definition Manual: a nominal 100 KSLOC project (E = 1.0997).
+    ({}, 465.3, 25.9),
+    # A 75% schedule compression: SCED=vlow multiplies the effort by 1.43 and the schedule by 0.75.
+    ({"sced": "vlow"}, 665.4, 19.4),
+    # Every scale factor extra high: no diseconomy of scale left (E = B = 0.91).
+    ({code: "xhigh" for code in ("prec", "flex", "resl", "team", "pmat")}, 194.2, 16.05),
+])
+def test_cocomo2_reference_values(drivers, effort, schedule):
+    """Tests the COCOMO II Post-Architecture model against published reference values."""
+    result = calculate(100, ProjectMode.COCOMO_II, 10000, drivers)
+    assert result.effort_person_months == pytest.approx(effort, rel=1e-3)
+    assert result.development_time_months == pytest.approx(schedule, rel=2e-3)
+    assert result.total_cost == pytest.approx(result.effort_person_months * 10000)
+
+def test_cocomo2_effort_multipliers():
+    """Tests that COCOMO II reads its own multipliers, not the Intermediate ones."""
+    result = calculate(100, ProjectMode.COCOMO_II, 10000, {"rely": "high", "cplx": "vhigh", "virt": "high"})
+    assert result.eaf == pytest.approx(1.10 * 1.34)
+    assert result.effort_person_months == pytest.approx(465.3 * 1.10 * 1.34, rel=1e-3)
+    with pytest.raises(InvalidDriverError):
+        calculate(100, ProjectMode.COCOMO_II, 10000, {"virt": "high"}, strict=True)
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_calculate_batch_mixes_models(use_numpy):
+    """Tests that both batch paths reproduce 'calculate' for COCOMO II rows mixed with Intermediate ones."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    klocs = [10, 50, 100, 0.5, 200]
+    modes = [ProjectMode.COCOMO_II, ProjectMode.ORGANIC, ProjectMode.COCOMO_II, ProjectMode.EMBEDDED, "cocomo2"]
+    drivers = {
+        "rely": ["high", None, "vlow", "low", "vhigh"],
+        "prec": [None, "high", "xhigh", None, "low"],
+        "sced": ["vlow", None, "high", "high", "nom"],
+        "time": [None, "foo", "high", None, None],
+        "cplx": "high",
+    }
+    batch = calculate_batch(klocs, modes, 8000, drivers=drivers, use_numpy=use_numpy)
+    for index, result in enumerate(batch):
+        row_drivers = {
+            code: column[index] if isinstance(column, list) else column
+            for code, column in drivers.items()
+            if not isinstance(column, list) or column[index] is not None
+        }
+        assert result == calculate(klocs[index], modes[index], 8000, row_drivers)
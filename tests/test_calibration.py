@@ -0,0 +1,93 @@
+import random
+
+import pytest
+from cocomo_py.calculator import calculate, calculate_batch
+from cocomo_py.calibration import calibrate, load_calibration, read_history, save_calibration
+from cocomo_py.models import Calibration, CalibrationMethod, ModeFit, ProjectMode
+
+# The coefficients the synthetic histories are generated with
+TRUE = Calibration(CalibrationMethod.OLS, {
+    "organic": ModeFit(a=3.1, b=1.02, c=2.7, d=0.36, n_projects=0, effort_mmre=0.0, effort_pred25=0.0),
+    "cocomo2": ModeFit(a=2.5, b=0.95, c=3.2, d=0.30, n_projects=0, effort_mmre=0.0, effort_pred25=0.0),
+})
+
+def history(size, noise=0.0, seed=1):
+    """Builds past projects estimated with the TRUE coefficients, with optional log-normal noise."""
+    rng = random.Random(seed)
+    columns = {name: [] for name in ("kloc", "mode", "effort_person_months", "development_time_months", "rely", "prec", "sced")}
+    for _ in range(size):
+        kloc = rng.uniform(1, 500)
+        mode = rng.choice(["organic", "cocomo2"])
+        ratings = {
+            "rely": rng.choice([None, "high", "low"]),
+            "prec": rng.choice([None, "high", "vlow"]),
+            "sced": rng.choice([None, "vlow", "high"]) if mode == "cocomo2" else None,
+        }
+        result = calculate(kloc, mode, 1, {k: v for k, v in ratings.items() if v}, calibration=TRUE)
+        columns["kloc"].append(kloc)
+        columns["mode"].append(mode)
+        columns["effort_person_months"].append(result.effort_person_months * rng.lognormvariate(0, noise))
+        columns["development_time_months"].append(result.development_time_months * rng.lognormvariate(0, noise))
+        for code, rating in ratings.items():
+            columns[code].append(rating)
+    return columns
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_recovers_exact_coefficients(use_numpy):
+    """Tests that noise-free projects give back the coefficients they were generated with."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    calibration = calibrate(history(200), use_numpy=use_numpy)
+    for mode, expected in TRUE.modes.items():
+        fit = calibration.modes[mode]
+        assert (fit.a, fit.b, fit.c, fit.d) == pytest.approx((expected.a, expected.b, expected.c, expected.d))
+        assert fit.effort_mmre == pytest.approx(0, abs=1e-9)
+        assert fit.effort_pred25 == 1.0
+
+def test_huber_resists_outliers():
+    """Tests that the robust fit is less pulled by projects that overran tenfold."""
+    projects = history(2000, noise=0.1)
+    for index in range(0, 2000, 25):
+        projects["effort_person_months"][index] *= 10
+    ols = calibrate(projects, CalibrationMethod.OLS).modes["organic"]
+    huber = calibrate(projects, "huber").modes["organic"]
+    assert abs(huber.a - 3.1) < abs(ols.a - 3.1)
+    assert huber.b == pytest.approx(1.02, abs=0.02)
+
+def test_small_history_keeps_exponents():
+    """Tests that with fewer than three projects only the multipliers are fitted."""
+    calibration = calibrate({"kloc": [10, 20], "mode": ["embedded"] * 2, "effort_person_months": [80, 190]})
+    fit = calibration.modes["embedded"]
+    assert fit.b == 1.20
+    assert (fit.c, fit.d, fit.n_schedules, fit.schedule_mmre) == (2.5, 0.32, 0, None)
+
+def test_profile_round_trip(tmp_path):
+    """Tests the CSV history, the saved profile and its use by 'calculate' and 'calculate_batch'."""
+    path = tmp_path / "history.csv"
+    path.write_text(
+        "kloc,mode,effort_person_months,development_time_months,rely\n"
+        "10,organic,30,9,high\n20,organic,55,,\n40,Organic,130,14,low\n80,organic,260,18,\n"
+    )
+    calibration = calibrate(read_history(path))
+    save_calibration(calibration, tmp_path / "profile.json")
+    loaded = load_calibration(tmp_path / "profile.json")
+    assert loaded == calibration
+    assert loaded.modes["organic"].n_schedules == 3
+
+    result = calculate(50, ProjectMode.ORGANIC, 8000, calibration=loaded)
+    fit = loaded.modes["organic"]
+    assert result.effort_person_months == pytest.approx(fit.a * 50 ** fit.b)
+    # Modes without calibrated coefficients keep the built-in ones.
+    assert calculate(50, ProjectMode.EMBEDDED, 8000, calibration=loaded) == calculate(50, ProjectMode.EMBEDDED, 8000)
+    batch = calculate_batch([50, 50], ["organic", "embedded"], 8000, use_numpy=False, calibration=loaded)
+    assert batch[0] == result
+
+def test_invalid_history_and_profile(tmp_path):
+    """Tests that invalid projects and profiles are reported."""
+    with pytest.raises(ValueError, match="missing the columns"):
+        calibrate({"kloc": [10], "mode": ["organic"]})
+    with pytest.raises(ValueError, match="positive"):
+        calibrate({"kloc": [10], "mode": ["organic"], "effort_person_months": [0]})
+    (tmp_path / "profile.json").write_text('{"version": 1, "method": "ols", "modes": {"nope": {}}}')
+    with pytest.raises(ValueError, match="Invalid calibration profile"):
+        load_calibration(tmp_path / "profile.json")
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+from cocomo_py.analyzer import analyze_loc, analyze_tree
+from cocomo_py.cache import LocCache
+from cocomo_py.dedup import Deduplicator, fingerprint
+from cocomo_py.models import DedupMode, FileCount
+
+# A source file long enough for near-duplicate detection
+SOURCE = "".join(f"def function_{i}(value):\n    return value * {i} + {i * 7}\n\n" for i in range(60))
+
+# Fixture for a project with an exact and a near copy of the same file
+@pytest.fixture
+def project(tmp_path):
+    """Creates a project with a module, an exact copy, an edited copy and an unrelated file."""
+    root = tmp_path / "project"
+    (root / "vendored").mkdir(parents=True)
+    (root / "lib.py").write_text(SOURCE)
+    (root / "vendored" / "lib.py").write_text(SOURCE)
+    (root / "vendored" / "lib_patched.py").write_text(SOURCE.replace("return value * 3 ", "return value * 33 "))
+    (root / "app.py").write_text("print('hello')\n")
+    return root
+
+def test_exact_duplicates_are_counted_once(project):
+    """Tests that an identical copy is left out and reported as excluded."""
+    full = analyze_loc(project, jobs=1)
+    report = analyze_loc(project, jobs=1, dedup=DedupMode.EXACT)
+    assert full.total.n_files == 4
+    assert report.total.n_files == 3
+    assert report.duplicates.n_files == 1
+    assert report.duplicates.code == 120
+    assert report.kloc + report.duplicate_kloc == pytest.approx(full.kloc)
+
+def test_near_duplicates(project):
+    """Tests that a copy with a local edit is found by the chunk fingerprints."""
+    report = analyze_loc(project, jobs=1, dedup="near")
+    assert report.total.n_files == 2
+    assert report.duplicates.n_files == 2
+    tree = analyze_tree(project, jobs=1, dedup=DedupMode.NEAR)
+    assert tree.report == report
+
+def test_dedup_with_cache(project, tmp_path):
+    """Tests that cached runs fingerprint files like uncached ones, chunks included."""
+    with LocCache(tmp_path / "cache.sqlite3") as cache:
+        assert analyze_loc(project, jobs=1, cache=cache, dedup=DedupMode.EXACT).duplicates.n_files == 1
+        # The first near run re-reads the files to compute their chunks, the second one reads nothing.
+        for _ in range(2):
+            assert analyze_loc(project, jobs=1, cache=cache, dedup=DedupMode.NEAR).duplicates.n_files == 2
+
+def test_same_size_different_content():
+    """Tests that the size prefilter only groups files, the hash decides."""
+    dedup = Deduplicator()
+    count = FileCount("a.py", "Python", 0, 0, 1)
+    assert not dedup.is_duplicate(count, fingerprint(b"x = 1\n"))
+    assert not dedup.is_duplicate(count, fingerprint(b"y = 2\n"))
+    assert dedup.is_duplicate(count, fingerprint(b"y = 2\n"))
+    # Files without code never count as duplicates.
+    assert not dedup.is_duplicate(FileCount("b.py", "Python", 1, 0, 0), fingerprint(b"\n"))
+    assert dedup.excluded.n_files == 1
+
+def test_near_needs_native_working_tree(project):
+    """Tests that near duplicates are refused where chunks cannot be computed."""
+    with pytest.raises(ValueError):
+        analyze_loc(project, backend="cloc", dedup=DedupMode.NEAR)
+    with pytest.raises(ValueError):
+        Deduplicator(DedupMode.OFF)
+
+@pytest.mark.parametrize("mode", [DedupMode.EXACT, DedupMode.NEAR])
+def test_lowest_path_survives(tmp_path, mode):
+    """Tests that the copy kept does not depend on the worker processes or on a partially warm cache."""
+    root = tmp_path / "project"
+    for directory in ("a", "z"):
+        (root / directory).mkdir(parents=True)
+        for i in range(300):
+            (root / directory / f"m{i}.py").write_text(f"value = {directory!r} * {i}\n")
+    (root / "a" / "lib.py").write_text(SOURCE)
+    # The near copy has more code, so the totals tell which copy was kept.
+    (root / "z" / "lib.py").write_text(SOURCE if mode == DedupMode.EXACT else SOURCE + "def extra():\n    pass\n")
+    for path in root.rglob("*.py"):
+        os.utime(path, (1_000_000_000, 1_000_000_000))
+    expected = analyze_tree(root, jobs=1, dedup=mode)
+    assert expected.report.duplicates.n_files == 1
+    assert expected.subtree("a").report.total.n_files == 301
+    with LocCache(tmp_path / "cache.sqlite3") as cache:
+        # Only the second copy is cached: it comes out of the cache before the first one is counted.
+        analyze_tree(root / "z", jobs=1, cache=cache)
+        for _ in range(2):
+            assert analyze_tree(root, jobs=2, cache=cache, dedup=mode) == expected
+    assert analyze_tree(root, jobs=2, dedup=mode) == expected
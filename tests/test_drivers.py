@@ -0,0 +1,36 @@
+import pytest
+from cocomo_py.calculator import calculate, calculate_batch
+from cocomo_py.drivers import MULTIPLIER_TABLE, DRIVER_INDEX, RATING_INDEX, DriverProfile
+from cocomo_py.models import InvalidDriverError, ProjectMode
+
+def test_multiplier_table_matches_constants():
+    """Tests that the compiled table holds the COST_DRIVERS multipliers."""
+    assert MULTIPLIER_TABLE[DRIVER_INDEX["cplx"]][RATING_INDEX["xhigh"]] == 1.65
+    assert MULTIPLIER_TABLE[DRIVER_INDEX["data"]][RATING_INDEX["vlow"]] is None
+
+def test_profile_matches_dictionary():
+    """Tests that a prebuilt profile gives the same result as the driver dictionary."""
+    drivers = {"RELY": "High", "cplx": "vhigh"}
+    profile = DriverProfile(drivers)
+    assert profile.eaf == pytest.approx(1.15 * 1.30)
+    assert profile.ratings == {"rely": "high", "cplx": "vhigh"}
+    assert calculate(50, ProjectMode.SEMI_DETACHED, 8000, profile) == calculate(50, ProjectMode.SEMI_DETACHED, 8000, drivers)
+
+def test_invalid_entries_are_ignored_by_default():
+    """Tests that unknown drivers and ratings keep the multiplier 1.0 outside strict mode."""
+    result = calculate(10, ProjectMode.ORGANIC, 1000, {"rely": "high", "foo": "high", "data": "vlow"})
+    assert result.eaf == 1.15
+    assert result.is_intermediate is True
+
+@pytest.mark.parametrize("drivers, message", [
+    ({"foo": "high"}, "Invalid cost driver 'foo'"),
+    ({"data": "vlow"}, "Invalid rating 'vlow' for driver 'data'"),
+])
+def test_strict_mode(drivers, message):
+    """Tests that strict mode raises on unknown drivers or ratings."""
+    with pytest.raises(InvalidDriverError, match=message):
+        calculate(10, ProjectMode.ORGANIC, 1000, drivers, strict=True)
+    with pytest.raises(InvalidDriverError, match=message):
+        DriverProfile(drivers, strict=True)
+    with pytest.raises(InvalidDriverError, match=message):
+        calculate_batch([10], ProjectMode.ORGANIC, 1000, drivers=drivers, strict=True)
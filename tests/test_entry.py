@@ -0,0 +1,74 @@
+import subprocess
+import sys
+import pytest
+import cocomo_py
+
+def _loaded_modules(code):
+    """Runs code in a fresh interpreter and returns its output and the modules it imported."""
+    script = code + "\nimport sys\nprint(sorted(sys.modules))\n"
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    *output, modules = out.splitlines()
+    return "\n".join(output), set(eval(modules))
+
+def test_package_import_is_lazy():
+    """Tests that importing the package loads none of its submodules."""
+    _, modules = _loaded_modules("import cocomo_py")
+    assert not {name for name in modules if name.startswith("cocomo_py.")}
+
+def test_calculate_import_skips_the_analyzer():
+    """Tests that the library API only loads what it needs."""
+    _, modules = _loaded_modules("from cocomo_py import calculate")
+    assert "cocomo_py.calculator" in modules
+    assert not modules & {"cocomo_py.analyzer", "concurrent.futures", "sqlite3", "typer"}
+
+@pytest.mark.parametrize("argv, expected", [
+    (["--version"], f"cocomo-py version: {cocomo_py.__version__}"),
+    (["explain", "modes"], "COCOMO Project Modes"),
+])
+def test_entry_fast_paths_skip_typer(argv, expected):
+    """Tests that '--version' and 'explain' are answered without Typer or Rich."""
+    output, modules = _loaded_modules(f"import sys\nsys.argv = ['cocomo'] + {argv!r}\nfrom cocomo_py.entry import main\nmain()")
+    assert expected in output
+    assert not modules & {"typer", "rich", "cocomo_py.cli"}
+
+@pytest.mark.parametrize("module", ["cocomo_py", "cocomo_py.entry"])
+def test_run_as_module(module):
+    """Tests that 'python -m' runs the entry point."""
+    out = subprocess.run([sys.executable, "-m", module, "--version"], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == f"cocomo-py version: {cocomo_py.__version__}"
+
+def test_public_api_resolves():
+    """Tests that every name of __all__ is importable and unknown names still fail."""
+    for name in cocomo_py.__all__:
+        assert getattr(cocomo_py, name) is not None
+    with pytest.raises(AttributeError):
+        cocomo_py.does_not_exist
+
+@pytest.mark.parametrize("command", ["estimate", "scan", "watch"])
+def test_machine_options_match_typer(command):
+    """Tests that the argparse commands of machine-readable formats take the options of the Typer commands."""
+    typer_main = pytest.importorskip("typer.main")
+    from cocomo_py.cli import app
+    from cocomo_py.machine import build_parser
+
+    params = typer_main.get_command(app).commands[command].params
+    typer_options = {option for param in params for option in param.opts + param.secondary_opts if option.startswith("-")}
+    commands = next(action for action in build_parser()._actions if action.dest == "command")
+    machine_options = {option for action in commands.choices[command]._actions for option in action.option_strings}
+    assert machine_options - {"--help", "-h"} == typer_options
+
+def test_intermediate_needs_table(tmp_path, capsys):
+    """Tests that both CLIs refuse '--intermediate' with a machine-readable format, with the same message."""
+    testing = pytest.importorskip("typer.testing")
+    from cocomo_py.cli import app
+    from cocomo_py.machine import main
+
+    (tmp_path / "main.py").write_text("x = 1\n")
+    argv = ["estimate", str(tmp_path), "--intermediate", "--format", "json"]
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv)
+    assert exit_info.value.code == 2
+    assert "needs '--format table'" in capsys.readouterr().err
+    result = testing.CliRunner().invoke(app, argv)
+    assert result.exit_code == 2
+    assert "needs '--format table'" in " ".join(result.output.replace("│", " ").split())
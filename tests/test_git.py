@@ -0,0 +1,70 @@
+import subprocess
+
+import pytest
+from cocomo_py.analyzer import analyze_kloc, analyze_loc
+from cocomo_py.git import analyze_revisions, rev_list
+from cocomo_py.models import AnalysisError
+
+def _git(repo, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=repo, check=True, capture_output=True
+    )
+
+# Fixture for a repository with two commits
+@pytest.fixture
+def repo(tmp_path):
+    """Creates a repository where the second commit adds a file and changes another."""
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "a.py").write_text("x = 1\n")
+    (tmp_path / "b.py").write_text("# comment\ny = 2\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "first")
+    (tmp_path / "a.py").write_text("x = 1\nz = 3\n")
+    (tmp_path / "c.c").write_text("int main(void) { return 0; }\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "second")
+    return tmp_path
+
+def test_revision_matches_working_tree(repo):
+    """Tests that counting HEAD from the object database matches counting the checkout."""
+    assert analyze_loc(repo, revision="HEAD") == analyze_loc(repo, jobs=1)
+
+def test_revision_list(repo):
+    """Tests counting several revisions in one call."""
+    klocs = analyze_kloc(repo, revision=["HEAD~1", "HEAD"])
+    assert klocs == {"HEAD~1": 0.002, "HEAD": 0.004}
+
+def test_revision_range(repo):
+    """Tests that a range counts each of its commits, oldest first, and is refused where one revision is expected."""
+    commits = rev_list(repo)
+    assert len(commits) == 2
+    assert rev_list(repo, max_count=1) == commits[1:]
+    assert rev_list(repo, "HEAD~1..HEAD") == commits[1:]
+    assert analyze_kloc(repo, revision="HEAD~1..HEAD") == {commits[1]: 0.004}
+    assert list(analyze_kloc(repo, revision=commits)) == commits
+    with pytest.raises(AnalysisError, match="range of revisions"):
+        analyze_loc(repo, revision="HEAD~1..HEAD")
+
+def test_unchanged_blobs_are_memoized(repo):
+    """Tests that blobs shared between revisions are counted only once."""
+    memo = {}
+    analyze_revisions(repo, rev_list(repo), memo=memo)
+    # a.py (two versions), b.py and c.c
+    assert len(memo) == 4
+
+def test_revision_dedup_by_blob(repo):
+    """Tests that files sharing a blob are counted once with exact dedup."""
+    (repo / "copy.py").write_text("# comment\ny = 2\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "copy")
+    report = analyze_loc(repo, revision="HEAD", dedup="exact")
+    assert report.total.n_files == 3
+    assert report.duplicates.n_files == 1
+    with pytest.raises(ValueError):
+        analyze_loc(repo, revision="HEAD", dedup="near")
+
+def test_invalid_revision(repo):
+    """Tests that an exception is raised for a revision that does not exist."""
+    with pytest.raises(AnalysisError, match="git repository"):
+        analyze_loc(repo, revision="no-such-branch")
@@ -0,0 +1,121 @@
+import pytest
+from cocomo_py.analyzer import analyze_loc, analyze_tree
+from cocomo_py.ignore import IgnoreRules, PatternSet, is_generated, load_config
+
+
+def test_gitignore_pattern_semantics():
+    """Tests unanchored, anchored, '**' and directory-only patterns."""
+    patterns = PatternSet(["*.log", "/build", "doc/*.txt", "**/cache", "a/**/b", "out/", "# comment", ""])
+    assert patterns.match("x/y/debug.log", False)
+    assert patterns.match("build", True)
+    assert patterns.match("src/build", True) is None
+    assert patterns.match("doc/a.txt", False)
+    assert patterns.match("doc/x/a.txt", False) is None
+    assert patterns.match("cache", True) and patterns.match("p/q/cache", True)
+    assert patterns.match("a/b", False) and patterns.match("a/x/y/b", False)
+    assert patterns.match("out", True)
+    assert patterns.match("out", False) is None
+
+
+def test_negation_last_match_wins():
+    """Tests that a later '!' pattern re-includes what an earlier one ignored."""
+    patterns = PatternSet(["*.py", "!keep.py", "\\!literal.py"])
+    assert patterns.match("drop.py", False) is True
+    assert patterns.match("src/keep.py", False) is False
+    assert patterns.match("notes.txt", False) is None
+
+
+def test_nested_gitignore_prunes_subtrees(tmp_path):
+    """Tests root and nested .gitignore files, and that an ignored directory is never listed."""
+    (tmp_path / ".gitignore").write_text("build/\n*.tmp.py\n")
+    (tmp_path / "app.py").write_text("x = 1\n")
+    (tmp_path / "scratch.tmp.py").write_text("x = 1\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "out.py").write_text("x = 1\n")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / ".gitignore").write_text("fixtures/\n!scratch.tmp.py\n")
+    (tmp_path / "pkg" / "scratch.tmp.py").write_text("x = 1\ny = 2\n")
+    (tmp_path / "pkg" / "fixtures").mkdir()
+    (tmp_path / "pkg" / "fixtures" / "data.py").write_text("x = 1\n")
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "fixtures").mkdir()
+    (tmp_path / "other" / "fixtures" / "data.py").write_text("x = 1\n")
+
+    tree = analyze_tree(tmp_path, jobs=1)
+    assert tree.report.total.n_files == 3
+    assert tree.report.total.code == 4
+    assert set(tree.children) == {"pkg", "other"}
+
+
+def test_exclude_globs_and_config(tmp_path):
+    """Tests '.cocomo.toml' excludes, extra excludes, and disabling .gitignore."""
+    (tmp_path / ".gitignore").write_text("ignored.py\n")
+    (tmp_path / ".cocomo.toml").write_text('[ignore]\nexclude = ["docs/"]\ngitignore = false\n')
+    for name in ("app.py", "ignored.py", "tools.py"):
+        (tmp_path / name).write_text("x = 1\n")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "conf.py").write_text("x = 1\n")
+
+    assert analyze_loc(tmp_path, jobs=1).total.n_files == 3
+    assert analyze_loc(tmp_path, jobs=1, exclude=["tools.py"]).total.n_files == 2
+    # An exclude glob can also re-include a file.
+    assert analyze_loc(tmp_path, jobs=1, exclude=["!docs/"]).total.n_files == 4
+    assert load_config(tmp_path, ["x"]).exclude == ("docs/", "x")
+
+
+def test_invalid_config(tmp_path):
+    """Tests that an invalid configuration file is reported."""
+    (tmp_path / ".cocomo.toml").write_text('[ignore]\nexclude = "docs/"\n')
+    with pytest.raises(ValueError):
+        analyze_loc(tmp_path)
+
+
+def test_generated_and_vendored_files(tmp_path):
+    """Tests the path and header heuristics for generated and vendored code."""
+    (tmp_path / "app.py").write_text("x = 1\n")
+    (tmp_path / "api_pb2.py").write_text("x = 1\n")
+    (tmp_path / "models.go").write_text("// Code generated by sqlc. DO NOT EDIT.\npackage db\n")
+    (tmp_path / "third_party").mkdir()
+    (tmp_path / "third_party" / "lib.py").write_text("x = 1\n")
+
+    assert analyze_loc(tmp_path, jobs=1).total.n_files == 1
+    (tmp_path / ".cocomo.toml").write_text("[ignore]\ngenerated = false\n")
+    assert analyze_loc(tmp_path, jobs=1).total.n_files == 4
+
+
+def test_generated_files_with_cache(tmp_path):
+    """Tests that the cache remembers generated files, whatever the configuration."""
+    from cocomo_py.cache import LocCache
+
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "app.py").write_text("x = 1\n")
+    (project / "schema.py").write_text("# @generated by a tool\nx = 1\n")
+    with LocCache(tmp_path / "cache.sqlite3") as cache:
+        assert analyze_loc(project, jobs=1, cache=cache).total.n_files == 1
+        assert analyze_loc(project, jobs=1, cache=cache).total.n_files == 1
+        (project / ".cocomo.toml").write_text("[ignore]\ngenerated = false\n")
+        assert analyze_loc(project, jobs=1, cache=cache).total.n_files == 2
+
+
+def test_excluded_checks_ancestors(tmp_path):
+    """Tests the check of single paths used by the watcher and git trees."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / ".gitignore").write_text("gen/\n")
+    rules = IgnoreRules(tmp_path, ["*.snap"])
+    assert rules.excluded("src/gen/a.py")
+    assert rules.excluded("node_modules/x/a.js")
+    assert rules.excluded("tests/a.snap")
+    assert not rules.excluded("src/main.py")
+    assert is_generated(b"/*\n * @generated SignedSource<<abc>>\n */\nint x;\n")
+    assert not is_generated(b"x = 1\n" * 100 + b"# @generated\n")
+
+
+def test_generated_phrases_outside_banners(tmp_path):
+    """Tests that hand-written code mentioning generated code is counted."""
+    (tmp_path / "ids.py").write_text('"""Helpers that parse auto-generated invoice IDs."""\nx = 1\n')
+    (tmp_path / "gen.py").write_text("# Copies the files the tool marks @generated. DO NOT EDIT the output.\nx = 1\n")
+    (tmp_path / "doc.go").write_text('package doc\n\nconst banner = "// Code generated by x. DO NOT EDIT."\n')
+    (tmp_path / "pb.py").write_text("#!/usr/bin/env python\n# Generated by the protocol buffer compiler.  DO NOT EDIT!\nx = 1\n")
+    assert analyze_loc(tmp_path, jobs=1).total.n_files == 3
+    assert not is_generated(b"/* DO NOT EDIT */\nint x;\n")
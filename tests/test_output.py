@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import subprocess
+import sys
+import pytest
+from cocomo_py import calculate, ProjectMode
+from cocomo_py.machine import main
+from cocomo_py.models import LanguageStats, LocReport
+from cocomo_py.output import CsvWriter, JsonLinesWriter, JsonWriter, estimate_record, open_writer
+
+# Fixture for an estimate and the line count it came from
+@pytest.fixture
+def record():
+    """Builds the record of a small Python project."""
+    stats = LanguageStats(n_files=2, blank=10, comment=5, code=2000)
+    report = LocReport(languages={"Python": stats}, total=stats)
+    result = calculate(report.kloc, ProjectMode.ORGANIC, 5000)
+    return estimate_record(result, report, path="proj", elapsed_seconds=0.5)
+
+def test_stream_writers_round_trip(record):
+    """Tests that JSON Lines, JSON and CSV output parse back to the same values."""
+    failed = estimate_record(None, path="broken", error="boom")
+
+    stream = io.StringIO()
+    with JsonLinesWriter(stream) as writer:
+        writer.write(record)
+        writer.write(failed)
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines == [record, failed]
+
+    stream = io.StringIO()
+    with JsonWriter(stream) as writer:
+        writer.write(record)
+        writer.write(failed)
+    assert json.loads(stream.getvalue()) == [record, failed]
+
+    stream = io.StringIO()
+    with CsvWriter(stream) as writer:
+        writer.write(record)
+    row = next(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert float(row["total_cost"]) == pytest.approx(record["total_cost"])
+    assert json.loads(row["languages"]) == record["languages"]
+
+def test_open_writer_rejects_parquet_on_stdout():
+    """Tests that Parquet, a binary format, requires an output file."""
+    with pytest.raises(ValueError):
+        open_writer("parquet")
+
+def test_machine_estimate_writes_one_object(tmp_path):
+    """Tests 'cocomo estimate --format json' end to end."""
+    (tmp_path / "main.py").write_text("x = 1\n" * 500)
+    output = tmp_path / "estimate.json"
+
+    code = main(["estimate", str(tmp_path), "--format", "json", "-o", str(output), "--no-cache", "-d", "rely=high"])
+
+    assert code == 0
+    data = json.loads(output.read_text())
+    assert data["kloc"] == 0.5
+    assert data["eaf"] == 1.15
+    assert data["languages"]["Python"]["code"] == 500
+    assert data["breakdown"] is None
+
+def test_machine_estimate_breakdown(tmp_path):
+    """Tests that '--breakdown' adds the directory tree to the record."""
+    (tmp_path / "core").mkdir()
+    (tmp_path / "core" / "main.py").write_text("x = 1\n" * 300)
+    (tmp_path / "main.py").write_text("x = 1\n" * 200)
+    output = tmp_path / "estimate.jsonl"
+
+    assert main(["estimate", str(tmp_path), "-f", "jsonl", "-o", str(output), "--no-cache", "--breakdown"]) == 0
+    tree = json.loads(output.read_text())["breakdown"]
+    assert tree["kloc"] == 0.5
+    assert [(child["path"], child["kloc"]) for child in tree["children"]] == [("core", 0.3)]
+
+def test_machine_output_does_not_import_typer(tmp_path):
+    """Tests that the machine-readable path never loads Typer or Rich."""
+    (tmp_path / "main.py").write_text("x = 1\n")
+    script = (
+        "import sys\n"
+        "from cocomo_py.machine import main\n"
+        f"main(['estimate', {str(tmp_path)!r}, '--format', 'jsonl', '--no-cache'])\n"
+        "print('typer' in sys.modules or 'rich' in sys.modules)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    assert out.splitlines()[-1] == "False"
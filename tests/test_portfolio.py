@@ -0,0 +1,70 @@
+import math
+import random
+
+import pytest
+from cocomo_py.calculator import calculate, calculate_batch
+from cocomo_py.models import ProjectMode, StaffingCurve
+from cocomo_py.portfolio import portfolio
+
+def _batch(size, use_numpy):
+    """Random estimates and start months, the same on every run."""
+    rng = random.Random(0)
+    kloc = [rng.choice([0, rng.uniform(1, 300)]) for _ in range(size)]
+    cost = [rng.uniform(5000, 15000) for _ in range(size)]
+    batch = calculate_batch(kloc, ProjectMode.SEMI_DETACHED, cost, use_numpy=use_numpy)
+    return batch, [rng.uniform(0, 48) for _ in range(size)]
+
+@pytest.mark.parametrize("curve", list(StaffingCurve))
+def test_numpy_matches_python(curve):
+    """Tests that both paths give the same timeline, and that it adds up to the estimates."""
+    pytest.importorskip("numpy")
+    batch, starts = _batch(2000, True)
+    vectorized = portfolio(batch, starts, curve, use_numpy=True)
+    python = portfolio(list(batch), starts, curve, use_numpy=False)
+    assert len(vectorized) == len(python) == max(math.ceil(s + t) for s, t in zip(starts, batch.development_time_months))
+    assert list(vectorized.headcount) == pytest.approx(python.headcount)
+    assert list(vectorized.cost) == pytest.approx(python.cost)
+    assert list(vectorized.active) == python.active
+    assert python.effort() == pytest.approx(math.fsum(batch.effort_person_months))
+    assert python.spend() == pytest.approx(math.fsum(batch.total_cost))
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_single_project_curves(use_numpy):
+    """Tests the Rayleigh ramp-up and ramp-down against the flat 'people_required'."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    result = calculate(32, ProjectMode.ORGANIC, 8000)
+    months = math.ceil(result.development_time_months)
+    flat = portfolio([result], [2], StaffingCurve.FLAT, use_numpy=use_numpy)
+    assert len(flat) == months + 2 and flat.headcount[:2] == pytest.approx([0, 0])
+    assert flat.peak_headcount() == pytest.approx(result.people_required)
+    rayleigh = portfolio([result], [2], use_numpy=use_numpy)
+    # The peak falls at T / sqrt(6), well above the average staff.
+    assert rayleigh.peak_month() == 2 + math.floor(result.development_time_months / math.sqrt(6))
+    assert rayleigh.peak_headcount() > 1.4 * result.people_required
+    assert rayleigh.spend(0, 2) == 0 and rayleigh.effort() == pytest.approx(result.effort_person_months)
+    assert list(rayleigh.active) == [0, 0] + [1] * months
+
+def test_capacity_queries():
+    """Tests the quarterly peaks and the months over capacity of overlapping projects."""
+    results = [calculate(kloc, ProjectMode.ORGANIC, 8000) for kloc in (10, 20, 40)]
+    timeline = portfolio(results, [0, 3, 6], use_numpy=False)
+    peaks = timeline.quarterly_peaks()
+    assert len(peaks) == math.ceil(len(timeline) / 3)
+    assert peaks[2] == timeline.peak_headcount(*timeline.quarter(2)) == max(timeline.headcount[6:9])
+    assert timeline.peak_headcount(*timeline.quarter(len(peaks))) == 0.0
+    capacity = 0.8 * max(peaks)
+    over = timeline.over_capacity(capacity)
+    assert over and timeline.peak_month() in over
+    assert timeline.shortfall(capacity) == pytest.approx(sum(timeline.headcount[month] - capacity for month in over))
+    assert timeline.columns()["month"] == list(range(len(timeline)))
+
+def test_invalid_start_months():
+    """Tests that missing, negative or infinite start months are refused."""
+    results = [calculate(10, ProjectMode.ORGANIC, 8000)] * 2
+    with pytest.raises(ValueError, match="start months for 2"):
+        portfolio(results, [0])
+    for start in (-1, math.inf, math.nan):
+        with pytest.raises(ValueError, match="non-negative"):
+            portfolio(results, [0, start])
+    assert len(portfolio([])) == 0 and portfolio([]).peak_month() is None
@@ -0,0 +1,36 @@
+import pytest
+from cocomo_py.models import ProjectMode
+from cocomo_py.scan import discover_repositories, read_manifest, scan_repositories, summarize
+
+# Fixture for a workspace with two repositories
+@pytest.fixture
+def workspace(tmp_path):
+    """Creates a workspace with two small repositories."""
+    for name, lines in (("alpha", 300), ("beta", 1200)):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "main.py").write_text("x = 1\n" * lines)
+    return tmp_path
+
+def test_read_manifest(workspace):
+    """Tests that manifest paths are resolved relative to the manifest, skipping comments."""
+    manifest = workspace / "repos.txt"
+    manifest.write_text("alpha\n\n# beta\nbeta\n")
+    assert read_manifest(manifest) == [workspace / "alpha", workspace / "beta"]
+
+def test_scan_totals_match_results(workspace):
+    """Tests that a failing repository does not abort the scan and that totals add up."""
+    paths = discover_repositories(workspace) + [workspace / "missing"]
+    results = list(scan_repositories(paths, ProjectMode.ORGANIC, 5000, workers=2))
+
+    assert len(results) == 3
+    failed = [scan for scan in results if not scan.ok]
+    assert [scan.path for scan in failed] == [str(workspace / "missing")]
+    assert "does not exist" in failed[0].error
+
+    summary = summarize(results)
+    succeeded = [scan.result for scan in results if scan.ok]
+    assert summary.repositories == 3
+    assert summary.failed == 1
+    assert summary.kloc == pytest.approx(1.5)
+    assert summary.total_cost == pytest.approx(sum(result.total_cost for result in succeeded))
+    assert all(scan.elapsed_seconds >= 0 for scan in results)
@@ -0,0 +1,57 @@
+import math
+
+import pytest
+from cocomo_py.calculator import calculate
+from cocomo_py.models import InvalidDriverError, ProjectMode
+from cocomo_py.sensitivity import sensitivity, sweep
+
+def test_tornado_order_and_variance_shares():
+    """Tests that the drivers are sorted by swing and that the variance shares add up to one."""
+    result = sensitivity(50, ProjectMode.SEMI_DETACHED, 8000, {"rely": "high"})
+    swings = [row.swing for row in result.drivers]
+    assert swings == sorted(swings, reverse=True)
+    assert math.fsum(row.variance_share for row in result.drivers) == pytest.approx(1.0)
+    assert result.baseline == calculate(50, ProjectMode.SEMI_DETACHED, 8000, {"rely": "high"})
+    cplx = next(row for row in result.drivers if row.code == "cplx")
+    assert (cplx.low_rating, cplx.high_rating) == ("vlow", "xhigh")
+    assert cplx.effort_high == calculate(50, ProjectMode.SEMI_DETACHED, 8000, {"rely": "high", "cplx": "xhigh"}).effort_person_months
+
+def test_elasticities():
+    """Tests that the effort grows as KLOC**b and the schedule as effort**d."""
+    result = sensitivity(50, ProjectMode.EMBEDDED, 8000, codes=["rely"])
+    assert [row.code for row in result.drivers] == ["rely"]
+    assert result.drivers[0].variance_share == 1.0
+    assert result.elasticities["kloc"] == pytest.approx({"effort": 1.20, "schedule": 0.384, "people": 0.816, "cost": 1.20})
+    assert result.elasticities["cost_per_month"]["cost"] == 1.0
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_sweep_matches_calculate(use_numpy):
+    """Tests that every combination of the grid is estimated like 'calculate'."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    grid = sweep(120, ProjectMode.ORGANIC, 8000, ["RELY", "acap", "sced"], {"cplx": "high"}, use_numpy=use_numpy)
+    assert len(grid) == 5 * 5 * 5
+    for index in (0, 7, 63, 124):
+        ratings = grid.ratings_at(index)
+        expected = calculate(120, ProjectMode.ORGANIC, 8000, {"cplx": "high", **ratings})
+        assert grid[index].effort_person_months == expected.effort_person_months
+        assert grid[index].development_time_months == pytest.approx(expected.development_time_months, rel=1e-12)
+    assert grid.ratings_at(1) == {"rely": "vlow", "acap": "vlow", "sced": "low"}
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_cocomo2_sweep(use_numpy):
+    """Tests a grid mixing COCOMO II scale factors and effort multipliers."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    grid = sweep(80, ProjectMode.COCOMO_II, 8000, ["prec", "sced"], {"pmat": "high"}, use_numpy=use_numpy)
+    for index in range(len(grid)):
+        assert grid[index] == calculate(80, ProjectMode.COCOMO_II, 8000, {"pmat": "high", **grid.ratings_at(index)})
+    result = sensitivity(80, ProjectMode.COCOMO_II, 8000)
+    assert math.fsum(row.variance_share for row in result.drivers) == pytest.approx(1.0)
+
+def test_invalid_sweeps():
+    """Tests that unknown drivers and oversized grids are refused."""
+    with pytest.raises(InvalidDriverError):
+        sweep(50, ProjectMode.ORGANIC, 8000, ["prec"])
+    with pytest.raises(ValueError, match="combinations"):
+        sweep(50, ProjectMode.ORGANIC, 8000, ["rely", "cplx", "acap"], max_combinations=100)
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import os
+import pytest
+from cocomo_py.server import EstimationService, start_server
+
+# Fixture for a repository whose files are old enough to be fingerprinted
+@pytest.fixture
+def repository(tmp_path):
+    """Creates a small repository with settled modification times."""
+    (tmp_path / "main.py").write_text("x = 1\n" * 400)
+    os.utime(tmp_path / "main.py", ns=(1_000_000_000, 1_000_000_000))
+    return tmp_path
+
+async def _request(port, method, path, payload=None):
+    """Sends one HTTP request and returns the status code and the decoded JSON body."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+def _run(test):
+    """Runs a test coroutine against a live server with a single analysis process."""
+    async def main():
+        with EstimationService(workers=1) as service:
+            server = await start_server(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await test(service, port)
+    return asyncio.run(main())
+
+def test_calculate_and_errors():
+    """Tests the calculate route and the error statuses."""
+    async def test(service, port):
+        status, body = await _request(port, "POST", "/calculate", {"kloc": 10, "mode": "organic", "cost_per_month": 5000})
+        assert status == 200
+        assert body["effort_person_months"] == pytest.approx(26.93, abs=0.01)
+        assert (await _request(port, "POST", "/calculate", {"mode": "organic"}))[0] == 400
+        for kloc in (-5, "nan", "inf"):
+            status, body = await _request(port, "POST", "/calculate", {"kloc": kloc, "mode": "organic"})
+            assert status == 400 and "non-negative" in body["error"]
+        assert (await _request(port, "GET", "/calculate"))[0] == 405
+        assert (await _request(port, "GET", "/missing"))[0] == 404
+    _run(test)
+
+def test_estimate_is_cached_and_coalesced(repository):
+    """Tests that concurrent requests share one scan and a repeated request hits the cache."""
+    async def test(service, port):
+        request = {"path": str(repository), "mode": "organic"}
+        first, second = await asyncio.gather(
+            _request(port, "POST", "/estimate", request),
+            _request(port, "POST", "/estimate", dict(request, mode="embedded")),
+        )
+        assert first[0] == second[0] == 200
+        assert first[1]["kloc"] == second[1]["kloc"] == 0.4
+        assert service.stats["scans"] == 1 and service.stats["coalesced"] == 1
+
+        status, again = await _request(port, "POST", "/estimate", request)
+        assert again["cached"] and again["total_cost"] == first[1]["total_cost"]
+
+        (repository / "more.py").write_text("y = 2\n" * 100)
+        os.utime(repository / "more.py", ns=(1_000_000_000, 1_000_000_000))
+        status, changed = await _request(port, "POST", "/estimate", request)
+        assert not changed["cached"] and changed["kloc"] == 0.5
+        assert (await _request(port, "POST", "/estimate", {"path": str(repository / "missing")}))[0] == 422
+    _run(test)
+
+def test_breakdown_is_part_of_the_cache_key(repository):
+    """Tests that a breakdown request and a plain one never get each other's cached record."""
+    async def test(service, port):
+        plain = {"path": str(repository), "mode": "organic"}
+        breakdown = dict(plain, breakdown=True, depth=0)
+        for request, tree in ((plain, False), (breakdown, True), (plain, False), (breakdown, True)):
+            status, body = await _request(port, "POST", "/estimate", request)
+            assert status == 200 and (body["breakdown"] is not None) == tree
+        assert (service.stats["misses"], service.stats["hits"]) == (2, 2)
+    _run(test)
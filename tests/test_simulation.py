@@ -0,0 +1,85 @@
+import pytest
+from cocomo_py.calculator import calculate
+from cocomo_py.models import ProjectMode
+from cocomo_py.simulation import Discrete, Triangular, Uniform, simulate
+
+def test_fixed_inputs_match_calculate():
+    """Tests that a simulation without uncertainty reproduces the point estimate."""
+    expected = calculate(50, ProjectMode.SEMI_DETACHED, 8000, {"rely": "high"})
+    result = simulate(50, ProjectMode.SEMI_DETACHED, 8000, drivers={"rely": "high"}, samples=1000, use_numpy=False)
+    for q in (10, 50, 90):
+        assert result.effort_person_months.percentiles[q] == pytest.approx(expected.effort_person_months)
+        assert result.total_cost.percentiles[q] == pytest.approx(expected.total_cost)
+    assert result.development_time_months.mean == pytest.approx(expected.development_time_months)
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_percentiles_match_exact_quantiles(use_numpy):
+    """Tests the histogram percentiles against the analytical quantiles of a uniform discrete KLOC."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    result = simulate(
+        Triangular(10, 10, 10),
+        ProjectMode.ORGANIC,
+        1000,
+        drivers={"cplx": Discrete({"low": 0.5, "high": 0.5})},
+        samples=20_000,
+        seed=7,
+        chunk_size=4096,
+        use_numpy=use_numpy
+    )
+    nominal = calculate(10, ProjectMode.ORGANIC, 1000).effort_person_months
+    assert result.effort_person_months.p10 == pytest.approx(nominal * 0.85, rel=1e-3)
+    assert result.effort_person_months.p90 == pytest.approx(nominal * 1.15, rel=1e-3)
+    assert result.effort_person_months.mean == pytest.approx(nominal, rel=2e-2)
+
+def test_seed_is_reproducible():
+    """Tests that the same seed gives the same results."""
+    def run():
+        return simulate(Triangular(5, 8, 20), ProjectMode.EMBEDDED, Triangular(7000, 8000, 9000), samples=5000, seed=42)
+    assert run() == run()
+
+def test_invalid_rating():
+    """Tests that an exception is raised for an invalid rating."""
+    with pytest.raises(ValueError, match="Invalid rating 'ultra'"):
+        simulate(10, ProjectMode.ORGANIC, 1000, drivers={"rely": Discrete({"ultra": 1.0})}, samples=10)
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_zero_samples(use_numpy):
+    """Tests that the percentiles covered by zero KLOC samples are exactly zero."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    result = simulate(0, ProjectMode.ORGANIC, 5000, samples=1000, seed=1, use_numpy=use_numpy)
+    assert result.effort_person_months.percentiles == {10: 0.0, 50: 0.0, 90: 0.0}
+    assert result.total_cost.mean == 0.0
+    result = simulate(Discrete({0: 0.5, 10: 0.5}), ProjectMode.ORGANIC, 5000, samples=10_000, seed=1, use_numpy=use_numpy)
+    effort = calculate(10, ProjectMode.ORGANIC, 5000).effort_person_months
+    assert result.effort_person_months.p10 == 0.0
+    assert result.effort_person_months.p90 == pytest.approx(effort, rel=1e-3)
+
+def test_cli_modes():
+    """Tests that the 'simulate' command offers the modes the simulation supports, and no others."""
+    testing = pytest.importorskip("typer.testing")
+    from cocomo_py.cli import app
+
+    runner = testing.CliRunner()
+    result = runner.invoke(app, ["simulate", "--kloc", "10", "--mode", "cocomo2", "--samples", "10"])
+    assert result.exit_code == 2
+    assert "is not one of" in result.output
+    for mode in ("organic", "semi-detached", "embedded"):
+        result = runner.invoke(app, ["simulate", "--kloc", "10", "--mode", mode, "--samples", "10"])
+        assert result.exit_code == 0, result.output
+
+@pytest.mark.parametrize("kloc, cost", [
+    (-5, 8000),
+    (Triangular(-1, 5, 10), 8000),
+    (Uniform(-2, 3), 8000),
+    (Discrete({-1: 0.5, 10: 0.5}), 8000),
+    (float("inf"), 8000),
+    (float("nan"), 8000),
+    (10, Triangular(-100, 8000, 9000)),
+    (10, Uniform(7000, float("inf"))),
+])
+def test_negative_or_infinite_inputs(kloc, cost):
+    """Tests that KLOC and cost distributions reaching below zero or to infinity are refused."""
+    with pytest.raises(ValueError, match="must be finite and non-negative"):
+        simulate(kloc, ProjectMode.ORGANIC, cost, samples=10)
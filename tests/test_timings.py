@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+from cocomo_py.analyzer import analyze_loc, analyze_tree
+from cocomo_py.cache import LocCache
+from cocomo_py.machine import main
+from cocomo_py.models import ProfileFormat
+from cocomo_py.timings import Timings
+
+# Fixture for a project of many small files, in two directories
+@pytest.fixture
+def project(tmp_path):
+    """Creates 600 Python files, more than two batches, with known sizes."""
+    root = tmp_path / "project"
+    for directory in ("app", "lib"):
+        (root / directory).mkdir(parents=True)
+        for i in range(300):
+            (root / directory / f"m{i}.py").write_text(f"# Module {i}\nvalue = {i}\n")
+    return root
+
+def test_phases_nest():
+    """Tests that a phase does not count the time of the phases opened inside it."""
+    timings = Timings()
+    with timings.phase("outer"):
+        assert list(timings.iterate("inner", range(3))) == [0, 1, 2]
+    phases = timings.phases
+    assert set(phases) == {"outer", "inner"}
+    assert sum(phases.values()) <= timings.wall_seconds
+    assert [event["name"] for event in timings.chrome_trace()["traceEvents"] if event["ph"] == "X"] == ["outer"]
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_analysis_timings(project, jobs):
+    """Tests the file counts and rates, the slowest files and that the report is unchanged."""
+    timings = Timings(top=3)
+    report = analyze_loc(project, jobs=jobs, timings=timings)
+    assert report == analyze_loc(project, jobs=jobs)
+    data = timings.to_dict()
+    assert data["files"]["read"] == 600
+    assert data["files"]["bytes"] == sum(path.stat().st_size for path in project.rglob("*.py"))
+    assert data["files"]["files_per_second"] > 0
+    assert {"analyze", "walk"} <= data["phases"].keys()
+    assert len(data["slowest_files"]) == 3
+    assert {entry["path"] for entry in data["slowest_directories"]} == {str(project / "app"), str(project / "lib")}
+    batches = [event for event in timings.chrome_trace()["traceEvents"] if event["name"] == "batch"]
+    assert sum(event["args"]["files"] for event in batches) == 600
+
+def test_cached_files(project, tmp_path):
+    """Tests that files whose counts come from the cache are reported as such, not as read."""
+    # Files modified within the last seconds are re-read on every run.
+    for path in project.rglob("*.py"):
+        os.utime(path, (1_000_000_000, 1_000_000_000))
+    with LocCache(tmp_path / "cache.sqlite3") as cache:
+        analyze_tree(project, jobs=1, cache=cache)
+        timings = Timings()
+        analyze_tree(project, jobs=1, cache=cache, timings=timings)
+    assert (timings.files_read, timings.files_cached) == (0, 600)
+    assert "cache" in timings.phases
+
+def test_cli_profile(project, tmp_path, capsys):
+    """Tests '--timings' and the JSON and Chrome trace profiles of the machine-readable CLI."""
+    for format in ProfileFormat:
+        profile = tmp_path / f"profile.{format}.json"
+        argv = ["estimate", str(project), "-f", "json", "--no-cache", "--timings", "--profile", str(profile)]
+        assert main(argv + ["--profile-format", str(format)]) == 0
+        data = json.loads(profile.read_text())
+        if format == ProfileFormat.CHROME:
+            assert {"estimate", "write", "batch"} <= {event["name"] for event in data["traceEvents"]}
+        else:
+            assert data["files"]["read"] == 600
+    assert "files/s" in capsys.readouterr().err
@@ -0,0 +1,53 @@
+import shutil
+import pytest
+from cocomo_py.analyzer import analyze_loc
+from cocomo_py.models import ProjectMode
+from cocomo_py.watch import LiveCounts, watch
+
+# Fixture for a small project tree
+@pytest.fixture
+def project(tmp_path):
+    """Creates a project with a Python package and a C file."""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "core.py").write_text("x = 1\n" * 100)
+    (tmp_path / "main.c").write_text("int x;\n" * 50)
+    return tmp_path
+
+def test_live_counts_match_a_full_recount(project):
+    """Tests that incremental updates give the same report as counting the tree again."""
+    counts = LiveCounts(project, jobs=1)
+    assert counts.scan() == 2
+
+    (project / "pkg" / "core.py").write_text("x = 1\n" * 150)
+    (project / "main.c").unlink()
+    (project / "lib" / "sub").mkdir(parents=True)
+    (project / "lib" / "sub" / "util.py").write_text("y = 2\n" * 30)
+    (project / "node_modules").mkdir()
+    (project / "node_modules" / "dep.js").write_text("var z;\n")
+    changed = counts.apply([
+        str(project / "pkg" / "core.py"), str(project / "main.c"), str(project / "lib"),
+        str(project / "node_modules" / "dep.js"), str(project / "notes.txt"),
+    ])
+    assert changed == 3
+    assert counts.report() == analyze_loc(project, jobs=1)
+
+    shutil.rmtree(project / "lib")
+    counts.apply([str(project / "lib")])
+    assert counts.report() == analyze_loc(project, jobs=1)
+    assert counts.report().total.code == 150
+
+@pytest.mark.parametrize("polling", [False, True])
+def test_watch_updates_on_change(project, polling):
+    """Tests the initial estimate and an update after a file changes, with inotify and polling."""
+    updates = watch(project, ProjectMode.ORGANIC, 5000, debounce=0.05, polling=polling, poll_interval=0.05, jobs=1)
+    try:
+        first = next(updates)
+        assert first.result.kloc == 0.15
+        assert first.changed_files == 2
+
+        (project / "pkg" / "extra.py").write_text("z = 3\n" * 50)
+        second = next(updates)
+        assert second.result.kloc == 0.2
+        assert second.report.languages["Python"].n_files == 2
+    finally:
+        updates.close()